@@ -0,0 +1,85 @@
+"""
+Compares the requests backend against wadalize.engine.FastEngine, sending
+the same GET requests to a minimal local asyncio HTTP/1.1 server.
+
+    python -m benchmarks.bench_engine -n 5000 --pipeline 16
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import requests
+
+from wadalize import WADLRequest
+from wadalize.engine import FastEngine
+
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 4\r\n\r\nyolo"
+
+
+async def handle(reader, writer):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_server():
+    """Starts the local server on a background thread, returning its url"""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return "http://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+
+
+def bench_requests(wrs):
+    start = time.perf_counter()
+    for wr in wrs:
+        req = wr.dump_as_request()
+        requests.request(req.method, str(req.url), headers=req.headers)
+    return time.perf_counter() - start
+
+
+def bench_requests_session(wrs):
+    start = time.perf_counter()
+    with requests.Session() as session:
+        for wr in wrs:
+            req = wr.dump_as_request()
+            session.request(req.method, str(req.url), headers=req.headers)
+    return time.perf_counter() - start
+
+
+def bench_fast(wrs, connections, pipeline):
+    start = time.perf_counter()
+    FastEngine(connections=connections, pipeline=pipeline).run((wr.location, wr.to_wire()) for wr in wrs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=2000, help="Number of requests per backend")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--pipeline", type=int, default=1)
+    args = parser.parse_args()
+
+    url = start_server()
+    wrs = [WADLRequest("{}/items/{}".format(url, num), "GET") for num in range(args.n)]
+
+    for name, elapsed in (
+        ("requests", bench_requests(wrs)),
+        ("requests (session)", bench_requests_session(wrs)),
+        ("fast", bench_fast(wrs, args.connections, args.pipeline)),
+    ):
+        print("{:<20} {:>8.3f}s {:>10.0f} req/s".format(name, elapsed, args.n / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Measures each stage of wadalize on synthetic WADLs of growing size: parsing,
+expansion into requests, building the Request models, dumping urls (like
+--dump-urls) and a run through the mock transport. Results are saved as JSON
+so they can be compared between commits.
+
+    python -m benchmarks.bench_wadl --sizes 1000 10000 --output before.json
+    python -m benchmarks.bench_wadl --sizes 1000 10000 --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import time
+
+from benchmarks.synthetic import generate_wadl
+from wadalize import WADLHandler
+from wadalize.runner import Runner
+from wadalize.scripts.wadalize import output_urls
+from wadalize.transport import MockTransport
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(fn, repeat):
+    """Returns the best wall time of calling fn repeat times, and its last
+    result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_size(wadl, depth, repeat):
+    """Runs every stage on the given WADL, returning a dict of stage name to
+    (seconds, number of items processed)"""
+    default_values = {"id{}".format(level): str(level) for level in range(depth)}
+    results = {}
+
+    elapsed, wh = timed(lambda: WADLHandler(wadl, default_values=default_values), repeat)
+    results["parse"] = (elapsed, len(wadl))
+
+    # requests are cached by the handler, so expand a fresh one each time
+    elapsed, wrs = timed(lambda: WADLHandler(wadl, default_values=default_values).requests, repeat)
+    results["expand"] = (elapsed - results["parse"][0], len(wrs))
+
+    elapsed, _ = timed(lambda: [wr.dump_as_request() for wr in wrs], repeat)
+    results["build"] = (elapsed, len(wrs))
+
+    def dump_urls():
+        with contextlib.redirect_stdout(io.StringIO()):
+            output_urls(wadl, None, {}, default_values, {})
+
+    elapsed, _ = timed(dump_urls, repeat)
+    results["dump_urls"] = (elapsed, len(wrs))
+
+    elapsed, _ = timed(lambda: sum(1 for _ in Runner(MockTransport(prepare="requests")).run(wrs)), repeat)
+    results["mock_run"] = (elapsed, len(wrs))
+    return results
+
+
+def compare(results, path):
+    with open(path) as f:
+        old = {(r["methods"], r["stage"]): r["seconds"] for r in json.load(f)["results"]}
+    for r in results:
+        before = old.get((r["methods"], r["stage"]))
+        if before:
+            print("{:>8} {:<10} {:>9.3f}s -> {:>9.3f}s {:>+7.1%}".format(r["methods"], r["stage"], before, r["seconds"], r["seconds"] / before - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Number of methods of each WADL")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--methods-per-resource", type=int, default=4)
+    parser.add_argument("--params-per-level", type=int, default=2)
+    parser.add_argument("--representations", type=int, default=1)
+    parser.add_argument("--regex-alternations", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of this many runs of each stage")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    args = parser.parse_args()
+
+    shape = dict(
+        depth=args.depth,
+        methods_per_resource=args.methods_per_resource,
+        params_per_level=args.params_per_level,
+        representations=args.representations,
+        regex_alternations=args.regex_alternations,
+    )
+    # lxml, furl, pydantic and the models are imported lazily, on first use:
+    # go through every stage once so the first timings don't include them
+    bench_size(generate_wadl(methods=4, **shape), args.depth, 1)
+
+    results = []
+    for size in args.sizes:
+        wadl = generate_wadl(methods=size, **shape)
+        for stage, (seconds, items) in bench_size(wadl, args.depth, args.repeat).items():
+            results.append(dict(methods=size, stage=stage, seconds=seconds, items=items))
+            print("{:>8} {:<10} {:>9.3f}s {:>10} items".format(size, stage, seconds, items))
+
+    if args.compare:
+        compare(results, args.compare)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(revision=git_revision(), python=platform.python_version(), shape=shape, results=results), f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
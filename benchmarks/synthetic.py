@@ -0,0 +1,118 @@
+"""
+Deterministic generator of synthetic WADL documents, sized for benchmarks.
+
+    python -m benchmarks.synthetic --methods 10000 --depth 3 > big.wadl
+"""
+import argparse
+from xml.sax.saxutils import quoteattr
+
+
+VERBS = ("GET", "POST", "PUT", "DELETE")
+MEDIA_TYPES = ("application/json", "application/xml", "text/plain", "application/x-www-form-urlencoded")
+PARAM_TYPES = ("xs:string", "xs:int", "xs:boolean", "xs:date")
+
+
+def generate_wadl(methods=1000, depth=2, methods_per_resource=4, params_per_level=2, representations=1, regex_alternations=0, regex_every=10):
+    """
+    Returns a WADL document with the given number of <method> elements. The
+    same arguments always give the same document.
+
+    Methods are spread over chains of `depth` nested <resource> elements,
+    `methods_per_resource` on each of them. Every resource has a {template}
+    segment and `params_per_level` params, and every method `params_per_level`
+    query params of its own and `representations` request and response
+    representations. Just like in real descriptors, the query params of a
+    method are declared in each of its request representations, or directly
+    in its request when it has none.
+    Args:
+        methods (int): Number of <method> elements.
+        depth (int): Nesting of each chain of resources.
+        methods_per_resource (int): <method> elements per resource.
+        params_per_level (int): <param> elements per resource and per method.
+        representations (int): Representations per request and response.
+        regex_alternations (int): When not 0, one chain of resources every
+            `regex_every` gets a {name: a|b|...} segment with that many
+            alternatives, each expanded into a request.
+        regex_every (int): See regex_alternations.
+    """
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        '<application xmlns="http://wadl.dev.java.net/2009/02" xmlns:xs="http://www.w3.org/2001/XMLSchema">',
+        '  <resources base="https://bench.example.com/api">',
+    ]
+
+    count = 0
+    chain = 0
+    while count < methods:
+        indent = "  "
+        for level in range(depth):
+            indent += "  "
+            path = "/r{}l{}/{{id{}}}".format(chain, level, level)
+            if level == 0 and regex_alternations and chain % regex_every == 0:
+                path += "/{{kind: {}}}".format("|".join("k{}".format(num) for num in range(regex_alternations)))
+            out.append("{}<resource path={}>".format(indent, quoteattr(path)))
+            out.append('{}  <param name="id{}" style="template" type="xs:string"/>'.format(indent, level))
+            for num in range(params_per_level - 1):
+                out.append('{}  <param name="h{}_{}" style="header" type="xs:string"/>'.format(indent, level, num))
+
+            for _ in range(methods_per_resource):
+                if count >= methods:
+                    break
+                out.extend(_method(indent + "  ", count, params_per_level, representations))
+                count += 1
+
+        for level in reversed(range(depth)):
+            out.append("  " * (level + 2) + "</resource>")
+        chain += 1
+
+    out.extend(["  </resources>", "</application>"])
+    return "\n".join(out)
+
+
+def _params(indent, num, params):
+    return [
+        '{}<param name="q{}" style="query" type="{}" default="v{}"/>'.format(indent, param, PARAM_TYPES[(num + param) % len(PARAM_TYPES)], param)
+        for param in range(params)
+    ]
+
+
+def _method(indent, num, params, representations):
+    lines = ['{}<method id="m{}" name="{}">'.format(indent, num, VERBS[num % len(VERBS)]), "{}  <request>".format(indent)]
+    # params of requests having representations are only read from them
+    if not representations:
+        lines.extend(_params(indent + "    ", num, params))
+    for rep in range(representations):
+        lines.append('{}    <representation mediaType="{}">'.format(indent, MEDIA_TYPES[(num + rep) % len(MEDIA_TYPES)]))
+        lines.extend(_params(indent + "      ", num, params))
+        lines.append("{}    </representation>".format(indent))
+    lines.append("{}  </request>".format(indent))
+    lines.append("{}  <response>".format(indent))
+    lines.extend('{}    <representation mediaType="{}"/>'.format(indent, MEDIA_TYPES[rep % len(MEDIA_TYPES)]) for rep in range(representations))
+    lines.extend(["{}  </response>".format(indent), "{}</method>".format(indent)])
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--methods-per-resource", type=int, default=4)
+    parser.add_argument("--params-per-level", type=int, default=2)
+    parser.add_argument("--representations", type=int, default=1)
+    parser.add_argument("--regex-alternations", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        generate_wadl(
+            methods=args.methods,
+            depth=args.depth,
+            methods_per_resource=args.methods_per_resource,
+            params_per_level=args.params_per_level,
+            representations=args.representations,
+            regex_alternations=args.regex_alternations,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # -*- encoding: utf-8
+from .wadl import WADLEndpoint
 from .wadl import WADLHandler
 from .wadl import WADLParam
 from .wadl import WADLRequest
 
-__all__ = ["WADLHandler", "WADLParam", "WADLRequest"]
+__all__ = ["WADLEndpoint", "WADLHandler", "WADLParam", "WADLRequest"]
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from .wadl import WADLHandler
+
+
+BatchResult = namedtuple("BatchResult", ["index", "source", "lines", "error", "elapsed"])
+
+
+def expand_source(source, content, base=None, default_values=None, filters=None, values=None, combiner=None):
+    """
+    Parses and expands one WADL source, returning its requests as NDJSON
+    lines tagged with the source. Runs in the worker processes of run_batch,
+    so it only deals with picklable arguments and results.
+    Args:
+        source (str): Path or url the content comes from.
+        content (str or bytes): The WADL document.
+        base, default_values, filters, values, combiner: Same as WADLHandler.
+    """
+    wh = WADLHandler(content, base=base, default_values=default_values, filters=filters, values=values, combiner=combiner)
+    return [json.dumps(dict(wr.dump_as_dict(), source=source, url=wr.url)) for wr in wh.requests]
+
+
+class _InlineExecutor:
+    """Runs the submitted calls right away, in the calling process"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def run_batch(sources, fetch, jobs=None, fetch_workers=8, **kwargs):
+    """
+    Fetches, parses and expands many WADL sources, yielding a BatchResult for
+    each of them as soon as it's done, so not in the order of sources.
+
+    Sources are fetched by a pool of threads, then parsed and expanded by a
+    pool of processes, so the whole batch takes about as long as its slowest
+    sources divided by the number of cores. At most fetch_workers + 2 * jobs
+    sources are in flight at once, which bounds memory whatever the number of
+    sources. A source failing to be fetched or parsed gets a BatchResult with
+    its error and doesn't stop the rest.
+    Args:
+        sources (iterable of str): Paths or urls of the WADL sources.
+        fetch (callable): Returns the content of a source, like open_or_get.
+        jobs (int): Number of worker processes. Defaults to the number of
+            cores; 1 parses everything in the calling process.
+        fetch_workers (int): Number of sources fetched concurrently.
+        kwargs: Passed to expand_source (base, default_values, filters,
+            values, combiner).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    limit = fetch_workers + 2 * jobs
+    sources = enumerate(sources)
+    pending = {}  # future -> (index, source, stage, started)
+
+    parser = ProcessPoolExecutor(jobs) if jobs > 1 else _InlineExecutor()
+    with ThreadPoolExecutor(fetch_workers) as fetcher, parser:
+
+        def feed():
+            while len(pending) < limit:
+                try:
+                    index, source = next(sources)
+                except StopIteration:
+                    return
+                pending[fetcher.submit(fetch, source)] = (index, source, "fetch", time.perf_counter())
+
+        feed()
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, source, stage, started = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    yield BatchResult(index, source, None, "{}: {}".format(type(e).__name__, e), time.perf_counter() - started)
+                    continue
+
+                if stage == "fetch":
+                    pending[parser.submit(expand_source, source, value, **kwargs)] = (index, source, "parse", started)
+                else:
+                    yield BatchResult(index, source, value, None, time.perf_counter() - started)
+            feed()
@@ -0,0 +1,143 @@
+import time
+from collections import Counter
+from collections import deque
+from urllib.parse import urlparse
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "opened_at", "probing")
+
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    Per endpoint circuit breaker. Requests are grouped by host and resource
+    template (see WADLRequest.template), so every expanded variant of a
+    failing resource shares one circuit.
+
+    A circuit opens when, among the last `window` requests of its group (and
+    at least `min_requests`), the ratio of failures reaches `failure_ratio`.
+    Failures are requests without a response (timeouts, connection errors)
+    and 5xx responses. While open, the requests of the group are skipped, or
+    deferred to the end of the run. After `cooldown` seconds a single probe
+    is let through: if it succeeds the circuit closes again, otherwise it
+    stays open for another cooldown.
+
+    Note the breaker can only act on requests not handed to the transport
+    yet: the fast transport must be given a window (see FastTransport) for it
+    to have any effect, it would otherwise get every request before any
+    result is known.
+    Args:
+        failure_ratio (float): Ratio of failures opening the circuit.
+        min_requests (int): Requests needed before the ratio is considered.
+        window (int): Number of recent requests the ratio is computed on.
+        cooldown (float): Seconds before probing an open circuit.
+        defer (bool): Hold back the requests of open circuits and retry them
+            at the end of the run, once their cooldown is over, instead of
+            skipping them.
+        clock (callable): Returns the current time in seconds.
+        sleep (callable): Waits for the given seconds.
+    Attributes:
+        skipped (Counter): Number of skipped requests per group.
+    """
+
+    def __init__(self, failure_ratio=0.5, min_requests=5, window=20, cooldown=30.0, defer=False, clock=time.monotonic, sleep=time.sleep):
+        if not 0 < failure_ratio <= 1:
+            raise ValueError("failure_ratio must be greater than 0 and at most 1")
+
+        self.failure_ratio = failure_ratio
+        self.min_requests = max(1, min_requests)
+        self.window = max(window, self.min_requests)
+        self.cooldown = cooldown
+        self.defer = defer
+        self.clock = clock
+        self.sleep = sleep
+        self.circuits = {}
+        self.skipped = Counter()
+
+    def key(self, wr):
+        """Returns the group of a request: its host and template"""
+        return "{} {}".format(urlparse(wr.location).netloc, wr.template)
+
+    def _circuit(self, wr):
+        key = self.key(wr)
+        if key not in self.circuits:
+            self.circuits[key] = _Circuit(self.window)
+        return self.circuits[key]
+
+    def state(self, wr):
+        circuit = self.circuits.get(self.key(wr))
+        return circuit.state if circuit is not None else CLOSED
+
+    def allow(self, wr):
+        """Whether wr may be sent now. Letting a probe through on an open
+        circuit whose cooldown is over turns it half-open"""
+        circuit = self._circuit(wr)
+        if circuit.state == CLOSED:
+            return True
+        if circuit.state == OPEN and self.clock() - circuit.opened_at >= self.cooldown:
+            circuit.state = HALF_OPEN
+        if circuit.state == HALF_OPEN and not circuit.probing:
+            circuit.probing = True
+            return True
+        return False
+
+    def record(self, wr, resp):
+        """Records the outcome of a sent request"""
+        circuit = self._circuit(wr)
+        failed = bool(resp.error) or (resp.status is not None and resp.status >= 500)
+
+        if circuit.state == HALF_OPEN:
+            circuit.probing = False
+            if failed:
+                circuit.state = OPEN
+                circuit.opened_at = self.clock()
+            else:
+                circuit.state = CLOSED
+                circuit.outcomes.clear()
+            return
+
+        circuit.outcomes.append(failed)
+        if circuit.state == CLOSED and len(circuit.outcomes) >= self.min_requests:
+            if sum(circuit.outcomes) / len(circuit.outcomes) >= self.failure_ratio:
+                circuit.state = OPEN
+                circuit.opened_at = self.clock()
+
+    def filter(self, wrs):
+        """Yields the requests of wrs that may be sent, skipping or deferring
+        the ones whose circuit is open. Meant to be consumed one request at a
+        time, recording each result before asking for the next one"""
+        deferred = []
+        for wr in wrs:
+            if self.allow(wr):
+                yield wr
+            elif self.defer:
+                deferred.append(wr)
+            else:
+                self.skipped[self.key(wr)] += 1
+
+        # Deferred requests get a single chance: wait for the cooldown of
+        # their circuit once, then probe it
+        waited = set()
+        for wr in deferred:
+            circuit = self._circuit(wr)
+            key = self.key(wr)
+            if circuit.state == OPEN and key not in waited:
+                waited.add(key)
+                remaining = self.cooldown - (self.clock() - circuit.opened_at)
+                if remaining > 0:
+                    self.sleep(remaining)
+            if self.allow(wr):
+                yield wr
+            else:
+                self.skipped[key] += 1
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import deque
+from collections import namedtuple
+
+from .transport import Transport
+from .transport import TransportResponse
+
+
+# Verbs whose responses may be reused
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+# Statuses cacheable by default (RFC 7231, section 6.1)
+CACHEABLE_STATUSES = (200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501)
+
+CacheEntry = namedtuple("CacheEntry", ["status", "headers", "size", "etag", "last_modified", "stored_at"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """
+    On-disk cache of the responses of previous runs, stored in a sqlite
+    database. Responses are keyed by the fingerprint of their request (see
+    WADLRequest.fingerprint) and the extra headers sent along. Only the
+    status, headers and size reported by the transport are kept, which is all
+    the runner looks at.
+
+    Entries younger than `ttl` seconds are reused without touching the
+    network. Older ones carrying an ETag or Last-Modified header are
+    revalidated with a conditional request; the rest are sent again. Once the
+    stored entries take more than `max_bytes`, the least recently used ones
+    are evicted.
+    Args:
+        path (str): Path of the sqlite database, created if needed.
+        ttl (float): Seconds an entry is reused without revalidating it.
+        max_bytes (int): Size budget of the stored entries.
+        headers (list of str): Request headers taken into account by the key,
+            see WADLRequest.fingerprint.
+        clock (callable): Returns the current time in seconds.
+    Attributes:
+        hits (int): Requests answered from the cache.
+        revalidated (int): Conditional requests answered with a 304.
+        misses (int): Cacheable requests that had to be sent.
+        evicted (int): Entries dropped to stay within max_bytes.
+    """
+
+    def __init__(self, path, ttl=3600.0, max_bytes=64 * 1024 * 1024, headers=None, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.headers = headers
+        self.clock = clock
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+        self.pending = 0
+
+    def key(self, wr, headers=None):
+        """Returns the cache key of wr sent along the given extra headers"""
+        extra = sorted((k.lower(), v) for k, v in (headers or {}).items())
+        return hashlib.sha1(repr((wr.fingerprint(headers=self.headers), extra)).encode()).hexdigest()
+
+    def get(self, key):
+        row = self.db.execute("SELECT status, headers, size, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (self.clock(), key))
+        return CacheEntry(row[0], json.loads(row[1]), *row[2:])
+
+    def is_fresh(self, entry):
+        return self.clock() - entry.stored_at < self.ttl
+
+    def put(self, key, resp):
+        """Stores the given TransportResponse, if cacheable"""
+        headers = {name.lower(): value for name, value in (resp.headers or {}).items()}
+        if resp.error or resp.status not in CACHEABLE_STATUSES or "no-store" in headers.get("cache-control", "").lower():
+            return
+
+        headers_json = json.dumps(headers, sort_keys=True)
+        size = len(key) + len(headers_json)
+        now = self.clock()
+
+        old = self.db.execute("SELECT bytes FROM responses WHERE key = ?", (key,)).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, resp.status, headers_json, resp.size or 0, headers.get("etag"), headers.get("last-modified"), now, now, size),
+        )
+        self.total_bytes += size - (old[0] if old else 0)
+        self._evict()
+        self._written()
+
+    def refresh(self, key):
+        """Marks an entry as fresh again, after a 304"""
+        now = self.clock()
+        self.db.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+        self._written()
+
+    def conditional_headers(self, entry):
+        """Returns the headers revalidating the given entry"""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute("SELECT key, bytes FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evicted += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def _written(self):
+        # Commit every now and then, a commit per response would be too slow
+        self.pending += 1
+        if self.pending >= 100:
+            self.db.commit()
+            self.pending = 0
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CachedTransport(Transport):
+    """
+    Wraps another transport, answering from a ResponseCache whenever
+    possible. Requests to revalidate are sent through the wrapped transport
+    with If-None-Match/If-Modified-Since headers added, so it keeps sending
+    them in batches if it can.
+    Args:
+        transport (Transport): Backend sending the requests the cache can't
+            answer.
+        cache (ResponseCache): Where responses are looked up and stored.
+    """
+
+    name = "cached"
+
+    def __init__(self, transport, cache):
+        self.transport = transport
+        self.cache = cache
+
+    def send(self, wr, headers=None):
+        return next(iter(self.send_all([wr], headers=headers)))[1]
+
+    def send_all(self, wrs, headers=None):
+        hits = deque()
+        sent = {}  # id of the request actually sent -> (request, key, entry)
+
+        def to_send():
+            for wr in wrs:
+                if wr.method.upper() not in CACHEABLE_METHODS:
+                    sent[id(wr)] = (wr, None, None)
+                    yield wr
+                    continue
+
+                key = self.cache.key(wr, headers)
+                entry = self.cache.get(key)
+                if entry is not None and self.cache.is_fresh(entry):
+                    self.cache.hits += 1
+                    hits.append((wr, TransportResponse(entry.status, 0.0, entry.size, entry.headers, None, cached=True)))
+                    continue
+
+                conditional = self.cache.conditional_headers(entry) if entry is not None else {}
+                if conditional:
+                    out = wr.replace(headers=dict(wr.headers or {}, **conditional))
+                else:
+                    entry = None
+                    out = wr
+                sent[id(out)] = (wr, key, entry)
+                yield out
+
+        for out, resp in self.transport.send_all(to_send(), headers=headers):
+            # hits found while the wrapped transport pulled this request
+            while hits:
+                yield hits.popleft()
+
+            wr, key, entry = sent.pop(id(out))
+            if key is None:
+                yield wr, resp
+            elif entry is not None and resp.status == 304:
+                self.cache.revalidated += 1
+                self.cache.refresh(key)
+                yield wr, TransportResponse(entry.status, resp.elapsed, entry.size, entry.headers, None)
+            else:
+                self.cache.misses += 1
+                self.cache.put(key, resp)
+                yield wr, resp
+
+        while hits:
+            yield hits.popleft()
+
+    def close(self):
+        self.transport.close()
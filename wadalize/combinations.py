@@ -0,0 +1,134 @@
+import heapq
+import itertools
+import math
+import random
+import re
+
+
+def covering_array(domains, strength=2, seed=0, candidates=10):
+    """
+    Lazily yields combinations of one value of each domain, so that every
+    combination of `strength` values of as many domains shows up at least
+    once: every pair of values when strength is 2 (pairwise). That takes far
+    fewer combinations than the full product, eg. about 40 rather than ~10M
+    for 10 domains of 5 values each, pairwise.
+
+    Combinations are built greedily, one at a time: each of `candidates`
+    tries starts from a tuple not covered yet and adds the value of each
+    remaining domain covering the most new tuples, and the try covering the
+    most is kept. The same seed always gives the same combinations.
+    Args:
+        domains (list of list): Values of each domain.
+        strength (int): Size of the tuples to cover. When it isn't smaller
+            than the number of domains, the full product is yielded.
+        seed (int): Seed breaking ties and ordering the tries.
+        candidates (int): Tries for each combination.
+    """
+    domains = [list(domain) for domain in domains]
+    if strength < 1:
+        raise ValueError("The strength of a covering array must be at least 1")
+    if not all(domains):
+        return
+    if strength >= len(domains):
+        yield from itertools.product(*domains)
+        return
+
+    rng = random.Random(seed)
+    # uncovered tuples of value indices for each combination of domains
+    uncovered = {
+        combo: set(itertools.product(*(range(len(domains[i])) for i in combo))) for combo in itertools.combinations(range(len(domains)), strength)
+    }
+    remaining = sum(len(tuples) for tuples in uncovered.values())
+
+    while remaining:
+        best, best_gain = None, -1
+        for _ in range(candidates):
+            row = _candidate(domains, strength, uncovered, rng)
+            gain = sum(tuple(row[i] for i in combo) in tuples for combo, tuples in uncovered.items())
+            if gain > best_gain:
+                best, best_gain = row, gain
+
+        for combo, tuples in uncovered.items():
+            tuples.discard(tuple(best[i] for i in combo))
+        remaining -= best_gain
+        yield tuple(domains[i][value] for i, value in enumerate(best))
+
+
+def _candidate(domains, strength, uncovered, rng):
+    """Returns a combination of value indices, as a list, starting from an
+    uncovered tuple and greedily filling the other domains"""
+    combo = max((combo for combo, tuples in uncovered.items() if tuples), key=lambda combo: (len(uncovered[combo]), rng.random()))
+    row = [None] * len(domains)
+    for i, value in zip(combo, rng.choice(sorted(uncovered[combo]))):
+        row[i] = value
+
+    assigned = list(combo)
+    others = [i for i in range(len(domains)) if row[i] is None]
+    rng.shuffle(others)
+    for i in others:
+        best, best_score = None, -1
+        for value in range(len(domains[i])):
+            row[i] = value
+            score = 0
+            for members in itertools.combinations(assigned, strength - 1):
+                key = tuple(sorted(members + (i,)))
+                score += tuple(row[j] for j in key) in uncovered[key]
+            if score > best_score or (score == best_score and rng.random() < 0.5):
+                best, best_score = value, score
+        row[i] = best
+        assigned.append(i)
+    return row
+
+
+class Combiner:
+    """
+    Decides which combinations of the candidate values of the params, and of
+    the paths of an endpoint, become requests.
+    Args:
+        strength (int): None for the full product, 2 for pairwise, t for
+            t-way. See covering_array.
+        seed (int): Seed of the covering arrays.
+    """
+
+    def __init__(self, strength=2, seed=0):
+        self.strength = strength
+        self.seed = seed
+
+    @classmethod
+    def from_string(cls, mode, seed=0):
+        """Returns a Combiner from "product", "pairwise" or "N-way" """
+        if mode == "product":
+            return cls(strength=None, seed=seed)
+        if mode == "pairwise":
+            return cls(strength=2, seed=seed)
+        match = re.match(r"^(\d+)-way$", mode)
+        if match is None or int(match.group(1)) < 1:
+            raise ValueError("Combination mode must be product, pairwise or N-way, eg. 3-way, not {}".format(mode))
+        return cls(strength=int(match.group(1)), seed=seed)
+
+    def combine(self, domains):
+        """Lazily yields the combinations to use, as tuples holding one value
+        of each domain"""
+        if self.strength is None:
+            return itertools.product(*domains)
+        return covering_array(domains, strength=self.strength, seed=self.seed)
+
+    def estimate(self, sizes):
+        """Returns how many combinations combine() yields for domains of the
+        given sizes, without building any: exactly for the product, and as a
+        heuristic upper bound estimate for covering arrays.
+
+        Some row always covers at least 1/P of the tuples left, P being the
+        product of the `strength` largest sizes, and greedy rows do at least
+        as well in practice, so T tuples take at most P * ln(T) + 1 rows. The
+        bound is loose, it can be several times the actual size: 177 for 10
+        domains of 5 values pairwise, where the array has about 45 rows"""
+        if 0 in sizes:
+            return 0
+        product = math.prod(sizes)
+        if self.strength is None or self.strength >= len(sizes):
+            return product
+        # every row covers at least one new tuple, and no row shows up twice
+        tuples = sum(math.prod(combo) for combo in itertools.combinations(sizes, self.strength))
+        largest = math.prod(heapq.nlargest(self.strength, sizes))
+        return min(product, tuples, math.ceil(largest * math.log(tuples)) + 1)
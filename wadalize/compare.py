@@ -0,0 +1,204 @@
+import itertools
+import math
+import os
+import sqlite3
+from collections import namedtuple
+
+# Latency percentiles computed for each endpoint
+PERCENTILES = (50, 90, 99)
+
+# Latencies of an endpoint in both runs, endpoint being its route (see
+# WADLRequest.route). percentiles_a and percentiles_b map each of PERCENTILES
+# to seconds; change is the relative change of the compared percentile,
+# p_value the probability of seeing latencies this far apart if the endpoint
+# didn't change (Mann-Whitney U test)
+EndpointDelta = namedtuple(
+    "EndpointDelta", ["method_id", "endpoint", "samples_a", "samples_b", "percentiles_a", "percentiles_b", "change", "p_value", "regression"]
+)
+
+
+def nearest_rank(values, q):
+    """Returns the q-th percentile of the given sorted values, nearest rank"""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def mann_whitney(a, b):
+    """Returns the two-sided p-value of the Mann-Whitney U test of the given
+    sorted samples, with the normal approximation and the tie correction"""
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    rank_sum = 0.0  # sum of the ranks of the values of a
+    ties = 0
+    i = j = 0
+    rank = 1
+    while i < n1 or j < n2:
+        value = a[i] if j == n2 or (i < n1 and a[i] <= b[j]) else b[j]
+        count_a = count_b = 0
+        while i < n1 and a[i] == value:
+            i += 1
+            count_a += 1
+        while j < n2 and b[j] == value:
+            j += 1
+            count_b += 1
+        tied = count_a + count_b
+        rank_sum += count_a * (rank + (tied - 1) / 2)
+        ties += tied**3 - tied
+        rank += tied
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def last_run(path):
+    """Returns the id of the last run stored in a results database"""
+    db = sqlite3.connect(path)
+    try:
+        row = db.execute("SELECT MAX(id) FROM runs").fetchone()
+    except sqlite3.DatabaseError:
+        row = None
+    finally:
+        db.close()
+    if row is None or row[0] is None:
+        raise ValueError("{} holds no run, record one with --results-db".format(path))
+    return row[0]
+
+
+def read_latencies(path, run_id=None):
+    """
+    Lazily yields the latencies of each endpoint of a run recorded by
+    wadalize.results.ResultsWriter, one endpoint at a time: pairs of
+    ((route, method_id), sorted list of seconds), ordered by route and method
+    id. Only the latencies of a single endpoint are held in memory. Requests
+    without a response, and responses from the response cache, are left out.
+    Args:
+        path (str): Path of the results database.
+        run_id (int): Run to read, the last one by default.
+    """
+    if not os.path.isfile(path):
+        raise ValueError("{} is not a results database".format(path))
+    run_id = run_id if run_id is not None else last_run(path)
+    db = sqlite3.connect(path)
+    try:
+        rows = db.execute(
+            "SELECT route, COALESCE(method_id, ''), elapsed FROM results WHERE run_id = ? AND error IS NULL AND elapsed IS NOT NULL "
+            "AND NOT cached ORDER BY route, COALESCE(method_id, ''), elapsed",
+            (run_id,),
+        )
+        for key, group in itertools.groupby(rows, key=lambda row: row[:2]):
+            yield key, [row[2] for row in group]
+    finally:
+        db.close()
+
+
+class Comparison:
+    """
+    Latency changes of the endpoints of run B with respect to run A, see
+    compare_runs.
+    Attributes:
+        deltas (list of EndpointDelta): Endpoints found in both runs.
+        only_a (int): Endpoints only found in run A.
+        only_b (int): Endpoints only found in run B.
+        percentile (int): Percentile the runs were compared by.
+    """
+
+    def __init__(self, deltas, only_a=0, only_b=0, percentile=90):
+        self.deltas = deltas
+        self.only_a = only_a
+        self.only_b = only_b
+        self.percentile = percentile
+
+    @property
+    def regressions(self):
+        """Endpoints significantly slower in run B, the worst first"""
+        return sorted((d for d in self.deltas if d.regression), key=lambda d: -d.change)
+
+    def summary(self, top=20):
+        """Returns the comparison as a few human readable lines, listing the
+        `top` worst regressions"""
+        regressions = self.regressions
+        lines = [
+            "Endpoints compared: {} (only in A: {}, only in B: {})".format(len(self.deltas), self.only_a, self.only_b),
+            "Regressions: {}".format(len(regressions)),
+        ]
+        for d in regressions[:top]:
+            lines.append(
+                "  {:>+8.1%} {} p{}: {:.1f}ms -> {:.1f}ms (p50 {:.1f}ms -> {:.1f}ms, n={}/{}, p={:.4f})".format(
+                    d.change,
+                    d.endpoint,
+                    self.percentile,
+                    d.percentiles_a[self.percentile] * 1000,
+                    d.percentiles_b[self.percentile] * 1000,
+                    d.percentiles_a[50] * 1000,
+                    d.percentiles_b[50] * 1000,
+                    d.samples_a,
+                    d.samples_b,
+                    d.p_value,
+                )
+            )
+        return "\n".join(lines)
+
+
+def compare_runs(path_a, path_b, run_a=None, run_b=None, percentile=90, alpha=0.05, min_change=0.1, min_samples=5):
+    """
+    Compares the latencies of two runs recorded with --results-db, endpoint
+    by endpoint. Endpoints are aligned by their route, the verb and the path
+    template relative to the base url, and their method id, so runs against
+    different base urls (see -b) line up. Both runs are streamed side by
+    side, ordered by endpoint, so only the latencies of one endpoint of each
+    run are in memory at once.
+
+    An endpoint regressed when its `percentile` got at least `min_change`
+    slower, relatively, and the Mann-Whitney U test tells its latencies
+    changed with a p-value below `alpha`. Endpoints with fewer than
+    `min_samples` latencies in any run are never flagged.
+    Args:
+        path_a, path_b (str): Results databases of runs A and B. They can be
+            the same file.
+        run_a, run_b (int): Runs to compare, the last one of each database by
+            default.
+        percentile (int): One of PERCENTILES.
+    """
+    if percentile not in PERCENTILES:
+        raise ValueError("Percentile must be one of {}".format(", ".join(map(str, PERCENTILES))))
+
+    deltas = []
+    only_a = only_b = 0
+    stream_a, stream_b = read_latencies(path_a, run_a), read_latencies(path_b, run_b)
+    a, b = next(stream_a, None), next(stream_b, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            only_a += 1
+            a = next(stream_a, None)
+        elif a is None or b[0] < a[0]:
+            only_b += 1
+            b = next(stream_b, None)
+        else:
+            deltas.append(_delta(a[0], a[1], b[1], percentile, alpha, min_change, min_samples))
+            a, b = next(stream_a, None), next(stream_b, None)
+    return Comparison(deltas, only_a=only_a, only_b=only_b, percentile=percentile)
+
+
+def _delta(key, latencies_a, latencies_b, percentile, alpha, min_change, min_samples):
+    endpoint, method_id = key
+    percentiles_a = {q: nearest_rank(latencies_a, q) for q in PERCENTILES}
+    percentiles_b = {q: nearest_rank(latencies_b, q) for q in PERCENTILES}
+    before, after = percentiles_a[percentile], percentiles_b[percentile]
+    change = (after - before) / before if before else (math.inf if after else 0.0)
+
+    enough = len(latencies_a) >= min_samples and len(latencies_b) >= min_samples
+    p_value = mann_whitney(latencies_a, latencies_b) if enough else 1.0
+    return EndpointDelta(
+        method_id=method_id or None,
+        endpoint=endpoint,
+        samples_a=len(latencies_a),
+        samples_b=len(latencies_b),
+        percentiles_a=percentiles_a,
+        percentiles_b=percentiles_b,
+        change=change,
+        p_value=p_value,
+        regression=enough and change >= min_change and p_value < alpha,
+    )
@@ -0,0 +1,32 @@
+class Deduplicator:
+    """
+    Drops requests functionally identical to one already seen, according to
+    WADLRequest.fingerprint. Representations differing only by their
+    Content-Type, methods repeated across <resources> blocks or regex
+    expansions collapsing to the same url all end up sent once.
+    Args:
+        headers (list of str): Headers taken into account by the fingerprint,
+            see WADLRequest.fingerprint.
+    Attributes:
+        seen (int): Requests that went through the filter.
+        collapsed (int): Requests dropped as duplicates.
+    """
+
+    def __init__(self, headers=None):
+        self.headers = headers
+        self.seen = 0
+        self.collapsed = 0
+        self._fingerprints = set()
+
+    def filter(self, wrs):
+        """Yields the requests of the iterable wrs whose fingerprint wasn't
+        seen before, keeping their order"""
+        fingerprints = self._fingerprints
+        for wr in wrs:
+            self.seen += 1
+            key = wr.fingerprint(headers=self.headers)
+            if key in fingerprints:
+                self.collapsed += 1
+                continue
+            fingerprints.add(key)
+            yield wr
@@ -0,0 +1,121 @@
+import hashlib
+from collections import namedtuple
+
+from lxml import etree
+
+from .wadl import join_path
+
+
+EndpointKey = namedtuple("EndpointKey", ["method", "path", "method_id"])
+
+
+def _localname(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else None
+
+
+def _canonical_param(param):
+    options = tuple(sorted(x.get("value") or "" for x in param if _localname(x.tag) == "option"))
+    return tuple(sorted(param.attrib.items())), options
+
+
+def iter_fingerprints(source):
+    """
+    Streams over a WADL document yielding a pair of (EndpointKey, digest) for
+    each <method> element, without building the whole tree. The key is made
+    of the HTTP verb, the path template relative to the base url and the
+    method id. The digest covers the params of the method and its resources,
+    and its request and response representations.
+
+    Like WADLHandler, only params attached to the method itself or directly
+    to its ancestors count. Params of a resource declared after its methods
+    are not seen.
+    Args:
+        source (str or file object): Path or file-like object to read the
+            WADL document from.
+    """
+    frames = []  # one (path, params) pair per <resources>/<resource> ancestor
+
+    for event, el in etree.iterparse(source, events=("start", "end")):
+        tag = _localname(el.tag)
+
+        if event == "start":
+            if tag in ("resources", "resource"):
+                frames.append((el.get("path") if tag == "resource" else None, []))
+            continue
+
+        if tag == "param":
+            parent = el.getparent()
+            if frames and parent is not None and _localname(parent.tag) in ("resources", "resource"):
+                frames[-1][1].append(_canonical_param(el))
+        elif tag == "method":
+            params = [_canonical_param(x) for x in el.iter() if _localname(x.tag) == "param"]
+            for _, frame_params in frames:
+                params.extend(frame_params)
+
+            representations = []
+            for x in el.iter():
+                if _localname(x.tag) == "representation":
+                    kind = _localname(x.getparent().tag)
+                    representations.append((kind, tuple(sorted(x.attrib.items()))))
+
+            canonical = (el.get("name", "").upper(), tuple(sorted(params)), tuple(sorted(representations)))
+            digest = hashlib.blake2b(repr(canonical).encode(), digest_size=16).hexdigest()
+            key = EndpointKey(el.get("name", "").upper(), join_path([path for path, _ in frames]), el.get("id"))
+            yield key, digest
+
+            # drop what was already seen to keep memory flat
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+        elif tag in ("resources", "resource"):
+            frames.pop()
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+
+
+class WADLDiff:
+    """
+    Endpoint level differences between two versions of a WADL.
+    Attributes:
+        added (list of EndpointKey): Endpoints only found in the new version.
+        removed (list of EndpointKey): Endpoints only found in the old one.
+        changed (list of EndpointKey): Endpoints found in both, with different
+            params or representations.
+        unchanged (int): Number of endpoints found in both, identical.
+    """
+
+    def __init__(self, old, new):
+        old_fingerprints = dict(iter_fingerprints(old))
+
+        self.added = []
+        self.changed = []
+        self.unchanged = 0
+        seen = set()
+        for key, digest in iter_fingerprints(new):
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if key not in old_fingerprints:
+                self.added.append(key)
+            elif old_fingerprints[key] != digest:
+                self.changed.append(key)
+            else:
+                self.unchanged += 1
+
+        self.removed = [key for key in old_fingerprints if key not in seen]
+
+    @property
+    def modified(self):
+        """Endpoints worth running again: the added and the changed ones"""
+        return self.added + self.changed
+
+    def summary(self):
+        lines = []
+        for sign, keys in (("+", self.added), ("-", self.removed), ("~", self.changed)):
+            lines.extend("{} {} {}{}".format(sign, key.method, key.path, " ({})".format(key.method_id) if key.method_id else "") for key in keys)
+        lines.append(
+            "Added: {}, removed: {}, changed: {}, unchanged: {}".format(len(self.added), len(self.removed), len(self.changed), self.unchanged)
+        )
+        return "\n".join(lines)
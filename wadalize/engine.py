@@ -0,0 +1,227 @@
+import asyncio
+import ssl
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+
+EngineResponse = namedtuple("EngineResponse", ["status", "headers", "size", "elapsed", "body", "error"])
+
+# Statuses never carrying a body, whatever the headers say
+NO_BODY_STATUSES = {204, 304}
+
+
+class EngineJob:
+    """
+    A request waiting to be sent by the FastEngine.
+    Args:
+        num (int): Position of this job in the input, used to return the
+            responses in order.
+        wire (bytes): The request serialized as an HTTP/1.1 message.
+    """
+
+    __slots__ = ("num", "wire", "head", "retries", "started")
+
+    def __init__(self, num, wire):
+        self.num = num
+        self.wire = wire
+        self.head = wire.startswith(b"HEAD ")
+        self.retries = 0
+        self.started = 0.0
+
+
+class FastEngine:
+    """
+    Minimal asyncio based HTTP/1.1 client. It keeps a few persistent
+    connections per host, writes pre-serialized requests (see
+    WADLRequest.to_wire) and by default only parses the status line and
+    headers of each response, discarding the body.
+
+    Requests to the same host may be pipelined: up to `pipeline` requests are
+    written before reading their responses. When a server closes the
+    connection in the middle of a pipeline, the unanswered requests are sent
+    again and pipelining is turned off for that host.
+
+    Proxies are not supported.
+    Args:
+        connections (int): Persistent connections per host.
+        pipeline (int): Max requests in flight per connection. 1 disables
+            pipelining.
+        timeout (float): Seconds to wait for connecting and for each
+            response.
+        read_body (bool): Keep the body of each response instead of
+            discarding it.
+        verify (bool): Verify TLS certificates.
+        retries (int): Times a request is sent again after its connection
+            broke before getting a response.
+    """
+
+    def __init__(self, connections=4, pipeline=1, timeout=10.0, read_body=False, verify=True, retries=1):
+        if connections < 1 or pipeline < 1:
+            raise ValueError("connections and pipeline must be at least 1")
+
+        self.connections = connections
+        self.pipeline = pipeline
+        self.timeout = timeout
+        self.read_body = read_body
+        self.retries = retries
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+
+    def run(self, items):
+        """
+        Sends every request and waits for all their responses.
+        Args:
+            items (iterable): Pairs of (url, wire) where url is any url of the
+                target host (only its scheme, host and port are used) and wire
+                the serialized request.
+        Return
+        ______
+            list of EngineResponse, in the same order as `items`.
+        """
+        return asyncio.run(self.run_async(items))
+
+    async def run_async(self, items):
+        queues = {}
+        num = 0
+        for num, (url, wire) in enumerate(items, 1):
+            p = urlparse(url)
+            scheme = p.scheme.lower()
+            key = (scheme, p.hostname, p.port or (443 if scheme == "https" else 80))
+            queues.setdefault(key, asyncio.Queue()).put_nowait(EngineJob(num - 1, bytes(wire)))
+
+        results = [None] * num
+        workers = []
+        for key, queue in queues.items():
+            host_state = {"pipeline": self.pipeline}
+            for _ in range(min(self.connections, queue.qsize())):
+                workers.append(self._worker(key, queue, host_state, results))
+        await asyncio.gather(*workers)
+        return results
+
+    async def _worker(self, key, queue, host_state, results):
+        scheme, host, port = key
+        reader = writer = None
+
+        try:
+            while not queue.empty():
+                batch = [queue.get_nowait()]
+                while len(batch) < host_state["pipeline"] and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                if writer is None:
+                    try:
+                        reader, writer = await asyncio.wait_for(
+                            asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == "https" else None),
+                            self.timeout,
+                        )
+                    except (OSError, asyncio.TimeoutError) as e:
+                        for job in batch:
+                            results[job.num] = EngineResponse(None, {}, 0, 0.0, None, "connection error: {!r}".format(e))
+                        continue
+
+                now = time.perf_counter()
+                for job in batch:
+                    job.started = now
+                writer.write(b"".join(job.wire for job in batch))
+
+                done = 0
+                keep_alive = True
+                try:
+                    await writer.drain()
+                    for job in batch:
+                        status, headers, size, body, keep_alive = await asyncio.wait_for(self._read_response(reader, job.head), self.timeout)
+                        results[job.num] = EngineResponse(status, headers, size, time.perf_counter() - job.started, body, None)
+                        done += 1
+                        if not keep_alive:
+                            break
+                except (OSError, asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.TimeoutError) as e:
+                    keep_alive = False
+                    if isinstance(e, asyncio.TimeoutError):
+                        # don't send again the request that made the server
+                        # hang, but the ones pipelined behind it never got a
+                        # chance, they go back to the queue as they were
+                        hung, *behind = batch[done:]
+                        results[hung.num] = EngineResponse(None, {}, 0, time.perf_counter() - hung.started, None, "timeout")
+                        for job in behind:
+                            queue.put_nowait(job)
+                        done = len(batch)
+
+                if done < len(batch):
+                    # The server closed the connection before answering the
+                    # whole pipeline, so it probably doesn't support it
+                    host_state["pipeline"] = 1
+                    for job in batch[done:]:
+                        if job.retries < self.retries:
+                            job.retries += 1
+                            queue.put_nowait(job)
+                        else:
+                            results[job.num] = EngineResponse(None, {}, 0, time.perf_counter() - job.started, None, "connection closed")
+
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _read_response(self, reader, head=False):
+        """Reads a single response from `reader`. Returns a tuple of
+        (status, headers, body size, body or None, keep alive)"""
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            parts = status_line.split(None, 2)
+            if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+                raise ValueError("malformed status line {!r}".format(status_line))
+            status = int(parts[1])
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                headers[name.strip().decode("latin-1").lower()] = value.strip().decode("latin-1")
+
+            # Skip informational responses like 100 Continue
+            if not 100 <= status < 200:
+                break
+
+        keep_alive = headers.get("connection", "").lower() != "close" and parts[0] != b"HTTP/1.0"
+        chunks = [] if self.read_body else None
+        size = 0
+
+        if head or status in NO_BODY_STATUSES:
+            pass
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                chunk_size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+                if chunk_size == 0:
+                    # Skip trailers until the empty line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                data = await reader.readexactly(chunk_size)
+                await reader.readexactly(2)
+                size += chunk_size
+                if chunks is not None:
+                    chunks.append(data)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            data = await reader.readexactly(length)
+            size = length
+            if chunks is not None:
+                chunks.append(data)
+        else:
+            # No framing, the body ends when the connection does
+            data = await reader.read()
+            size = len(data)
+            keep_alive = False
+            if chunks is not None:
+                chunks.append(data)
+
+        return status, headers, size, (b"".join(chunks) if chunks is not None else None), keep_alive
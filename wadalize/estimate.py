@@ -0,0 +1,83 @@
+from collections import Counter
+from collections import namedtuple
+
+# Requests a single <method> expands to. paths is the number of urls its
+# route expands to, representations the number of request representations
+# (each one a request per url, none meaning a single one)
+MethodEstimate = namedtuple("MethodEstimate", ["method_id", "method", "host", "template", "paths", "representations", "requests"])
+
+
+class Estimate:
+    """
+    Number of requests a WADL expands to, counted without expanding any of
+    them, see WADLHandler.estimate.
+
+    With pairwise or t-way combinations (see wadalize.combinations), the
+    counts of the methods combining params are heuristic upper bounds rather
+    than counts, and can be far above the number of requests actually sent:
+    10 params of 5 candidates each are estimated at 177 pairwise requests,
+    where the covering array has about 45. exact tells them apart.
+    Args:
+        methods (list of MethodEstimate): Estimate of each <method>.
+        threshold (int): Methods expanding to more requests than this are
+            flagged. None flags nothing.
+        exact (bool): False when the counts of combined params are upper
+            bound estimates, see Combiner.estimate.
+    """
+
+    def __init__(self, methods, threshold=None, exact=True):
+        self.methods = methods
+        self.threshold = threshold
+        self.exact = exact
+
+    @property
+    def total(self):
+        """Requests of every method"""
+        return sum(m.requests for m in self.methods)
+
+    def by_host(self):
+        """Returns a Counter of requests per host"""
+        return self._count(lambda m: m.host)
+
+    def by_verb(self):
+        """Returns a Counter of requests per HTTP verb"""
+        return self._count(lambda m: m.method)
+
+    def _count(self, key):
+        counter = Counter()
+        for m in self.methods:
+            counter[key(m)] += m.requests
+        return counter
+
+    @property
+    def flagged(self):
+        """Methods expanding to more requests than the threshold, biggest
+        first"""
+        if self.threshold is None:
+            return []
+        return sorted((m for m in self.methods if m.requests > self.threshold), key=lambda m: -m.requests)
+
+    def summary(self, top=20):
+        """Returns the estimate as a few human readable lines, listing the
+        `top` biggest methods"""
+        if self.exact:
+            lines = ["Requests: {} from {} methods".format(self.total, len(self.methods))]
+        else:
+            lines = [
+                "Requests: <= {} (bound) from {} methods".format(self.total, len(self.methods)),
+                "Combined params are counted with an upper bound estimate, the actual requests can be far fewer",
+            ]
+        if top and self.methods:
+            lines.append("Biggest methods:")
+            for m in sorted(self.methods, key=lambda m: -m.requests)[:top]:
+                lines.append(
+                    "  {:>10} {} {} (paths: {}, representations: {})".format(m.requests, m.method, m.template, m.paths, m.representations or 1)
+                )
+        lines.append("By host:")
+        lines.extend("  {:>10} {}".format(count, host or "-") for host, count in self.by_host().most_common())
+        lines.append("By verb:")
+        lines.extend("  {:>10} {}".format(count, verb) for verb, count in self.by_verb().most_common())
+        if self.flagged:
+            lines.append("Over {} requests:".format(self.threshold))
+            lines.extend("  {:>10} {} {} ({})".format(m.requests, m.method, m.template, m.method_id or "no id") for m in self.flagged)
+        return "\n".join(lines)
@@ -0,0 +1,120 @@
+import re
+
+
+def compile_path_pattern(pattern):
+    """Compiles a path pattern into a regex. Patterns starting with "re:" are
+    regexes, searched anywhere in the path. Anything else is a glob that must
+    match the whole path, like /users/*"""
+    if pattern.startswith("re:"):
+        return re.compile(pattern[3:])
+    return re.compile(glob_to_regex(pattern))
+
+
+def glob_to_regex(pattern):
+    """Translates a glob into a regex. Only * and ? are special, so globs
+    like /items/{id}/* match templates as they are written in the WADL"""
+    parts = []
+    for ch in pattern:
+        if ch == "*":
+            parts.append(".*")
+        elif ch == "?":
+            parts.append(".")
+        else:
+            parts.append(re.escape(ch))
+    return r"^(?s:{})\Z".format("".join(parts))
+
+
+class WADLFilter:
+    """
+    Include/exclude rules deciding which <method> elements of a WADL are
+    compiled into requests. WADLHandler checks them while walking the tree,
+    so excluded methods are never expanded.
+
+    For each kind of rule, a method must match at least one include rule (if
+    any is given) and no exclude rule.
+    Args:
+        include_methods, exclude_methods (list of str): HTTP verbs.
+        include_paths, exclude_paths (list of str): Globs like /users/*, or
+            regexes when prefixed with "re:". They are checked against the
+            path template of the method, both relative to the base url and
+            including the path of the base url.
+        include_ids, exclude_ids (list of str): id attributes of <method>
+            elements.
+        include_styles, exclude_styles (list of str): Param styles, like
+            header or template. Methods are kept when they have at least one
+            param of an included style, and none of an excluded style.
+        include_endpoints (list of tuple): (HTTP verb, path template relative
+            to the base url, method id) triples, like the keys yielded by
+            wadalize.diff.iter_fingerprints. Only those methods are kept.
+    """
+
+    def __init__(
+        self,
+        include_methods=None,
+        exclude_methods=None,
+        include_paths=None,
+        exclude_paths=None,
+        include_ids=None,
+        exclude_ids=None,
+        include_styles=None,
+        exclude_styles=None,
+        include_endpoints=None,
+    ):
+        self.include_methods = {m.upper() for m in include_methods or []}
+        self.exclude_methods = {m.upper() for m in exclude_methods or []}
+        self.include_paths = [compile_path_pattern(p) for p in include_paths or []]
+        self.exclude_paths = [compile_path_pattern(p) for p in exclude_paths or []]
+        self.include_ids = set(include_ids or [])
+        self.exclude_ids = set(exclude_ids or [])
+        self.include_styles = set(include_styles or [])
+        self.exclude_styles = set(exclude_styles or [])
+        self.include_endpoints = None if include_endpoints is None else {(m.upper(), path, i) for m, path, i in include_endpoints}
+
+    @property
+    def needs_path(self):
+        return bool(self.include_paths or self.exclude_paths) or self.include_endpoints is not None
+
+    @property
+    def needs_styles(self):
+        return bool(self.include_styles or self.exclude_styles)
+
+    def accepts_method(self, method, method_id=None):
+        """Checks the rules that only need the <method> element itself"""
+        method = (method or "").upper()
+        if self.include_methods and method not in self.include_methods:
+            return False
+        if method in self.exclude_methods:
+            return False
+        if self.include_ids and method_id not in self.include_ids:
+            return False
+        if method_id in self.exclude_ids:
+            return False
+        return True
+
+    def accepts_path(self, *paths):
+        """Checks the path rules against the given paths of a method"""
+
+        def matches(patterns):
+            return any(pattern.search(path) for pattern in patterns for path in paths if path is not None)
+
+        if self.include_paths and not matches(self.include_paths):
+            return False
+        if self.exclude_paths and matches(self.exclude_paths):
+            return False
+        return True
+
+    def accepts_styles(self, styles):
+        """Checks the style rules against the set of param styles of a
+        method"""
+        if self.include_styles and not (self.include_styles & styles):
+            return False
+        if self.exclude_styles & styles:
+            return False
+        return True
+
+    def accepts_endpoint(self, method, path, method_id=None):
+        """Checks the include_endpoints rule against the verb, the path
+        template relative to the base url and the id of a method"""
+        if self.include_endpoints is None:
+            return True
+        return ((method or "").upper(), path, method_id) in self.include_endpoints
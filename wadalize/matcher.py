@@ -0,0 +1,118 @@
+import re
+from collections import Counter
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from .routes import RouteTrie
+
+
+Match = namedtuple("Match", ["endpoint", "method_id", "variables"])
+
+# Finds the request in a log line, be it an access log in Common/Combined Log
+# Format ("GET /path HTTP/1.1") or simply "METHOD URL"
+LOG_REQUEST_RE = re.compile(r"\b(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS|COPY|TRACE)\s+(\S+)")
+
+
+def parse_log_line(line):
+    """Returns the (method, url) pair found in a log line, or None"""
+    m = LOG_REQUEST_RE.search(line)
+    return (m.group(1), m.group(2)) if m else None
+
+
+class Coverage:
+    """
+    Result of matching a bunch of requests against a WADL.
+    Attributes:
+        lines (int): Lines read.
+        unparsed (int): Lines where no request was found.
+        matched (int): Requests matching an endpoint.
+        unmatched (Counter): Number of requests per unmatched "METHOD path".
+        hits (Counter): Number of requests per matched WADLEndpoint.
+        endpoints (list of WADLEndpoint): Every endpoint of the WADL.
+    """
+
+    def __init__(self, endpoints):
+        self.lines = 0
+        self.unparsed = 0
+        self.matched = 0
+        self.unmatched = Counter()
+        self.hits = Counter()
+        self.endpoints = endpoints
+
+    @property
+    def ratio(self):
+        """Fraction of the endpoints hit at least once"""
+        return len(self.hits) / len(self.endpoints) if self.endpoints else 0.0
+
+    @property
+    def missing(self):
+        """Endpoints never hit"""
+        return [e for e in self.endpoints if e not in self.hits]
+
+    def summary(self, top=10):
+        """Returns the coverage as a few human readable lines"""
+        lines = [
+            "Lines: {} ({} without a request)".format(self.lines, self.unparsed),
+            "Matched requests: {}, unmatched: {}".format(self.matched, sum(self.unmatched.values())),
+            "Endpoints hit: {} of {} ({:.1%})".format(len(self.hits), len(self.endpoints), self.ratio),
+        ]
+        if top and self.unmatched:
+            lines.append("Top unmatched:")
+            lines.extend("  {} {}".format(count, request) for request, count in self.unmatched.most_common(top))
+        return "\n".join(lines)
+
+
+class WADLMatcher:
+    """
+    Maps concrete requests back to the WADL endpoints they hit. The full
+    path of every endpoint is compiled once into a wadalize.routes.RouteTrie.
+    Only the path of the urls is taken into account, hosts are ignored.
+    Args:
+        endpoints (list of WADLEndpoint): Endpoints to match against.
+        cache_size (int): Number of distinct (method, path) lookups to
+            remember, logs tend to repeat the same paths a lot.
+    """
+
+    def __init__(self, endpoints, cache_size=65536):
+        self.endpoints = endpoints
+        self.routes = RouteTrie()
+        for endpoint in endpoints:
+            self.routes.add(endpoint.method, endpoint.full_path, endpoint)
+        self._lookup = lru_cache(maxsize=cache_size)(self.routes.lookup)
+
+    def match(self, method, url):
+        """Returns a Match with the endpoint, its method id and the values of
+        its template variables in url, or None if no endpoint matches"""
+        path = urlsplit(url).path if "://" in url else url.split("?", 1)[0]
+        found = self._lookup(method.upper(), path)
+        if found is None:
+            return None
+
+        endpoint, variables = found
+        return Match(endpoint, endpoint.method_id, dict(variables))
+
+    def coverage(self, lines, parse_line=parse_log_line):
+        """Matches every request found in the iterable lines, streaming
+        through them. Returns a Coverage object"""
+        cov = Coverage(self.endpoints)
+        lookup = self._lookup
+        hits = cov.hits
+
+        for line in lines:
+            cov.lines += 1
+            request = parse_line(line)
+            if request is None:
+                cov.unparsed += 1
+                continue
+
+            method, url = request
+            path = urlsplit(url).path if "://" in url else url.split("?", 1)[0]
+            found = lookup(method.upper(), path)
+            if found is None:
+                cov.unmatched["{} {}".format(method, path)] += 1
+            else:
+                cov.matched += 1
+                hits[found[0]] += 1
+
+        return cov
@@ -0,0 +1,191 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .store import _Tables
+from .store import RequestStore
+from .wadl import WADLParam
+
+# A plan file starts with this header: magic, format version, number of
+# shards, number of requests and length of the JSON tables following it.
+# Then, aligned to 8 bytes, come the columns of its RequestStore, all little
+# endian: url offsets (one more than requests), ids of the params, headers and
+# endpoint of each request, code of its verb, and finally every url, utf-8
+# encoded, back to back.
+MAGIC = b"WADLPLAN"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def is_plan(path):
+    """Tells whether the file at path is a plan written by write_plan"""
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _little_endian(column, typecode):
+    column = array(typecode, column)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_plan(path, requests, shards=1):
+    """
+    Writes expanded requests to the file at `path` as a plan, to be read by
+    PlanFile. The same requests always give the same file, and each one keeps
+    its position in it as its id.
+    Args:
+        path (str): Path of the file to write.
+        requests (RequestStore or iterable of WADLRequest): Requests to write.
+        shards (int): Number of shards readers split the plan in by default.
+    Return
+    ______
+        int: Number of requests written.
+    """
+    if shards < 1:
+        raise ValueError("A plan needs at least one shard")
+    store = requests if isinstance(requests, RequestStore) else RequestStore.from_requests(requests)
+    tables = store._tables
+
+    offsets = array("Q", [0])
+    for start, end in zip(store._starts, store._ends):
+        offsets.append(offsets[-1] + end - start)
+
+    meta = json.dumps(
+        dict(
+            methods=tables.methods.values,
+            params=[[param.dump_as_dict() for param in params] for params in tables.params.values],
+            headers=tables.headers.values,
+            endpoints=tables.endpoints.values,
+        )
+    ).encode()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, shards, len(store), len(meta)))
+        f.write(meta)
+        f.write(b"\0" * (-(HEADER.size + len(meta)) % 8))
+        f.write(_little_endian(offsets, "Q"))
+        f.write(_little_endian(store._params, "I"))
+        f.write(_little_endian(store._headers, "I"))
+        f.write(_little_endian(store._endpoints, "I"))
+        f.write(_little_endian(store._methods, "H"))
+        for start, end in zip(store._starts, store._ends):
+            f.write(tables.buffer[start:end])
+
+    return len(store)
+
+
+class PlanFile:
+    """
+    Read only view over a plan written by write_plan. The file is memory
+    mapped and its columns used in place, so opening it takes about the time
+    of reading its tables, however many requests it holds. Neither lxml nor
+    exrex are needed.
+    Args:
+        path (str): Path of the plan.
+    Attributes:
+        shards (int): Number of shards the plan was written with.
+        store (RequestStore): Requests of the plan. Their position is their id.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError("{} is not a wadalize plan".format(path))
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = [memoryview(self._map)]
+
+        magic, version, self.shards, count, meta_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("{} is not a wadalize plan".format(path))
+        if version != VERSION:
+            self.close()
+            raise ValueError("Plan {} has version {}, only {} is supported".format(path, version, VERSION))
+
+        start, position = HEADER.size, HEADER.size + meta_size
+        meta = json.loads(self._map[start:position].decode())
+        position += -position % 8
+
+        columns = []
+        for typecode, length in (("Q", count + 1), ("I", count), ("I", count), ("I", count), ("H", count)):
+            end = position + length * array(typecode).itemsize
+            columns.append(self._column(position, end, typecode))
+            position = end
+        offsets, params, headers, endpoints, methods = columns
+
+        tables = _Tables()
+        tables.buffer = self._slice(position, size)
+        tables.methods.values = meta["methods"]
+        tables.params.values = [tuple(WADLParam.from_dict(param) for param in params) for params in meta["params"]]
+        tables.headers.values = [tuple(map(tuple, headers)) for headers in meta["headers"]]
+        tables.endpoints.values = [tuple(endpoint) for endpoint in meta["endpoints"]]
+        self.store = RequestStore._from_columns(tables, [offsets[:-1], offsets[1:], methods, params, headers, endpoints])
+
+    def _slice(self, start, end):
+        view = self._views[0][start:end]
+        self._views.append(view)
+        return view
+
+    def _column(self, start, end, typecode):
+        if sys.byteorder == "big":
+            column = array(typecode, self._views[0][start:end])
+            column.byteswap()
+            return column
+        column = self._slice(start, end).cast(typecode)
+        self._views.append(column)
+        return column
+
+    @property
+    def methods(self):
+        """HTTP verbs found in the plan"""
+        return list(self.store._tables.methods.values)
+
+    def shard_range(self, index, shards=None):
+        """Returns the range of ids of the requests in the given shard, out of
+        `shards`, or out of the shards the plan was written with"""
+        shards = shards or self.shards
+        if not 0 <= index < shards:
+            raise ValueError("Shard {} out of range, the plan is split in {}".format(index, shards))
+        return range(len(self) * index // shards, len(self) * (index + 1) // shards)
+
+    def shard(self, index, shards=None):
+        """Returns a RequestStore with the requests of a shard, see
+        shard_range"""
+        ids = self.shard_range(index, shards=shards)
+        return self.store[slice(ids.start, ids.stop)]
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        return self.store[index]
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def close(self):
+        self.store = None
+        for view in reversed(self._views):
+            view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # some slice of the plan is still in use, the map is closed along
+            # with its last view
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
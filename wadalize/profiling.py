@@ -0,0 +1,160 @@
+import time
+import tracemalloc
+
+# Python 3.9+. Without it, the peak of a stage is the highest memory use since
+# tracing started, so it's only accurate for the stages raising it
+_reset_peak = getattr(tracemalloc, "reset_peak", None)
+
+
+class StageStats:
+    """
+    Counters of a single stage.
+    Attributes:
+        calls (int): Times the stage was entered.
+        seconds (float): Cumulative wall time spent in it.
+        allocated (int): Net bytes allocated by it and still alive when it
+            ended (retained), negative when it released memory. Only tracked
+            when the Profiler traces memory, like peak.
+        peak (int): Highest memory use reached while in the stage, over what
+            was in use when it was entered, across all of its calls.
+    """
+
+    __slots__ = ("calls", "seconds", "allocated", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.allocated = 0
+        self.peak = 0
+
+    def dump_as_dict(self):
+        return dict(calls=self.calls, seconds=self.seconds, allocated=self.allocated, peak=self.peak)
+
+
+class _Stage:
+    __slots__ = ("stats", "profiler", "start", "start_memory", "peak")
+
+    def __init__(self, stats, profiler):
+        self.stats = stats
+        self.profiler = profiler
+
+    def __enter__(self):
+        if self.profiler.memory:
+            self.profiler._push(self)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.stats.seconds += time.perf_counter() - self.start
+        self.stats.calls += 1
+        if self.profiler.memory:
+            self.profiler._pop(self)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+class NullProfiler:
+    """Profiler doing nothing, used when none is given"""
+
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """
+    Cumulative time, number of calls and, optionally, allocated bytes of each
+    stage of a run. WADLHandler, Runner and the transports report these
+    stages when given a Profiler:
+
+    - parse: building the lxml tree.
+    - compile: turning every <method> into requests, which includes:
+    - walk: finding the route and params of a <method>.
+    - normalize: building and normalizing its url (furl).
+    - expand: expanding its templates and regexes (param_url).
+    - build: building the pydantic Request of a request.
+    - wire: serializing a request to HTTP/1.1.
+    - network: waiting for the responses.
+    - compact: dropping the lxml tree, see WADLHandler.compact.
+
+    Stages may be nested, so the time of a stage includes the time of the
+    stages run within it.
+    Args:
+        memory (bool): Also track the bytes retained by each stage, and its
+            peak memory use, with tracemalloc, which is started if needed.
+            Makes everything a lot slower.
+    Attributes:
+        stages (dict): Stage name mapped to its StageStats, in the order
+            stages were first seen.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = {}
+        self._stack = []  # stages being run, to track the peak of each one
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        """Returns a context manager accounting what runs within it to the
+        stage called name"""
+        if name not in self.stages:
+            self.stages[name] = StageStats()
+        return _Stage(self.stages[name], self)
+
+    def _push(self, stage):
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            # the peak is about to be reset, keep what the outer stage saw
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        if _reset_peak is not None:
+            _reset_peak()
+            peak = current
+        stage.start_memory = current
+        stage.peak = current
+        self._stack.append(stage)
+
+    def _pop(self, stage):
+        current, peak = tracemalloc.get_traced_memory()
+        self._stack.pop()
+        stage.peak = max(stage.peak, peak)
+        stage.stats.allocated += current - stage.start_memory
+        stage.stats.peak = max(stage.stats.peak, stage.peak - stage.start_memory)
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, stage.peak)
+
+    def traced(self):
+        """Returns the (current, peak) bytes traced by tracemalloc, or None
+        when memory isn't tracked"""
+        return tracemalloc.get_traced_memory() if self.memory else None
+
+    def dump_as_dict(self):
+        return {name: stats.dump_as_dict() for name, stats in self.stages.items()}
+
+    def summary(self):
+        """Returns the stats as a few human readable lines"""
+        header = "{:<10} {:>10} {:>10} {:>12}".format("Stage", "Calls", "Seconds", "Per call")
+        if self.memory:
+            header += " {:>13} {:>13}".format("Retained", "Peak")
+        lines = [header]
+        for name, stats in self.stages.items():
+            per_call = stats.seconds / stats.calls if stats.calls else 0.0
+            line = "{:<10} {:>10} {:>10.3f} {:>10.1f}us".format(name, stats.calls, stats.seconds, per_call * 1e6)
+            if self.memory:
+                line += " {:>10.1f}KiB {:>10.1f}KiB".format(stats.allocated / 1024, stats.peak / 1024)
+            lines.append(line)
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append("Memory: {:.1f}KiB in use, {:.1f}KiB at peak".format(current / 1024, peak / 1024))
+        return "\n".join(lines)
@@ -0,0 +1,141 @@
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    sent_at REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    method_id TEXT,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER,
+    elapsed REAL,
+    size INTEGER,
+    error TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    route TEXT
+);
+CREATE INDEX IF NOT EXISTS results_endpoint ON results (endpoint);
+CREATE INDEX IF NOT EXISTS results_route ON results (route);
+CREATE INDEX IF NOT EXISTS results_status ON results (status);
+"""
+
+_COLUMNS = ("run_id", "sent_at", "endpoint", "method_id", "method", "url", "status", "elapsed", "size", "error", "cached", "route")
+_INSERT = "INSERT INTO results ({}) VALUES ({})".format(", ".join(_COLUMNS), ", ".join("?" * len(_COLUMNS)))
+
+
+# Tells the writer thread to commit what it has and stop
+_STOP = object()
+
+
+class ResultsWriter:
+    """
+    Stores every request sent by a run, along with the summary of its
+    response, in a sqlite database, to be queried once the run is over. Each
+    run gets a row in the runs table; each request a row in the results table
+    holding its run, endpoint (see WADLRequest.endpoint), method id, url,
+    status, elapsed seconds, size, error, whether it was answered by the
+    response cache and route (see WADLRequest.route), which runs against
+    different base urls share. Requests that got no response have a NULL
+    status. Results are indexed by endpoint, route and status.
+
+    record() only queues the row, a background thread writes them in batches,
+    each in its own transaction, so the database doesn't slow the run down.
+    The queue is bounded: when the writer falls behind, record() waits.
+    Args:
+        path (str): Path of the sqlite database, created if needed.
+        source (str): Source of the run, stored in the runs table.
+        batch_size (int): Rows written per transaction, at most.
+        max_pending (int): Rows queued before record() waits for the writer.
+        clock (callable): Returns the current time in seconds.
+    Attributes:
+        run_id (int): Id of this run in the runs table.
+        written (int): Rows written so far.
+    """
+
+    def __init__(self, path, source=None, batch_size=500, max_pending=10000, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.clock = clock
+        self.written = 0
+        self.error = None
+
+        db = sqlite3.connect(path)
+        db.executescript(SCHEMA)
+        with db:
+            self.run_id = db.execute("INSERT INTO runs (started_at, source) VALUES (?, ?)", (clock(), source)).lastrowid
+        db.close()
+
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._write, name="wadalize-results", daemon=True)
+        self._thread.start()
+
+    def record(self, wr, resp):
+        """Queues the result of sending wr, a TransportResponse"""
+        if self.error is not None:
+            raise self.error
+        self._queue.put(
+            (
+                self.run_id,
+                self.clock(),
+                wr.endpoint,
+                wr.method_id,
+                wr.method.upper(),
+                wr.url,
+                resp.status,
+                resp.elapsed,
+                resp.size,
+                resp.error,
+                resp.cached,
+                wr.route,
+            )
+        )
+
+    def _write(self):
+        # sqlite connections belong to the thread creating them
+        db = sqlite3.connect(self.path)
+        stop = False
+        try:
+            while not stop:
+                rows = [self._queue.get()]
+                while len(rows) < self.batch_size:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if rows[-1] is _STOP:
+                    rows.pop()
+                    stop = True
+                with db:
+                    db.executemany(_INSERT, rows)
+                self.written += len(rows)
+        except sqlite3.Error as e:
+            self.error = e
+            # keep draining, so record() never blocks on a dead writer
+            while not stop:
+                stop = self._queue.get() is _STOP
+        finally:
+            db.close()
+
+    def close(self):
+        """Writes every queued row and stops the writer. Raises the error
+        that stopped the writer, if any"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
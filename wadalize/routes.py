@@ -0,0 +1,184 @@
+import re
+from urllib.parse import unquote
+
+
+# Kinds of path segments
+LITERAL = 0
+VAR = 1
+REGEX = 2
+
+# Regex used for {var} templates found inside a larger segment, like
+# item{id}.json
+DEFAULT_VAR_REGEX = "[^/]+?"
+
+
+def split_path(path):
+    """Splits a path template on "/", except for slashes inside a {...}
+    template, dropping empty segments"""
+    segments = []
+    current = []
+    depth = 0
+
+    for ch in path:
+        if ch == "{":
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+        elif ch == "/" and not depth:
+            segments.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    segments.append("".join(current))
+
+    return [x for x in segments if x]
+
+
+def scope_flags(regex):
+    """Turns global inline flags at the start of a regex, like (?i)spot, into
+    scoped ones, (?i:spot), so the regex can be embedded in a larger one"""
+    m = re.match(r"\(\?([aiLmsux]+)\)", regex)
+    if m:
+        flags, end = m.group(1), m.end()
+        return "(?{}:{})".format(flags, regex[end:])
+    return regex
+
+
+def parse_segment(segment):
+    """
+    Compiles a single path segment template.
+    Return
+    ______
+        tuple: (LITERAL, segment, []) for plain segments, (VAR, None, [name])
+        for a whole segment {name}, and (REGEX, compiled regex, names) for
+        {name: regex} templates or segments mixing literals and templates.
+    """
+    if "{" not in segment:
+        return LITERAL, segment, []
+
+    names = []
+    pattern = []
+    pos = 0
+    for m in re.finditer(r"\{\s*([^:}\s]*)\s*(?::\s*((?:[^{}]|\{[^{}]*\})*?)\s*)?\}", segment):
+        start = m.start()
+        pattern.append(re.escape(segment[pos:start]))
+        pattern.append("(?P<_{}>{})".format(len(names), scope_flags(m.group(2) or DEFAULT_VAR_REGEX)))
+        names.append(m.group(1))
+        pos = m.end()
+    pattern.append(re.escape(segment[pos:]))
+
+    if len(names) == 1 and not "".join(pattern[0::2]) and pattern[1] == "(?P<_0>{})".format(DEFAULT_VAR_REGEX):
+        return VAR, None, names
+    return REGEX, re.compile("".join(pattern)), names
+
+
+class _Node:
+    __slots__ = ("literals", "var", "regexes", "methods")
+
+    def __init__(self):
+        self.literals = {}
+        self.var = None
+        self.regexes = {}  # regex pattern -> (compiled regex, number of groups, _Node)
+        self.methods = {}  # HTTP verb -> (value, names of the captured vars)
+
+
+class RouteTrie:
+    """
+    Segment trie over path templates, used to find which template a concrete
+    path belongs to. Templates are compiled once when added.
+
+    When looking a path up, at each segment literals are tried first, then
+    {name: regex} templates and finally plain {name} templates, backtracking
+    if the rest of the path doesn't match, or if the template it ends in
+    doesn't have the HTTP verb looked for. Regex templates only ever match a
+    single segment.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, method, template, value):
+        """Adds the path template for the given HTTP verb, which will be
+        answered with value. If the same template and verb were already
+        added, the first value is kept"""
+        node = self.root
+        names = []
+
+        for segment in split_path(template):
+            kind, compiled, seg_names = parse_segment(segment)
+            names.extend(seg_names)
+            if kind == LITERAL:
+                node = node.literals.setdefault(compiled, _Node())
+            elif kind == VAR:
+                if node.var is None:
+                    node.var = _Node()
+                node = node.var
+            else:
+                if compiled.pattern not in node.regexes:
+                    node.regexes[compiled.pattern] = (compiled, len(seg_names), _Node())
+                node = node.regexes[compiled.pattern][2]
+
+        if method.upper() not in node.methods:
+            node.methods[method.upper()] = (value, names)
+            self.size += 1
+
+    def resolve(self, path, methods=None):
+        """Returns a tuple (methods, captured) for the node matching path,
+        where methods maps HTTP verbs to (value, names) and captured is the
+        list of values taken by the templates along the way. When given the
+        list of accepted HTTP verbs, only templates having any of them match.
+        Returns None if no template matches"""
+        segments = [unquote(x) for x in path.split("?", 1)[0].split("/") if x]
+        verbs = [m.upper() for m in methods] if methods is not None else None
+        captured = []
+        node = self._resolve(self.root, segments, 0, captured, verbs)
+        return (node.methods, captured) if node is not None else None
+
+    def _resolve(self, node, segments, num, captured, verbs):
+        if num == len(segments):
+            if verbs is None:
+                return node if node.methods else None
+            return node if any(verb in node.methods for verb in verbs) else None
+
+        segment = segments[num]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._resolve(child, segments, num + 1, captured, verbs)
+            if found is not None:
+                return found
+
+        for compiled, groups, child in node.regexes.values():
+            m = compiled.fullmatch(segment)
+            if m:
+                captured.extend(m.group("_{}".format(x)) for x in range(groups))
+                found = self._resolve(child, segments, num + 1, captured, verbs)
+                if found is not None:
+                    return found
+                # captured[-0:] would be the whole list
+                if groups:
+                    del captured[-groups:]
+
+        if node.var is not None:
+            captured.append(segment)
+            found = self._resolve(node.var, segments, num + 1, captured, verbs)
+            if found is not None:
+                return found
+            captured.pop()
+
+        return None
+
+    def lookup(self, method, path):
+        """Returns a tuple (value, variables) for the template matching the
+        given HTTP verb and path, where variables is a dict of template name
+        to its value in path. Returns None if nothing matches"""
+        resolved = self.resolve(path, methods=[method])
+        if resolved is None:
+            return None
+
+        methods, captured = resolved
+        value, names = methods[method.upper()]
+        return value, dict(zip(names, captured))
@@ -0,0 +1,163 @@
+import time
+from collections import Counter
+
+from .cache import CachedTransport
+
+
+class RunStats:
+    """
+    Counters gathered while running requests.
+    Attributes:
+        sent (int): Requests handed to the transport.
+        errors (int): Requests that got no response at all.
+        collapsed (int): Requests dropped as duplicates of another one.
+        skipped (Counter): Requests skipped by the circuit breaker, per group.
+        cache_hits, cache_revalidated, cache_misses (int): Requests answered
+            by the response cache, answered with a 304 after a conditional
+            request, and sent because they weren't cached.
+        statuses (Counter): Number of responses per status code.
+        latency (float): Sum of the elapsed time reported for each request.
+        elapsed (float): Wall time of the whole run.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.errors = 0
+        self.collapsed = 0
+        self.skipped = Counter()
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+        self.cache_misses = 0
+        self.statuses = Counter()
+        self.latency = 0.0
+        self.elapsed = 0.0
+
+    def add(self, resp):
+        self.sent += 1
+        self.latency += resp.elapsed or 0.0
+        if resp.error:
+            self.errors += 1
+        else:
+            self.statuses[resp.status] += 1
+
+    def dump_as_dict(self):
+        return dict(
+            sent=self.sent,
+            errors=self.errors,
+            collapsed=self.collapsed,
+            skipped=dict(self.skipped),
+            cache_hits=self.cache_hits,
+            cache_revalidated=self.cache_revalidated,
+            cache_misses=self.cache_misses,
+            statuses=dict(self.statuses),
+            latency=self.latency,
+            elapsed=self.elapsed,
+        )
+
+    def summary(self):
+        """Returns the stats as a few human readable lines"""
+        rate = self.sent / self.elapsed if self.elapsed else 0.0
+        lines = [
+            "Requests: {} in {:.3f}s ({:.0f} req/s)".format(self.sent, self.elapsed, rate),
+            "Errors: {}".format(self.errors),
+            "Statuses: {}".format(", ".join("{}: {}".format(k, v) for k, v in sorted(self.statuses.items(), key=lambda x: str(x[0])))),
+        ]
+        if self.collapsed:
+            lines.append("Duplicates collapsed: {}".format(self.collapsed))
+        if self.skipped:
+            lines.append("Skipped by circuit breaker: {}".format(sum(self.skipped.values())))
+            lines.extend("  {} {}".format(count, group) for group, count in self.skipped.most_common())
+        if self.cache_hits or self.cache_revalidated or self.cache_misses:
+            lines.append("Cache: {} hits, {} revalidated, {} misses".format(self.cache_hits, self.cache_revalidated, self.cache_misses))
+        return "\n".join(lines)
+
+
+class Runner:
+    """
+    Runs WADLRequest objects through a Transport.
+    Args:
+        transport (wadalize.transport.Transport): Backend sending the
+            requests.
+        headers (dict): Headers to add to every request.
+        deny_methods (list): HTTP verbs not to run.
+        dedup (wadalize.dedup.Deduplicator): When given, requests identical to
+            one already sent are skipped.
+        scheduler (wadalize.scheduler.Scheduler): Decides the order requests
+            are sent in. Document order by default.
+        history (wadalize.scheduler.LatencyHistory): When given, the latency
+            of every request answered by the server is recorded into it.
+        breaker (wadalize.breaker.CircuitBreaker): When given, requests to
+            endpoints that keep failing are skipped or deferred.
+        cache (wadalize.cache.ResponseCache): When given, GET and HEAD
+            requests are answered from it whenever possible.
+        profiler (wadalize.profiling.Profiler): When given, it's handed to the
+            transport, which accounts building and sending requests to it.
+        results (wadalize.results.ResultsWriter): When given, every request
+            sent and its response are recorded into it.
+    Attributes:
+        stats (RunStats): Counters of the last run.
+    """
+
+    def __init__(
+        self,
+        transport,
+        headers=None,
+        deny_methods=None,
+        dedup=None,
+        scheduler=None,
+        history=None,
+        breaker=None,
+        cache=None,
+        profiler=None,
+        results=None,
+    ):
+        self.transport = transport
+        self.breaker = breaker
+        self.dedup = dedup
+        self.scheduler = scheduler
+        self.history = history
+        self.cache = cache
+        self.results = results
+        if profiler is not None:
+            transport.profiler = profiler
+        self.headers = headers or {}
+        self.deny_methods = [m.upper() for m in deny_methods or []]
+        self.stats = RunStats()
+
+    def run(self, wrs):
+        """Sends each one of the given requests, yielding pairs of
+        (WADLRequest, TransportResponse) as they are answered"""
+        self.stats = RunStats()
+        start = time.perf_counter()
+
+        wrs = (wr for wr in wrs if wr.method.upper() not in self.deny_methods)
+        if self.dedup is not None:
+            wrs = self.dedup.filter(wrs)
+        if self.scheduler is not None:
+            wrs = self.scheduler.order(wrs)
+        if self.breaker is not None:
+            wrs = self.breaker.filter(wrs)
+        transport = self.transport
+        if self.cache is not None:
+            transport = CachedTransport(transport, self.cache)
+            hits, revalidated, misses = self.cache.hits, self.cache.revalidated, self.cache.misses
+        try:
+            for wr, resp in transport.send_all(wrs, headers=self.headers):
+                self.stats.add(resp)
+                if self.breaker is not None:
+                    self.breaker.record(wr, resp)
+                if self.history is not None and not resp.error and not resp.cached:
+                    self.history.record(wr, resp.elapsed)
+                if self.results is not None:
+                    self.results.record(wr, resp)
+                yield wr, resp
+        finally:
+            self.stats.elapsed = time.perf_counter() - start
+            if self.dedup is not None:
+                self.stats.collapsed = self.dedup.collapsed
+            if self.breaker is not None:
+                self.stats.skipped = Counter(self.breaker.skipped)
+            if self.cache is not None:
+                self.stats.cache_hits = self.cache.hits - hits
+                self.stats.cache_revalidated = self.cache.revalidated - revalidated
+                self.stats.cache_misses = self.cache.misses - misses
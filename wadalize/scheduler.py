@@ -0,0 +1,124 @@
+import json
+from collections import deque
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+# Verbs that don't change anything on the server side
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class LatencyHistory:
+    """
+    Mean latency of each endpoint (see WADLRequest.endpoint) over past runs,
+    used by the Scheduler to send the slowest endpoints first.
+    Args:
+        latencies (dict): Endpoint key mapped to a tuple of (total seconds,
+            number of requests).
+    """
+
+    def __init__(self, latencies=None):
+        self.latencies = dict(latencies or {})
+
+    @classmethod
+    def load(cls, path):
+        """Loads the history saved at path, or an empty one if the file
+        doesn't exist yet"""
+        try:
+            with open(path) as f:
+                return cls({key: tuple(val) for key, val in json.load(f).items()})
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.latencies, f, indent=1, sort_keys=True)
+
+    def __bool__(self):
+        return bool(self.latencies)
+
+    def record(self, wr, elapsed):
+        total, count = self.latencies.get(wr.endpoint, (0.0, 0))
+        self.latencies[wr.endpoint] = (total + elapsed, count + 1)
+
+    def estimate(self, wr, default=None):
+        """Returns the mean latency of the endpoint of wr, or default if it
+        was never seen"""
+        total, count = self.latencies.get(wr.endpoint, (0.0, 0))
+        return total / count if count else default
+
+    def mean(self):
+        totals = [total / count for total, count in self.latencies.values() if count]
+        return sum(totals) / len(totals) if totals else 0.0
+
+
+class Scheduler:
+    """
+    Decides in which order requests are sent. By default it keeps the order
+    of the WADL document. Otherwise requests are:
+
+    1. Split in priority classes, sent one class after the other. With
+       safe_first, safe verbs (GET, HEAD...) go before the rest.
+    2. Within a class, when a LatencyHistory is given, sorted by their
+       expected latency, slowest first (longest processing time first), which
+       shortens the whole run when requests are sent concurrently. Endpoints
+       without history are expected to take the mean latency.
+    3. Otherwise, with interleave, sent round-robin across hosts and path
+       prefixes, so no single host or resource gets every request in a row.
+    Args:
+        interleave (bool): Round-robin across (host, path prefix) groups.
+        prefix_depth (int): Number of path segments making a prefix.
+        safe_first (bool): Send safe verbs first.
+        priority (callable): Returns the priority class of a WADLRequest,
+            lower goes first. Takes precedence over safe_first.
+        history (LatencyHistory): Past latencies for LPT ordering.
+    """
+
+    def __init__(self, interleave=False, prefix_depth=1, safe_first=False, priority=None, history=None):
+        self.interleave = interleave
+        self.prefix_depth = prefix_depth
+        self.priority = priority
+        if priority is None and safe_first:
+            self.priority = lambda wr: 0 if wr.method.upper() in SAFE_METHODS else 1
+        self.history = history
+
+    def group_key(self, wr):
+        """Returns the (host, path prefix) pair of a request"""
+        p = urlparse(wr.location)
+        segments = [x for x in p.path.split("/") if x][: self.prefix_depth]
+        return p.netloc, "/".join(segments)
+
+    def order(self, wrs):
+        """Returns a list with the given requests in the order they should be
+        sent"""
+        wrs = list(wrs)
+        if self.priority is None:
+            classes = [wrs]
+        else:
+            by_priority = {}
+            for wr in wrs:
+                by_priority.setdefault(self.priority(wr), []).append(wr)
+            classes = [by_priority[key] for key in sorted(by_priority)]
+
+        ordered = []
+        for group in classes:
+            if self.history:
+                default = self.history.mean()
+                ordered.extend(sorted(group, key=lambda wr: self.history.estimate(wr, default), reverse=True))
+            elif self.interleave:
+                ordered.extend(self._round_robin(group))
+            else:
+                ordered.extend(group)
+        return ordered
+
+    def _round_robin(self, wrs):
+        queues = OrderedDict()
+        for wr in wrs:
+            queues.setdefault(self.group_key(wr), deque()).append(wr)
+
+        queues = deque(queues.values())
+        while queues:
+            queue = queues.popleft()
+            yield queue.popleft()
+            if queue:
+                queues.append(queue)
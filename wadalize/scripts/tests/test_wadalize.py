@@ -1,9 +1,18 @@
+import gzip
+import json
+import pstats
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
 import mock
 import pytest
 import requests
 import responses
 from click.testing import CliRunner
 
+from wadalize.scripts.wadalize import cli
 from wadalize.scripts.wadalize import get_params_from_string
 from wadalize.scripts.wadalize import open_or_get
 from wadalize.scripts.wadalize import run as wadalize
@@ -186,6 +195,7 @@ def test_ok_run_requests_no_filename(mock_request):
             _, kwargs = args_list
             if "verify" in kwargs:
                 kwargs.pop("verify")
+            assert kwargs.pop("timeout") == 10.0
 
         assert (
             mock.call(
@@ -213,6 +223,25 @@ def test_ok_run_requests_no_filename(mock_request):
         )
 
 
+@mock.patch("requests.request", side_effect=mocked_requests_request)
+def test_query_params(mock_request):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        args = ["-p", "action:run", "-q", "q:forced", "-q", "token:abc", "test.wadl"]
+        result = runner.invoke(wadalize, ["--dump-urls"] + args)
+        assert result.exit_code == 0
+        assert "https://example.com/api/affiliate/v1/search/items?property=&q=forced&token=abc\n" in result.output
+
+        result = runner.invoke(wadalize, args)
+        assert result.exit_code == 0
+        urls = [args_list[0][1] for args_list in mock_request.call_args_list]
+        assert "https://example.com/api/affiliate/v1/search/items?property=&q=forced&token=abc" in urls
+        assert all("token=abc" in url for url in urls)
+
+
 @mock.patch("requests.request", side_effect=mocked_requests_request)
 def test_ok_run_requests_with_filename(mock_request):
     runner = CliRunner()
@@ -236,6 +265,7 @@ def test_ok_run_requests_with_filename(mock_request):
             _, kwargs = args_list
             if "verify" in kwargs:
                 kwargs.pop("verify")
+            assert kwargs.pop("timeout") == 10.0
 
         assert (
             mock.call(
@@ -303,6 +333,7 @@ def test_ok_run_requests_with_filename_cli_precedence(mock_request):
             _, kwargs = args_list
             if "verify" in kwargs:
                 kwargs.pop("verify")
+            assert kwargs.pop("timeout") == 10.0
 
         assert (
             mock.call(
@@ -512,3 +543,454 @@ def test_fail_file_not_found():
     result = runner.invoke(wadalize, ["idonotexist"])
     assert result.exit_code == 1
     assert "No such file or directory" in result.output
+
+
+def test_ok_run_requests_fast_engine():
+    """Tests --engine fast sends the same requests straight to a local
+    server"""
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            seen.append((self.command, self.path, self.headers.get("x-yolo1"), self.headers.get("principal")))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_POST = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    runner = CliRunner()
+    try:
+        with runner.isolated_filesystem():
+            with open("test.wadl", "w") as f:
+                f.write(WADL_SAMPLE)
+
+            result = runner.invoke(
+                wadalize,
+                [
+                    "--engine",
+                    "fast",
+                    "--pipeline",
+                    "4",
+                    "-b",
+                    "http://127.0.0.1:{}/api/v1/".format(httpd.server_address[1]),
+                    "-p",
+                    "action:run",
+                    "-p",
+                    "principal:main",
+                    "-H",
+                    "x-yolo1:header1",
+                    "test.wadl",
+                ],
+            )
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert result.exit_code == 0
+    assert seen == [
+        ("POST", "/api/v1/affiliate/v1/categories/tree", "header1", None),
+        ("GET", "/api/v1/affiliate/v1/search/items?q=&property=", "header1", None),
+        ("GET", "/api/v1/access/run?resource=&domain=", "header1", "main"),
+    ]
+
+
+@mock.patch("requests.request", side_effect=mocked_requests_request)
+def test_ok_dry_run(mock_request):
+    """Tests --dry-run goes through every request without sending any"""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dry-run", "--mock-status", "503", "--deny-methods", "POST", "-p", "action:run", "test.wadl"])
+
+    assert result.exit_code == 0
+    assert mock_request.call_count == 0
+    assert result.output.count("METHOD: GET") == 2
+    assert "Requests: 2 in" in result.output
+    assert "Statuses: 503: 2" in result.output
+
+
+def test_fail_dry_run_wrong_status():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dry-run", "--mock-status", "yolo", "test.wadl"])
+
+    assert result.exit_code == 1
+    assert "--mock-status must look like" in result.output
+
+
+def test_cli_defaults_to_run():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(cli, ["--dump-params", "test.wadl"])
+        assert result.exit_code == 0
+        assert result.output == "action:\ndomain:\nprincipal:\nproperty:\nq:\nresource:\n"
+
+        result = runner.invoke(cli, ["run", "--dump-params", "test.wadl"])
+        assert result.exit_code == 0
+        assert result.output == "action:\ndomain:\nprincipal:\nproperty:\nq:\nresource:\n"
+
+    result = runner.invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    assert "serve" in result.output
+
+
+@mock.patch("wadalize.server.MockServer.serve_forever", side_effect=KeyboardInterrupt)
+def test_serve(mock_serve):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(cli, ["serve", "--port", "8181", "--error-rate", "0.1", "test.wadl"])
+
+    assert result.exit_code == 0
+    assert "Serving 3 routes on http://127.0.0.1:8181" in result.output
+    mock_serve.assert_called_once_with("127.0.0.1", 8181)
+
+
+def test_coverage():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        with open("access.log", "w") as f:
+            f.write('1.2.3.4 - - [x] "GET /api/access/run?a=b HTTP/1.1" 200 1\n1.2.3.4 - - [x] "GET /api/yolo HTTP/1.1" 404 1\n')
+
+        result = runner.invoke(cli, ["coverage", "test.wadl", "access.log"])
+
+    assert result.exit_code == 0
+    assert "Endpoints hit: 1 of 3 (33.3%)" in result.output
+    assert "1 GET /api/yolo" in result.output
+
+
+@mock.patch("requests.request", side_effect=mocked_requests_request)
+def test_ok_dedup(mock_request):
+    # The same <resources> block twice
+    resources = WADL_SAMPLE.split("<grammars/>")[1].split("</resources>")[0] + "</resources>"
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE.replace("</resources>", "</resources>" + resources))
+
+        result = runner.invoke(wadalize, ["--dump-urls", "test.wadl"])
+        assert result.exit_code == 0
+        assert len(result.output.splitlines()) == 6
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--dedup", "test.wadl"])
+        assert result.exit_code == 0
+        assert result.output.splitlines()[-1] == "Duplicates collapsed: 3"
+        assert len(result.output.splitlines()) == 4
+
+        result = runner.invoke(wadalize, ["--dedup", "--stats", "test.wadl"])
+        assert result.exit_code == 0
+        assert mock_request.call_count == 3
+        assert "Duplicates collapsed: 3" in result.output
+
+
+def test_ok_only_path_and_deny_methods():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--only-path", "/affiliate/*", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        assert result.output == (
+            "https://example.com/api/affiliate/v1/categories/tree\nhttps://example.com/api/affiliate/v1/search/items?q=&property=\n"
+        )
+
+        result = runner.invoke(
+            wadalize, ["--dump-urls", "--only-path", "re:tree", "--only-path", "/access/*", "-dm", "GET", "-p", "action:run", "test.wadl"]
+        )
+        assert result.exit_code == 0
+        assert result.output == "https://example.com/api/affiliate/v1/categories/tree\n"
+
+
+@mock.patch("requests.request", side_effect=mocked_requests_request)
+def test_ok_schedule_and_latency_history(mock_request):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--safe-first", "--schedule", "interleave", "--latency-history", "history.json", "test.wadl"])
+        assert result.exit_code == 0
+        assert [args[0] for args, _ in mock_request.call_args_list] == ["GET", "GET", "POST"]
+
+        with open("history.json") as f:
+            history = json.load(f)
+        assert sorted(history) == [
+            "GET https://example.com/api/access/{action}",
+            "GET https://example.com/api/affiliate/v1/search/items",
+            "POST https://example.com/api/affiliate/v1/categories/tree",
+        ]
+        assert all(count == 1 for _, count in history.values())
+
+
+@mock.patch("requests.request", side_effect=requests.exceptions.ConnectionError("yolo"))
+def test_ok_breaker(mock_request):
+    # The same <resources> block many times, pointing to a dead host
+    resources = WADL_SAMPLE.split("<grammars/>")[1].split("</resources>")[0] + "</resources>"
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE.replace("</resources>", "</resources>" + resources * 9))
+
+        result = runner.invoke(wadalize, ["--breaker", "--breaker-min", "2", "-p", "action:run", "test.wadl"])
+
+    assert result.exit_code == 0
+    assert mock_request.call_count == 6
+    assert "Skipped by circuit breaker: 24" in result.output
+    assert "8 example.com https://example.com/api/access/{action}" in result.output
+
+
+def test_diff_and_since():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("old.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+        with open("new.wadl", "w") as f:
+            f.write(WADL_SAMPLE.replace('name="property" style="query"', 'name="property" style="header"'))
+
+        result = runner.invoke(cli, ["diff", "old.wadl", "new.wadl"])
+        assert result.exit_code == 0
+        assert result.output == "~ GET /affiliate/v1/search/items (getItems)\nAdded: 0, removed: 0, changed: 1, unchanged: 2\n"
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--since", "old.wadl", "new.wadl"])
+        assert result.exit_code == 0
+        assert result.output == "https://example.com/api/affiliate/v1/search/items?q=\n"
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--since", "new.wadl", "new.wadl"])
+        assert result.exit_code == 0
+        assert result.output == ""
+
+
+@mock.patch("requests.get")
+def test_dump_urls_compressed_source(mock_get):
+    mock_get.return_value = mock.Mock(content=gzip.compress(WADL_SAMPLE.encode()))
+    result = CliRunner().invoke(wadalize, ["--dump-urls", "-p", "action:run", "https://example.com/application.wadl.gz"])
+    assert result.exit_code == 0
+    assert "https://example.com/api/access/run?resource=&domain=\n" in result.output
+
+
+@mock.patch("requests.get")
+def test_since_fetches_source_once(mock_get):
+    mock_get.return_value = mock.Mock(content=WADL_SAMPLE.encode())
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("old.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--since", "old.wadl", "https://example.com/api/application.wadl"])
+        assert result.exit_code == 0
+        assert result.output == ""
+        assert mock_get.call_count == 1
+
+
+@mock.patch("requests.request", side_effect=mocked_requests_request)
+def test_ok_response_cache(mock_request):
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--cache", "cache.db", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        assert mock_request.call_count == 3
+        assert "Cache: 0 hits, 0 revalidated, 2 misses" in result.output
+
+        result = runner.invoke(wadalize, ["--cache", "cache.db", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        # only the POST is sent again
+        assert mock_request.call_count == 4
+        assert "Cache: 2 hits, 0 revalidated, 0 misses" in result.output
+
+
+@responses.activate
+def test_dump_urls_source_cache():
+    responses.add(responses.GET, "https://example.com/application.wadl", body=WADL_SAMPLE, headers={"ETag": '"v1"'})
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        args = ["--dump-urls", "--source-cache", "sources", "--source-max-age", "60", "-p", "action:run", "https://example.com/application.wadl"]
+        first = runner.invoke(wadalize, args)
+        second = runner.invoke(wadalize, args)
+
+    assert first.exit_code == 0
+    assert second.output == first.output
+    assert len(first.output.splitlines()) == 3
+    assert len(responses.calls) == 1
+
+
+def test_batch():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("a.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+        with open("sources.txt", "w") as f:
+            f.write("# our services\na.wadl\nmissing.wadl\n")
+
+        result = runner.invoke(cli, ["batch", "-j", "1", "-p", "action:run", "-dm", "POST", "-i", "sources.txt", "a.wadl"])
+        assert result.exit_code == 1
+        lines = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+        assert sorted(line["source"] for line in lines) == ["a.wadl", "a.wadl", "a.wadl", "a.wadl", "missing.wadl"]
+        assert "https://example.com/api/access/run?resource=&domain=" in [line.get("url") for line in lines]
+        assert "Sources: 3, failed: 1, requests: 4" in result.output
+
+        result = runner.invoke(cli, ["batch", "-j", "1", "-o", "out", "a.wadl"])
+        assert result.exit_code == 0
+        with open("out/0000-a.wadl.ndjson") as f:
+            assert len(f.readlines()) == 3
+
+
+def test_profile():
+    runner = CliRunner(mix_stderr=False)
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dry-run", "--profile-output", "run.pstats", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        lines = result.stderr.splitlines()
+        start = next(num for num, line in enumerate(lines) if line.startswith("Stage ")) + 1
+        stages = [line.split()[0] for line in lines[start:]]
+        assert stages == ["fetch", "parse", "compile", "walk", "normalize", "expand", "compact", "build"]
+        assert pstats.Stats("run.pstats").total_calls > 0
+
+
+def test_mem_report():
+    runner = CliRunner(mix_stderr=False)
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dump-urls", "--mem-report", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        lines = result.stderr.splitlines()
+        assert lines[0].split()[-2:] == ["Retained", "Peak"]
+        assert lines[-1].startswith("Memory: ")
+        assert any(line.startswith("compact ") for line in lines)
+
+
+def test_compile_and_run_plan():
+    runner = CliRunner(mix_stderr=False)
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(cli, ["compile", "-p", "action:run", "--shards", "2", "-o", "plan.bin", "test.wadl"])
+        assert result.exit_code == 0
+        assert result.stderr.strip() == "Requests: 3, shards: 2"
+
+        expected = runner.invoke(wadalize, ["--dump-urls", "-p", "action:run", "test.wadl"]).stdout.splitlines()
+        assert runner.invoke(wadalize, ["--dump-urls", "plan.bin"]).stdout.splitlines() == expected
+        shards = [runner.invoke(wadalize, ["--dump-urls", "--shard", shard, "plan.bin"]).stdout.splitlines() for shard in ("0", "1/2")]
+        assert shards[0] + shards[1] == expected
+
+        result = runner.invoke(cli, ["--dry-run", "-dm", "POST", "plan.bin"])
+        assert result.exit_code == 0
+        assert "Requests: 2" in result.stderr
+        assert "METHOD: POST" not in result.stdout
+
+        assert runner.invoke(wadalize, ["--shard", "0", "test.wadl"]).exit_code == 2
+        assert runner.invoke(wadalize, ["--shard", "2", "plan.bin"]).exit_code == 2
+        assert runner.invoke(wadalize, ["--dump-params", "plan.bin"]).exit_code == 2
+
+
+def test_fill_values():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        urls = [runner.invoke(wadalize, ["--dump-urls", "--fill-values", "--seed", seed, "-p", "action:run", "test.wadl"]).output for seed in "112"]
+        assert urls[0] == urls[1] != urls[2]
+        assert "resource=&" not in urls[0]
+        assert "resource=&" in runner.invoke(wadalize, ["--dump-urls", "-p", "action:run", "test.wadl"]).output
+
+
+def test_combine():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+        with open("params.txt", "w") as f:
+            f.write("action:create\naction:delete\nresource:r1\n")
+
+        args = ["--dump-urls", "-f", "params.txt", "-p", "domain:d1", "-p", "domain:d2", "-p", "principal:p1", "-p", "principal:p2"]
+        # without --combine, the last value given wins
+        assert runner.invoke(wadalize, args + ["test.wadl"]).output.splitlines()[-1].endswith("/access/delete?resource=r1&domain=d2")
+
+        product = runner.invoke(wadalize, args + ["--combine", "product", "test.wadl"]).output.splitlines()
+        pairwise = runner.invoke(wadalize, args + ["--combine", "pairwise", "test.wadl"]).output.splitlines()
+        assert len(product) == 2 + 8
+        assert len(pairwise) < len(product)
+        assert {url.split("?")[0] for url in pairwise} == {url.split("?")[0] for url in product}
+
+        result = runner.invoke(wadalize, args + ["--combine", "all", "test.wadl"])
+        assert result.exit_code == 2
+        assert "product, pairwise or N-way" in result.output
+
+
+def test_explain():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(
+            cli, ["explain", "-p", "action:create", "-p", "action:delete", "--combine", "product", "--threshold", "1", "test.wadl"]
+        )
+        assert result.exit_code == 0
+        assert result.output.startswith("Requests: 4 from 3 methods")
+        assert "Over 1 requests:\n           2 GET https://example.com/api/access/{action}" in result.output
+
+
+def test_results_db():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        result = runner.invoke(wadalize, ["--dry-run", "--results-db", "results.sqlite", "-p", "action:run", "test.wadl"])
+        assert result.exit_code == 0
+        db = sqlite3.connect("results.sqlite")
+        assert db.execute("SELECT method, status FROM results ORDER BY rowid").fetchall() == [("POST", 200), ("GET", 200), ("GET", 200)]
+
+
+def test_compare():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("test.wadl", "w") as f:
+            f.write(WADL_SAMPLE)
+
+        for latency in ("0.1", "0.2"):
+            args = ["--dry-run", "--mock-latency", latency, "--results-db", "results.sqlite", "-p", "action:run", "test.wadl"]
+            assert runner.invoke(wadalize, args).exit_code == 0
+
+        result = runner.invoke(cli, ["compare", "--run-a", "1", "--run-b", "2", "--min-samples", "1", "results.sqlite", "results.sqlite"])
+        assert result.exit_code == 0
+        assert result.output.startswith("Endpoints compared: 3 (only in A: 0, only in B: 0)\nRegressions: 0")
+
+        result = runner.invoke(cli, ["compare", "results.sqlite", "missing.sqlite"])
+        assert result.exit_code == 2
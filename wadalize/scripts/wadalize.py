@@ -1,18 +1,48 @@
+import functools
+import io
+import json
 import os
+import re
 import sys
 
 import click
-import requests
-import urllib3
 
 from wadalize import WADLHandler
+from wadalize import WADLParam
+from wadalize.breaker import CircuitBreaker
+from wadalize.cache import ResponseCache
+from wadalize.combinations import Combiner
+from wadalize.dedup import Deduplicator
+from wadalize.filters import WADLFilter
+from wadalize.plan import is_plan
+from wadalize.plan import PlanFile
+from wadalize.plan import write_plan
+from wadalize.profiling import NULL_PROFILER
+from wadalize.profiling import Profiler
+from wadalize.results import ResultsWriter
+from wadalize.runner import Runner
+from wadalize.scheduler import LatencyHistory
+from wadalize.scheduler import Scheduler
+from wadalize.sources import decompress
+from wadalize.sources import SourceCache
+from wadalize.transport import FastTransport
+from wadalize.transport import MockTransport
+from wadalize.transport import RequestsTransport
+from wadalize.values import ValueProvider
 
-urllib3.disable_warnings()
 
+def disable_insecure_warnings():
+    """Silences the warnings about requests sent with verify=False"""
+    import urllib3
 
-def open_or_get(source, allow_redirects=False):
+    urllib3.disable_warnings()
+
+
+def open_or_get(source, allow_redirects=False, cache=None):
     """
-    Returns the content of a local file or HTTP url
+    Returns the content of a local file or HTTP url. When given a
+    wadalize.sources.SourceCache, urls are fetched through it. Compressed
+    urls are decompressed either way.
 
     Raises all exceptions without catching them.
     """
@@ -20,17 +50,59 @@ def open_or_get(source, allow_redirects=False):
         # This is a local file
         with open(source, "r") as file:
             wadl_string = file.read()
+        return wadl_string
+
+    # requests is only imported when there's something to fetch, so commands
+    # working on local files start faster
+    import requests
+
+    disable_insecure_warnings()
+    if cache is not None:
+        wadl_string = cache.fetch(source, allow_redirects=allow_redirects)
     else:
         # This is a url. We don't care about the status returned,
         # just the content
         r = requests.get(source, verify=False, allow_redirects=allow_redirects)
-        wadl_string = r.content
+        wadl_string = decompress(r.content)
 
     return wadl_string
 
 
+def load_source(source, cache=None):
+    """Same as open_or_get, turning errors into click exceptions"""
+    try:
+        return open_or_get(source, cache=cache)
+    except IOError as e:
+        # requests exceptions are IOErrors too
+        raise click.ClickException(e)
+
+
+def stream_content(content):
+    """Returns a file object lxml can parse from an already loaded WADL"""
+    return io.BytesIO(content.encode() if isinstance(content, str) else content)
+
+
+def stream_source(source):
+    """Returns something lxml can parse incrementally: the path of a local
+    file, or the content of a url"""
+    if source.startswith("http://") or source.startswith("https://"):
+        return stream_content(load_source(source))
+    return source
+
+
+def diff_sources(old, new, new_content=None):
+    """Diffs two WADL sources. new_content is the already loaded content of
+    `new`, to avoid fetching it again"""
+    from wadalize.diff import WADLDiff
+
+    try:
+        return WADLDiff(stream_source(old), stream_source(new) if new_content is None else stream_content(new_content))
+    except IOError as e:
+        raise click.ClickException(e)
+
+
 def output_params(wadl_string):
-    wh = WADLHandler(wadl_string)
+    wh = WADLHandler(wadl_string, detach=True)
     params = []
 
     for wr in wh.requests:
@@ -42,45 +114,271 @@ def output_params(wadl_string):
     return "\n".join(params)
 
 
-def output_urls(wadl_string, base, headers, default_values, query_params):
-    wh = WADLHandler(wadl_string, base=base, default_values=default_values)
+def output_urls(wadl_string, base, headers, default_values, query_params, dedup=None, filters=None, profiler=None, values=None, combiner=None):
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    wh = WADLHandler(
+        wadl_string, base=base, default_values=default_values, filters=filters, profiler=profiler, detach=True, values=values, combiner=combiner
+    )
 
-    for wr in wh.requests:
+    # urls are printed one by one, no need for a WADLRequest each
+    echo_urls(add_query_params(wh.request_store(), query_params), dedup=dedup, profiler=profiler)
+
+
+def add_query_params(wrs, query_params):
+    """Lazily yields the given requests with the -q query params added, in
+    place of their query params of the same name"""
+    if not query_params:
+        yield from wrs
+        return
+    extra = [WADLParam.from_dict(dict(name=name, type="xs:string", style="query", value=value)) for name, value in query_params.items()]
+    for wr in wrs:
+        yield wr.replace(params=[p for p in wr.params if p.style != "query" or p.name not in query_params] + extra)
+
+
+def echo_urls(wrs, dedup=None, profiler=None):
+    """Prints the url of each request"""
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    wrs = dedup.filter(wrs) if dedup is not None else wrs
+    for wr in wrs:
         # turn into a python request
-        req = wr.dump_as_request()
+        with profiler.stage("build"):
+            req = wr.dump_as_request()
 
         click.echo(req.url)
 
+    if dedup is not None:
+        click.echo("Duplicates collapsed: {}".format(dedup.collapsed), err=True)
 
-def run_requests(wadl_string, base, headers, default_values, query_params, deny_methods):
-    wh = WADLHandler(wadl_string, base=base, default_values=default_values)
 
-    for wr in wh.requests:
-        # turn into a python request
-        req = wr.dump_as_request()
-
-        if req.method.upper() in deny_methods:
-            # Do not run deny methods
-            continue
-
-        # add the given header and query string parameters
-        req.headers.update(headers)
-        req.params.update(query_params)
-
-        # run request!
-        kwargs = {"headers": req.headers}
-        if os.getenv("HTTP_PROXY") or os.getenv("HTTPS_PROXY"):
-            # let's avoid any unwanted problems
-            kwargs["verify"] = False
-        requests.request(req.method, str(req.url), **kwargs)
+def build_transport(engine, pipeline=1, dry_run=False, mock_latency=0.0, mock_statuses=None, timeout=10.0, window=None):
+    """Returns the transport the runner will use to send the requests"""
+    if dry_run:
+        # prepare the requests just like the chosen engine would do
+        return MockTransport(latency=mock_latency, statuses=mock_statuses, prepare="wire" if engine == "fast" else "requests")
+    if engine == "fast":
+        return FastTransport(window=window, pipeline=pipeline, verify=False, timeout=timeout)
+    return RequestsTransport(timeout=timeout)
+
+
+def run_requests(
+    wadl_string,
+    base,
+    headers,
+    default_values,
+    query_params,
+    deny_methods,
+    transport=None,
+    stats=False,
+    dedup=None,
+    only_paths=None,
+    scheduler=None,
+    history=None,
+    breaker=None,
+    only_endpoints=None,
+    cache=None,
+    profiler=None,
+    values=None,
+    combiner=None,
+    results=None,
+):
+    # Denied methods and paths are skipped while parsing, before expanding them
+    filters = WADLFilter(exclude_methods=deny_methods, include_paths=only_paths, include_endpoints=only_endpoints)
+    wh = WADLHandler(
+        wadl_string, base=base, default_values=default_values, filters=filters, profiler=profiler, detach=True, values=values, combiner=combiner
+    )
+    return dispatch_requests(
+        add_query_params(wh.requests, query_params),
+        transport=transport,
+        headers=headers,
+        stats=stats,
+        dedup=dedup,
+        scheduler=scheduler,
+        history=history,
+        breaker=breaker,
+        cache=cache,
+        profiler=profiler,
+        results=results,
+    )
+
+
+def dispatch_requests(
+    wrs,
+    transport=None,
+    headers=None,
+    stats=False,
+    dedup=None,
+    scheduler=None,
+    history=None,
+    breaker=None,
+    cache=None,
+    profiler=None,
+    results=None,
+):
+    """Sends the given requests, printing each one and the run stats"""
+    runner = Runner(
+        transport or RequestsTransport(),
+        headers=headers,
+        dedup=dedup,
+        scheduler=scheduler,
+        history=history,
+        breaker=breaker,
+        cache=cache,
+        profiler=profiler,
+        results=results,
+    )
+
+    for wr, resp in runner.run(wrs):
         click.echo("METHOD: {}, URL: {}, HEADERS: {}".format(wr.method, wr.location, wr.headers))
+        if resp.error:
+            click.echo("ERROR: {}".format(resp.error), err=True)
+
+    if stats:
+        click.echo(runner.stats.summary(), err=True)
+    elif dedup is not None:
+        click.echo("Duplicates collapsed: {}".format(dedup.collapsed), err=True)
+    return runner.stats
+
+
+def start_profiling(profile, profile_output=None, mem_report=False):
+    """Returns a Profiler if asked for one with --profile, --profile-output or
+    --mem-report, printing its stage breakdown to stderr, and writing cProfile
+    stats to profile_output, when the command ends"""
+    if not (profile or profile_output or mem_report):
+        return None
+
+    profiler = Profiler(memory=mem_report)
+    cprofile = None
+    if profile_output:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    def done():
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(profile_output)
+        click.echo(profiler.summary(), err=True)
+
+    click.get_current_context().call_on_close(done)
+    return profiler
+
+
+def value_provider(fill_values, seed):
+    """Returns the ValueProvider asked for with --fill-values, if any"""
+    return ValueProvider(seed=seed) if fill_values else None
+
+
+def build_combiner(combine, seed):
+    """Returns the Combiner asked for with --combine, if any"""
+    if not combine:
+        return None
+    try:
+        return Combiner.from_string(combine, seed=seed)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--combine")
+
+
+def load_default_values(params, use_file=None, candidates=False):
+    """Returns the default values given with -p options, taking precedence
+    over the ones read from the --use-file file. With candidates, params
+    given more than once get the list of their values, to be combined"""
+    # Check if we got use params
+    default_values = {}
+    if use_file:
+        # Get params from file
+        try:
+            with open(use_file) as f:
+                content = f.read()
+            default_values = get_params_from_string(content)
+            if candidates:
+                default_values.update(collect_candidates(x for x in content.split("\n") if x))
+        except ValueError:
+            raise click.ClickException(
+                "The input file is not in the required format. Eg. \
+                    key1:val1\nkey2:val2\n...\nkeyN:valN"
+            )
+
+    # params passed by -p options take precedence over those from --use-file
+    try:
+        default_values.update(dict(map(lambda z: z.strip(), x.split(":", 1)) for x in params))
+        if candidates:
+            default_values.update(collect_candidates(params))
+    except ValueError:
+        pass
+    return default_values
+
+
+def collect_candidates(items):
+    """Returns the keys given more than once in a list of key:value items,
+    mapped to the list of their values"""
+    values = {}
+    for item in items:
+        key, value = map(lambda z: z.strip(), item.split(":", 1))
+        values.setdefault(key, []).append(value)
+    return {key: candidates for key, candidates in values.items() if len(candidates) > 1}
+
+
+def parse_statuses(values):
+    """Turns a list of CODE[:WEIGHT] strings into a dict of status code to
+    weight"""
+    statuses = {}
+    for value in values:
+        code, _, weight = value.partition(":")
+        statuses[int(code)] = float(weight) if weight else 1.0
+    return statuses
+
+
+def open_plan(source, shard=None, deny_methods=None):
+    """Returns the requests of a plan written by `compile`, only those of
+    the given shard, K or K/N, if any"""
+    try:
+        plan = PlanFile(source)
+    except (IOError, ValueError) as e:
+        raise click.ClickException(e)
+
+    requests = plan.store
+    if shard:
+        match = re.match(r"^(\d+)(?:/(\d+))?$", shard)
+        if match is None:
+            raise click.UsageError("--shard must look like K or K/N, eg. 0/4")
+        try:
+            requests = plan.shard(int(match.group(1)), shards=int(match.group(2)) if match.group(2) else None)
+        except ValueError as e:
+            raise click.UsageError(e)
+    if deny_methods:
+        requests = requests.filter(methods=[method for method in plan.methods if method.upper() not in deny_methods])
+    return requests
 
 
 def get_params_from_string(data_str):
     return dict(map(lambda z: z.strip(), x.split(":", 1)) for x in data_str.split("\n") if x)
 
 
-@click.command()
+class DefaultGroup(click.Group):
+    """Group of commands falling back to a default one when the first
+    argument isn't the name of a command, so `wadalize [OPTIONS] SOURCE`
+    keeps working next to subcommands like `wadalize serve SOURCE`"""
+
+    def __init__(self, *args, default=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default = default
+
+    def parse_args(self, ctx, args):
+        if self.default and (not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names)):
+            args.insert(0, self.default)
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultGroup, default="run")
+def cli():
+    """
+    Work with WADL sources. When no command is given, `run` is used, so
+    `wadalize [OPTIONS] SOURCE` is the same as `wadalize run [OPTIONS] SOURCE`.
+    """
+
+
+@cli.command()
 @click.option(
     "-b",
     "--base",
@@ -94,7 +392,20 @@ def get_params_from_string(data_str):
     "-dm",
     "--deny-methods",
     help="Comma separated list of HTTP verbs to avoid when running \
-        the requests. No values are checked.",
+        the requests (or dumping their urls). No values are checked.",
+)
+@click.option(
+    "--only-path",
+    default=[],
+    multiple=True,
+    help="Only use the methods whose path template matches this glob, or \
+    regex when prefixed with re:. Can be repeated. Example: --only-path '/users/*'",
+)
+@click.option(
+    "--since",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Previous version of the WADL. Only the endpoints added or changed \
+    since then are used (see `wadalize diff`).",
 )
 @click.option(
     "--dump-params",
@@ -119,8 +430,196 @@ def get_params_from_string(data_str):
     format: key1:val1\nkey2:val2\n...\nkeyN:valN. Params passed \
     by command line take precedence.",
 )
+@click.option(
+    "--engine",
+    type=click.Choice(["requests", "fast"]),
+    default="requests",
+    show_default=True,
+    help="HTTP client used to run the requests. 'fast' is our own asyncio \
+    engine: it keeps persistent connections but doesn't go through proxies.",
+)
+@click.option(
+    "--pipeline",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Max requests in flight per connection when using --engine fast.",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=10.0,
+    show_default=True,
+    help="Seconds to wait for connecting and for each response, with either engine.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Go through the whole run without sending anything: requests are \
+    prepared and answered by an in-process mock backend. Implies --stats.",
+)
+@click.option("--mock-latency", type=float, default=0.0, help="Latency in seconds reported by the mock backend of --dry-run.")
+@click.option(
+    "--mock-status",
+    default=[],
+    multiple=True,
+    help="Status code answered by the mock backend of --dry-run, with an \
+    optional weight. Example: --mock-status 200:9 --mock-status 500:1",
+)
+@click.option("--stats", is_flag=True, default=False, help="Print a summary of the run to stderr when done.")
+@click.option(
+    "--dedup",
+    is_flag=True,
+    default=False,
+    help="Skip requests identical to one already seen: same verb, url, query \
+    string and header params. Works with --dump-urls too.",
+)
+@click.option(
+    "--dedup-header",
+    default=[],
+    multiple=True,
+    help="Header also taken into account by --dedup. Example: --dedup-header Content-Type",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(["document", "interleave"]),
+    default="document",
+    show_default=True,
+    help="Order to send the requests in: as they appear in the WADL, or \
+    round-robin across hosts and path prefixes.",
+)
+@click.option("--safe-first", is_flag=True, default=False, help="Send safe verbs (GET, HEAD, OPTIONS, TRACE) before the rest.")
+@click.option(
+    "--latency-history",
+    type=click.Path(dir_okay=False),
+    help="JSON file with the mean latency of each endpoint in past runs. When \
+    it has data, the slowest endpoints are sent first. Updated after the run.",
+)
+@click.option(
+    "--breaker",
+    is_flag=True,
+    default=False,
+    help="Stop sending requests to an endpoint (host and resource template) \
+    once too many of them fail or time out, probing it again after a cooldown.",
+)
+@click.option(
+    "--breaker-ratio",
+    type=click.FloatRange(0, 1, min_open=True),
+    default=0.5,
+    show_default=True,
+    help="Ratio of failed requests opening the circuit of an endpoint.",
+)
+@click.option("--breaker-min", type=click.IntRange(min=1), default=5, show_default=True, help="Requests needed before checking the ratio.")
+@click.option("--breaker-cooldown", type=float, default=30.0, show_default=True, help="Seconds before probing an open circuit.")
+@click.option("--breaker-defer", is_flag=True, default=False, help="Retry skipped requests at the end of the run instead of dropping them.")
+@click.option(
+    "--cache",
+    type=click.Path(dir_okay=False),
+    help="sqlite file caching the responses of GET and HEAD requests between \
+    runs. Fresh responses are reused, stale ones revalidated with their ETag or \
+    Last-Modified. Ignored by --dry-run.",
+)
+@click.option("--cache-ttl", type=float, default=3600.0, show_default=True, help="Seconds a cached response is reused without revalidating it.")
+@click.option("--cache-size", type=click.IntRange(min=1), default=64, show_default=True, help="Size budget of the --cache file, in MB.")
+@click.option(
+    "--results-db",
+    type=click.Path(dir_okay=False),
+    help="sqlite database recording every request sent and its response: endpoint, url, status, elapsed seconds, size \
+    and error. Created if needed, each run is added to it.",
+)
+@click.option(
+    "--source-cache",
+    type=click.Path(file_okay=False),
+    envvar="WADALIZE_SOURCE_CACHE",
+    help="Directory caching remote WADL sources between runs. Unchanged \
+    sources are revalidated with their ETag or Last-Modified instead of being \
+    downloaded again. Can also be set with WADALIZE_SOURCE_CACHE.",
+)
+@click.option(
+    "--source-max-age",
+    type=float,
+    default=0.0,
+    show_default=True,
+    envvar="WADALIZE_SOURCE_MAX_AGE",
+    help="Seconds a cached source is used without even revalidating it.",
+)
+@click.option("--profile", is_flag=True, default=False, help="Print the time spent in each stage (parsing, expansion, network...) to stderr.")
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help="Also profile the whole command with cProfile and save the stats to this file, \
+    to be read with pstats or snakeviz. Implies --profile.",
+)
+@click.option(
+    "--mem-report",
+    is_flag=True,
+    default=False,
+    help="Also trace the memory retained by each stage, and its peak, with tracemalloc. Much slower. Implies --profile.",
+)
+@click.option(
+    "--shard",
+    help="When SOURCE is a plan written by `wadalize compile`, only use this shard of it: K, or K/N to split it \
+    in N shards rather than as many as it was compiled with. Example: --shard 2/8",
+)
+@click.option(
+    "--fill-values",
+    is_flag=True,
+    default=False,
+    help="Make up the values of the params having no default, from their type (xs:int, xs:date...) and name, \
+    rather than leaving them empty. The same --seed always gives the same values.",
+)
+@click.option(
+    "--combine",
+    help="Combine the candidate values of params given several times (-p sort:asc -p sort:desc), and the paths of \
+    each endpoint, rather than sending them all at once: product, pairwise or N-way (eg. 3-way). Pairwise covers \
+    every pair of values with far fewer requests than the product.",
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of the values made up by --fill-values and of --combine.")
 @click.argument("source")
-def run(base, headers, params, query_params, deny_methods, dump_params, dump_urls, use_file, source):
+def run(
+    base,
+    headers,
+    params,
+    query_params,
+    deny_methods,
+    only_path,
+    since,
+    dump_params,
+    dump_urls,
+    use_file,
+    engine,
+    pipeline,
+    timeout,
+    dry_run,
+    mock_latency,
+    mock_status,
+    stats,
+    dedup,
+    dedup_header,
+    schedule,
+    safe_first,
+    latency_history,
+    breaker,
+    breaker_ratio,
+    breaker_min,
+    breaker_cooldown,
+    breaker_defer,
+    cache,
+    cache_ttl,
+    cache_size,
+    results_db,
+    source_cache,
+    source_max_age,
+    profile,
+    profile_output,
+    mem_report,
+    shard,
+    fill_values,
+    combine,
+    seed,
+    source,
+):
     """
     Script that receives a WADL source from a file path or url, and does one of
     two things with it:
@@ -135,19 +634,14 @@ def run(base, headers, params, query_params, deny_methods, dump_params, dump_url
 
     Obviously both options implicitly interpret the WADL source using our
     WADLHandler class.
-    """
 
-    try:
-        wadl_string = open_or_get(source)
-    except IOError as e:
-        raise click.ClickException(e)
-    except requests.exceptions.ConnectionError:
-        raise click.ClickException("Couldn't connect to the given url.")
+    SOURCE can also be a plan written by `wadalize compile`, whose requests
+    are used as they are, without parsing anything.
+    """
 
-    # If we got to dump the params do it and exit
-    if dump_params:
-        click.echo(output_params(wadl_string))
-        sys.exit(0)
+    profiler = start_profiling(profile, profile_output, mem_report)
+    values = value_provider(fill_values, seed)
+    combiner = build_combiner(combine, seed)
 
     # Turns deny_methods into a list
     if deny_methods:
@@ -155,24 +649,25 @@ def run(base, headers, params, query_params, deny_methods, dump_params, dump_url
     else:
         deny_methods = []
 
-    # Check if we got use params
-    default_values = {}
-    if use_file:
-        # Get params from file
-        try:
-            with open(use_file) as f:
-                default_values = get_params_from_string(f.read())
-        except ValueError:
-            raise click.ClickException(
-                "The input file is not in the required format. Eg. \
-                    key1:val1\nkey2:val2\n...\nkeyN:valN"
+    plan = None
+    if is_plan(source):
+        if dump_params or since or only_path or values is not None or combiner is not None:
+            raise click.UsageError(
+                "--dump-params, --since, --only-path, --fill-values and --combine can't be used with a plan, use them when compiling it."
             )
+        plan = open_plan(source, shard=shard, deny_methods=deny_methods)
+    elif shard:
+        raise click.UsageError("--shard needs a plan written by `wadalize compile`.")
+    else:
+        with (profiler or NULL_PROFILER).stage("fetch"):
+            wadl_string = load_source(source, cache=SourceCache(source_cache, max_age=source_max_age) if source_cache else None)
 
-    # params passed by -p options take precedence over those from --use-file
-    try:
-        default_values.update(dict(map(lambda z: z.strip(), x.split(":", 1)) for x in params))
-    except ValueError:
-        pass
+    # If we got to dump the params do it and exit
+    if dump_params:
+        click.echo(output_params(wadl_string))
+        sys.exit(0)
+
+    default_values = load_default_values(params, use_file, candidates=combiner is not None)
 
     # Preparing params
     try:
@@ -185,13 +680,419 @@ def run(base, headers, params, query_params, deny_methods, dump_params, dump_url
     except ValueError:
         query_params = {}
 
+    dedup = Deduplicator(headers=list(dedup_header) if dedup_header else None) if dedup or dedup_header else None
+
+    only_endpoints = None
+    if since:
+        only_endpoints = diff_sources(since, source, new_content=wadl_string).modified
+
     # Run requests with the available parameters
-    if dump_urls:
-        output_urls(wadl_string, base, headers, default_values, query_params)
+    if dump_urls and plan is not None:
+        echo_urls(plan, dedup=dedup, profiler=profiler)
+        sys.exit(0)
+    elif dump_urls:
+        filters = WADLFilter(exclude_methods=deny_methods, include_paths=only_path, include_endpoints=only_endpoints)
+        output_urls(
+            wadl_string,
+            base,
+            headers,
+            default_values,
+            query_params,
+            dedup=dedup,
+            filters=filters,
+            profiler=profiler,
+            values=values,
+            combiner=combiner,
+        )
         sys.exit(0)
     else:
-        run_requests(wadl_string, base, headers, default_values, query_params, deny_methods=deny_methods)
+        try:
+            mock_statuses = parse_statuses(mock_status)
+        except ValueError:
+            raise click.ClickException("--mock-status must look like CODE or CODE:WEIGHT, eg. 200:0.9")
+
+        history = LatencyHistory.load(latency_history) if latency_history else None
+        scheduler = Scheduler(interleave=schedule == "interleave", safe_first=safe_first, history=history)
+
+        if breaker or breaker_defer:
+            breaker = CircuitBreaker(failure_ratio=breaker_ratio, min_requests=breaker_min, cooldown=breaker_cooldown, defer=breaker_defer)
+        else:
+            breaker = None
+
+        if cache and not dry_run:
+            cache = ResponseCache(cache, ttl=cache_ttl, max_bytes=cache_size * 1024 * 1024)
+        else:
+            cache = None
+
+        results = ResultsWriter(results_db, source=source) if results_db else None
+
+        disable_insecure_warnings()
+        options = dict(
+            # the fast engine sends a window at a time, so the breaker can
+            # act on the results of the previous ones
+            transport=build_transport(
+                engine,
+                pipeline=pipeline,
+                dry_run=dry_run,
+                mock_latency=mock_latency,
+                mock_statuses=mock_statuses,
+                timeout=timeout,
+                window=breaker.window if breaker is not None else None,
+            ),
+            stats=stats or dry_run or breaker is not None or cache is not None,
+            dedup=dedup,
+            scheduler=scheduler,
+            history=history,
+            breaker=breaker,
+            cache=cache,
+            profiler=profiler,
+            results=results,
+        )
+        try:
+            if plan is not None:
+                dispatch_requests(plan, headers=headers, **options)
+            else:
+                run_requests(
+                    wadl_string,
+                    base,
+                    headers,
+                    default_values,
+                    query_params,
+                    deny_methods=deny_methods,
+                    only_paths=only_path,
+                    only_endpoints=only_endpoints,
+                    values=values,
+                    combiner=combiner,
+                    **options,
+                )
+        finally:
+            if cache is not None:
+                cache.close()
+            if results is not None:
+                results.close()
+        if latency_history and not dry_run:
+            history.save(latency_history)
+
+
+@cli.command()
+@click.argument("old")
+@click.argument("new")
+def diff(old, new):
+    """
+    Compares two versions of a WADL source, endpoint by endpoint, listing the
+    added (+), removed (-) and changed (~) ones. An endpoint is a verb, a
+    path template and a method id; it changed when its params or its
+    representations did. Both documents are streamed, never fully loaded.
+    """
+    click.echo(diff_sources(old, new).summary())
+
+
+@cli.command("compile")
+@click.option("-b", "--base", help="Base location to use when parsing the WADL file.")
+@click.option("-p", "--params", default=[], help="Default value for any given param name. Example: -p sort:asc", multiple=True)
+@click.option("-f", "--use-file", type=click.Path(exists=True), help="Pass a file as a source of params values, like for `run`.")
+@click.option("-dm", "--deny-methods", help="Comma separated list of HTTP verbs to leave out.")
+@click.option("--only-path", default=[], multiple=True, help="Only use the methods whose path template matches this glob, like for `run`.")
+@click.option("--shards", type=click.IntRange(min=1), default=1, show_default=True, help="Number of shards workers split the plan in by default.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), required=True, help="File to write the plan to.")
+@click.option(
+    "--source-cache", type=click.Path(file_okay=False), envvar="WADALIZE_SOURCE_CACHE", help="Directory caching remote sources, like for `run`."
+)
+@click.option(
+    "--source-max-age", type=float, default=0.0, envvar="WADALIZE_SOURCE_MAX_AGE", help="Seconds a cached source is used without revalidating it."
+)
+@click.option(
+    "--fill-values",
+    is_flag=True,
+    default=False,
+    help="Make up the values of the params having no default, from their type (xs:int, xs:date...) and name, \
+    rather than leaving them empty. The same --seed always gives the same values.",
+)
+@click.option(
+    "--combine",
+    help="Combine the candidate values of params given several times (-p sort:asc -p sort:desc), and the paths of \
+    each endpoint, rather than sending them all at once: product, pairwise or N-way (eg. 3-way). Pairwise covers \
+    every pair of values with far fewer requests than the product.",
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of the values made up by --fill-values and of --combine.")
+@click.argument("source")
+def compile_plan(base, params, use_file, deny_methods, only_path, shards, output, source_cache, source_max_age, fill_values, combine, seed, source):
+    """
+    Expands every request of a WADL source once and writes them to a compact
+    binary plan: urls, verbs, params, representations and templates, each
+    request identified by its position. Give the plan to `wadalize run`, with
+    --shard to have each worker take its own part of it. Reading a plan is
+    almost instant and needs neither lxml nor exrex.
+    """
+    wadl_string = load_source(source, cache=SourceCache(source_cache, max_age=source_max_age) if source_cache else None)
+    deny_methods = [x.upper().strip() for x in deny_methods.split(",") if x] if deny_methods else []
+    filters = WADLFilter(exclude_methods=deny_methods, include_paths=only_path)
+    combiner = build_combiner(combine, seed)
+    try:
+        wh = WADLHandler(
+            wadl_string,
+            base=base,
+            default_values=load_default_values(params, use_file, candidates=combiner is not None),
+            filters=filters,
+            detach=True,
+            values=value_provider(fill_values, seed),
+            combiner=combiner,
+        )
+        count = write_plan(output, wh.request_store(), shards=shards)
+    except ValueError as e:
+        raise click.ClickException(e)
+    click.echo("Requests: {}, shards: {}".format(count, shards), err=True)
+
+
+@cli.command()
+@click.option("-b", "--base", help="Base location to use when parsing the WADL file.")
+@click.option("-p", "--params", default=[], help="Default value for any given param name. Example: -p sort:asc", multiple=True)
+@click.option("-f", "--use-file", type=click.Path(exists=True), help="Pass a file as a source of params values, like for `run`.")
+@click.option("-dm", "--deny-methods", help="Comma separated list of HTTP verbs to leave out.")
+@click.option("--only-path", default=[], multiple=True, help="Only use the methods whose path template matches this glob, like for `run`.")
+@click.option("--combine", help="Combination of the candidate values of params given several times, like for `run`.")
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of --combine.")
+@click.option("--threshold", type=int, default=1000, show_default=True, help="Flag the methods expanding to more requests than this.")
+@click.option("--top", type=int, default=20, show_default=True, help="Number of biggest methods to list.")
+@click.option(
+    "--source-cache", type=click.Path(file_okay=False), envvar="WADALIZE_SOURCE_CACHE", help="Directory caching remote sources, like for `run`."
+)
+@click.option(
+    "--source-max-age", type=float, default=0.0, envvar="WADALIZE_SOURCE_MAX_AGE", help="Seconds a cached source is used without revalidating it."
+)
+@click.argument("source")
+def explain(base, params, use_file, deny_methods, only_path, combine, seed, threshold, top, source_cache, source_max_age, source):
+    """
+    Tells how many requests `wadalize run` would send for a WADL source,
+    without expanding any: per method, from the alternations of the regexes
+    in its path and its representations, and in total per host and verb.
+    Methods expanding to more than --threshold requests are flagged.
+    """
+    wadl_string = load_source(source, cache=SourceCache(source_cache, max_age=source_max_age) if source_cache else None)
+    deny_methods = [x.upper().strip() for x in deny_methods.split(",") if x] if deny_methods else []
+    combiner = build_combiner(combine, seed)
+    try:
+        wh = WADLHandler(
+            wadl_string,
+            base=base,
+            default_values=load_default_values(params, use_file, candidates=combiner is not None),
+            filters=WADLFilter(exclude_methods=deny_methods, include_paths=only_path),
+            combiner=combiner,
+        )
+        estimate = wh.estimate(threshold=threshold)
+    except ValueError as e:
+        raise click.ClickException(e)
+    click.echo(estimate.summary(top=top))
+
+
+@cli.command()
+@click.option("--run-a", "run_a_id", type=int, help="Run of RUN_A to compare. Defaults to its last one.")
+@click.option("--run-b", "run_b_id", type=int, help="Run of RUN_B to compare. Defaults to its last one.")
+@click.option("--percentile", type=click.Choice(["50", "90", "99"]), default="90", show_default=True, help="Latency percentile compared.")
+@click.option("--alpha", type=float, default=0.05, show_default=True, help="Significance level of the Mann-Whitney U test.")
+@click.option("--min-change", type=float, default=0.1, show_default=True, help="Relative slowdown of the percentile making a regression.")
+@click.option("--min-samples", type=int, default=5, show_default=True, help="Requests an endpoint needs in each run to be flagged.")
+@click.option("--top", type=int, default=20, show_default=True, help="Number of worst regressions to list.")
+@click.option("--fail", is_flag=True, default=False, help="Exit with status 1 if any endpoint regressed.")
+@click.argument("run_a", type=click.Path(exists=True, dir_okay=False))
+@click.argument("run_b", type=click.Path(exists=True, dir_okay=False))
+def compare(run_a_id, run_b_id, percentile, alpha, min_change, min_samples, top, fail, run_a, run_b):
+    """
+    Compares the latencies of two runs recorded with --results-db, RUN_A
+    before and RUN_B after, and ranks the endpoints that got slower. Endpoints
+    are aligned by verb, path template relative to the base url and method
+    id, so runs against different bases line up; a regression needs its
+    percentile to get --min-change slower and the change to be significant.
+    Both can be the same database, with --run-a and --run-b.
+    """
+    from wadalize.compare import compare_runs
+
+    try:
+        comparison = compare_runs(
+            run_a,
+            run_b,
+            run_a=run_a_id,
+            run_b=run_b_id,
+            percentile=int(percentile),
+            alpha=alpha,
+            min_change=min_change,
+            min_samples=min_samples,
+        )
+    except ValueError as e:
+        raise click.ClickException(e)
+    click.echo(comparison.summary(top=top))
+    if fail and comparison.regressions:
+        sys.exit(1)
+
+
+def batch_output_path(output_dir, index, source):
+    """Returns the path of the file receiving the requests of a source"""
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", source.rstrip("/").rsplit("/", 1)[-1]) or "source"
+    return os.path.join(output_dir, "{:04d}-{}.ndjson".format(index, name))
+
+
+@cli.command()
+@click.option("-b", "--base", help="Base location to use when parsing the WADL files.")
+@click.option("-p", "--params", default=[], help="Default value for any given param name. Example: -p sort:asc", multiple=True)
+@click.option("-f", "--use-file", type=click.Path(exists=True), help="Pass a file as a source of params values, like for `run`.")
+@click.option("-dm", "--deny-methods", help="Comma separated list of HTTP verbs to leave out.")
+@click.option("--only-path", default=[], multiple=True, help="Only use the methods whose path template matches this glob, like for `run`.")
+@click.option(
+    "-i",
+    "--input-file",
+    type=click.File("r"),
+    help="File with one path or url per line, read along with the SOURCES. Use - for stdin.",
+)
+@click.option("-j", "--jobs", type=click.IntRange(min=1), help="Processes parsing the sources. Defaults to the number of cores.")
+@click.option("--fetch-workers", type=click.IntRange(min=1), default=8, show_default=True, help="Sources fetched concurrently.")
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Write the requests of each source to its own NDJSON file in this \
+    directory, instead of a single stream to stdout.",
+)
+@click.option(
+    "--source-cache", type=click.Path(file_okay=False), envvar="WADALIZE_SOURCE_CACHE", help="Directory caching remote sources, like for `run`."
+)
+@click.option(
+    "--source-max-age", type=float, default=0.0, envvar="WADALIZE_SOURCE_MAX_AGE", help="Seconds a cached source is used without revalidating it."
+)
+@click.option(
+    "--fill-values",
+    is_flag=True,
+    default=False,
+    help="Make up the values of the params having no default, from their type (xs:int, xs:date...) and name, \
+    rather than leaving them empty. The same --seed always gives the same values.",
+)
+@click.option(
+    "--combine",
+    help="Combine the candidate values of params given several times (-p sort:asc -p sort:desc), and the paths of \
+    each endpoint, rather than sending them all at once: product, pairwise or N-way (eg. 3-way). Pairwise covers \
+    every pair of values with far fewer requests than the product.",
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="Seed of the values made up by --fill-values and of --combine.")
+@click.argument("sources", nargs=-1)
+def batch(
+    base,
+    params,
+    use_file,
+    deny_methods,
+    only_path,
+    input_file,
+    jobs,
+    fetch_workers,
+    output_dir,
+    source_cache,
+    source_max_age,
+    fill_values,
+    combine,
+    seed,
+    sources,
+):
+    """
+    Expands the requests of many WADL sources at once. Sources are fetched
+    concurrently and parsed by a pool of processes. Every request is written as
+    a JSON line tagged with its source; sources failing to be fetched or parsed
+    get a line with their error instead, without stopping the rest. Exits with
+    status 1 if any source failed.
+    """
+    sources = list(sources)
+    if input_file is not None:
+        sources.extend(line.strip() for line in input_file if line.strip() and not line.startswith("#"))
+    if not sources:
+        raise click.UsageError("Give at least one source, or an --input-file.")
+
+    deny_methods = [x.upper().strip() for x in deny_methods.split(",") if x] if deny_methods else []
+    filters = WADLFilter(exclude_methods=deny_methods, include_paths=only_path)
+    cache = SourceCache(source_cache, max_age=source_max_age) if source_cache else None
+    combiner = build_combiner(combine, seed)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    failed = requests_count = 0
+    from wadalize.batch import run_batch
+
+    results = run_batch(
+        sources,
+        functools.partial(open_or_get, cache=cache),
+        jobs=jobs,
+        fetch_workers=fetch_workers,
+        base=base,
+        default_values=load_default_values(params, use_file, candidates=combiner is not None),
+        filters=filters,
+        values=value_provider(fill_values, seed),
+        combiner=combiner,
+    )
+    for result in results:
+        if result.error:
+            failed += 1
+            click.echo("ERROR: {}: {}".format(result.source, result.error), err=True)
+            lines = [json.dumps(dict(source=result.source, error=result.error))]
+        else:
+            requests_count += len(result.lines)
+            lines = result.lines
+
+        if output_dir:
+            with open(batch_output_path(output_dir, result.index, result.source), "w") as f:
+                f.writelines(line + "\n" for line in lines)
+        else:
+            click.echo("\n".join(lines))
+
+    click.echo("Sources: {}, failed: {}, requests: {}".format(len(sources), failed, requests_count), err=True)
+    if failed:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("-b", "--base", help="Base location to use when parsing the WADL file. Its path is the prefix of every route.")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", type=int, default=8080, show_default=True, help="Port to listen on.")
+@click.option("--latency", type=float, default=0.0, help="Seconds to wait before answering each request.")
+@click.option("--jitter", type=float, default=0.0, help="Max random seconds added to --latency.")
+@click.option("--error-rate", type=click.FloatRange(0, 1), default=0.0, help="Fraction of matched requests answered with --error-status.")
+@click.option("--error-status", type=int, default=500, show_default=True, help="Status code of the injected errors.")
+@click.option("--seed", type=int, help="Seed for the jitter and the error injection.")
+@click.argument("source")
+def serve(base, host, port, latency, jitter, error_rate, error_status, seed, source):
+    """
+    Starts a local mock HTTP server answering the routes of the WADL source,
+    with the media types declared by their response representations.
+    """
+    import asyncio
+
+    from wadalize.server import MockServer
+
+    wadl_string = load_source(source)
+
+    wh = WADLHandler(wadl_string, base=base)
+    server = MockServer(wh.endpoints(), latency=latency, jitter=jitter, error_rate=error_rate, error_status=error_status, seed=seed)
+    click.echo("Serving {} routes on http://{}:{}".format(len(server.routes), host, port), err=True)
+
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        click.echo("Served: {}".format(dict(server.served)), err=True)
+
+
+@cli.command()
+@click.option("-b", "--base", help="Base location to use when parsing the WADL file. Its path is the prefix of every endpoint.")
+@click.option("--top", type=int, default=10, show_default=True, help="Number of most frequent unmatched requests to list.")
+@click.argument("source")
+@click.argument("log", type=click.File("r", errors="replace"))
+def coverage(base, top, source, log):
+    """
+    Matches every request found in the LOG file (an access log, or simply
+    lines of METHOD URL; use - for stdin) to the endpoints of the WADL
+    source, and reports how many of them were hit.
+    """
+    wadl_string = load_source(source)
+
+    cov = WADLHandler(wadl_string, base=base).matcher().coverage(log)
+    click.echo(cov.summary(top=top))
 
 
 if __name__ == "__main__":
-    run()
+    cli()
@@ -0,0 +1,184 @@
+import asyncio
+import random
+from collections import Counter
+from http import HTTPStatus
+
+from .routes import RouteTrie
+
+
+def sample_body(media_type):
+    """Returns a minimal body for the given media type"""
+    media_type = (media_type or "").lower()
+    if "json" in media_type:
+        return b"{}"
+    if "xml" in media_type:
+        return b"<response/>"
+    return b""
+
+
+def build_response(status, media_type=None, body=b"", extra_headers=None):
+    """Returns a complete HTTP/1.1 response as bytes"""
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+
+    lines = ["HTTP/1.1 {} {}".format(status, reason)]
+    if media_type:
+        lines.append("Content-Type: {}".format(media_type))
+    lines.append("Content-Length: {}".format(len(body)))
+    for key, val in (extra_headers or {}).items():
+        lines.append("{}: {}".format(key, val))
+    lines.append("\r\n")
+    return "\r\n".join(lines).encode("latin-1") + body
+
+
+class EndpointResponses:
+    """
+    Responses prepared beforehand for a single WADLEndpoint, one per media
+    type of its response <representation> elements. The first one is used
+    unless the Accept header of the request names another one exactly.
+    """
+
+    __slots__ = ("default", "by_media_type", "endpoint")
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.by_media_type = {}
+        for media_type in endpoint.response_media_types:
+            if "*" in media_type or media_type in self.by_media_type:
+                # wildcards are not valid content types
+                continue
+            self.by_media_type[media_type] = build_response(200, media_type, sample_body(media_type))
+        self.default = next(iter(self.by_media_type.values()), build_response(200))
+
+    def get(self, accept=None):
+        if accept and accept in self.by_media_type:
+            return self.by_media_type[accept]
+        return self.default
+
+
+class MockServer:
+    """
+    asyncio HTTP/1.1 server answering the routes described by a WADL, for
+    testing clients and gateways without a real backend. Routes are compiled
+    into a wadalize.routes.RouteTrie and every response is built beforehand.
+
+    Requests matching a route get a 200 with the first media type declared by
+    its response <representation>, or the one asked with Accept. Paths not
+    in the WADL get a 404, and known paths with an unknown verb a 405.
+    Args:
+        endpoints (list of WADLEndpoint): Endpoints to serve. Their full path,
+            including the path of their base url, is the route.
+        latency (float): Seconds to wait before answering each request.
+        jitter (float): Max random seconds added to latency.
+        error_rate (float): Probability, between 0 and 1, to answer a matched
+            request with error_status instead.
+        error_status (int): Status code of the injected errors.
+        seed (int): Seed for the jitter and error injection.
+    Attributes:
+        served (Counter): Number of responses sent per status code.
+    """
+
+    def __init__(self, endpoints, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, seed=None):
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.routes = RouteTrie()
+        for endpoint in endpoints:
+            self.routes.add(endpoint.method, endpoint.full_path, EndpointResponses(endpoint))
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_response = build_response(error_status)
+        self.not_found_response = build_response(404)
+        self.bad_request_response = build_response(400, extra_headers={"Connection": "close"})
+        self.random = random.Random(seed)
+        self.served = Counter()
+
+    def respond(self, method, target, accept=None):
+        """Returns the response to send for the given request line data"""
+        # HEAD requests are answered like GET ones when not declared
+        verbs = [method, "GET"] if method.upper() == "HEAD" else [method]
+        resolved = self.routes.resolve(target, methods=verbs)
+        if resolved is None:
+            # some template may match the path for other verbs
+            resolved = self.routes.resolve(target)
+            if resolved is None:
+                self.served[404] += 1
+                return self.not_found_response
+            self.served[405] += 1
+            return build_response(405, extra_headers={"Allow": ", ".join(sorted(resolved[0]))})
+
+        methods, _ = resolved
+        responses = methods.get(method.upper()) or methods["GET"]
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.served[self.error_status] += 1
+            return self.error_response
+
+        self.served[200] += 1
+        return responses[0].get(accept)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self.bad_request_response)
+                    break
+
+                lines = head.split(b"\r\n")
+                parts = lines[0].split(b" ")
+                if len(parts) != 3:
+                    writer.write(self.bad_request_response)
+                    break
+                method, target, version = (x.decode("latin-1") for x in parts)
+
+                length = 0
+                accept = None
+                keep_alive = version != "HTTP/1.0"
+                for line in lines[1:]:
+                    name, _, value = line.partition(b":")
+                    name = name.strip().lower()
+                    if name == b"content-length":
+                        length = int(value)
+                    elif name == b"accept":
+                        accept = value.strip().decode("latin-1")
+                    elif name == b"connection":
+                        keep_alive = value.strip().lower() != b"close"
+                    elif name == b"transfer-encoding":
+                        # chunked uploads are not worth supporting here
+                        writer.write(self.bad_request_response)
+                        return
+                if length:
+                    await reader.readexactly(length)
+
+                response = self.respond(method, target, accept)
+                if self.latency or self.jitter:
+                    await asyncio.sleep(self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0))
+
+                if method == "HEAD":
+                    response = response[: response.index(b"\r\n\r\n") + 4]
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Starts listening and returns the asyncio.Server object"""
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve_forever(self, host="127.0.0.1", port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,129 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+
+CHUNK_SIZE = 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def decompress(content):
+    """Returns content decompressed when it's a gzip or zlib (deflate)
+    stream, as served by sources like application.wadl.gz, or content as is
+    otherwise"""
+    if content[:2] == GZIP_MAGIC:
+        return gzip.decompress(content)
+    # zlib streams start with 0x78, which no XML document does
+    if content[:1] == b"\x78":
+        try:
+            return zlib.decompress(content)
+        except zlib.error:
+            pass
+    return content
+
+
+class SourceCache:
+    """
+    Local cache of remote WADL sources, shared by every run using the same
+    directory. Each url is stored as a body file next to a small JSON file
+    holding its ETag and Last-Modified headers.
+
+    Sources fetched less than `max_age` seconds ago are read from disk without
+    touching the network. Older ones are fetched with If-None-Match and
+    If-Modified-Since headers, so unchanged sources cost a 304. Downloads are
+    streamed to disk in chunks and moved in place once complete, so runs
+    sharing the directory never see a partial file. Compressed sources are
+    stored compressed and decompressed when read.
+    Args:
+        directory (str): Where sources are stored, created if needed.
+        max_age (float): Seconds a stored source is used without asking the
+            server whether it changed.
+        clock (callable): Returns the current time in seconds.
+    Attributes:
+        hits (int): Sources read from disk without any request.
+        revalidated (int): Sources the server answered with a 304.
+        downloads (int): Sources downloaded.
+    """
+
+    def __init__(self, directory, max_age=0.0, clock=time.time):
+        self.directory = directory
+        self.max_age = max_age
+        self.clock = clock
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def paths(self, url):
+        """Returns the paths of the body and metadata files of url"""
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".body"), os.path.join(self.directory, name + ".json")
+
+    def _load_meta(self, url):
+        body_path, meta_path = self.paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def _write_atomic(self, path, chunks):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _read(self, url):
+        with open(self.paths(url)[0], "rb") as f:
+            return decompress(f.read())
+
+    def fetch(self, url, allow_redirects=False):
+        """Returns the content of url, from disk whenever possible. Just like
+        open_or_get, the status code of the response doesn't matter, though
+        only 200 responses are stored"""
+        body_path, meta_path = self.paths(url)
+        meta = self._load_meta(url)
+
+        if meta is not None and self.clock() - meta["fetched_at"] < self.max_age:
+            self.hits += 1
+            return self._read(url)
+
+        import requests
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        r = requests.get(url, verify=False, allow_redirects=allow_redirects, headers=headers, stream=True)
+        try:
+            if r.status_code == 304 and meta is not None:
+                self.revalidated += 1
+                meta["fetched_at"] = self.clock()
+                self._write_atomic(meta_path, [json.dumps(meta).encode()])
+                return self._read(url)
+
+            self.downloads += 1
+            if r.status_code != 200:
+                return decompress(r.content)
+
+            # iter_content already undoes any Content-Encoding
+            self._write_atomic(body_path, r.iter_content(CHUNK_SIZE))
+            meta = dict(url=url, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"), fetched_at=self.clock())
+            self._write_atomic(meta_path, [json.dumps(meta).encode()])
+        finally:
+            r.close()
+        return self._read(url)
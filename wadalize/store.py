@@ -0,0 +1,252 @@
+from array import array
+from urllib.parse import urlparse
+
+from .wadl import ReadOnlyDict
+from .wadl import WADLRequest
+
+
+class _Interned:
+    """Table of distinct values, each one given an int code in the order it
+    was first seen"""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value, key=None):
+        key = value if key is None else key
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Tables:
+    """Interned values shared by a RequestStore and its slices"""
+
+    __slots__ = ("buffer", "methods", "params", "headers", "endpoints")
+
+    def __init__(self):
+        self.buffer = bytearray()  # every location, utf-8 encoded, back to back
+        self.methods = _Interned()
+        self.params = _Interned()  # tuples of WADLParam objects
+        self.headers = _Interned()  # tuples of (name, value) pairs
+        self.endpoints = _Interned()  # (method_id, template, path) tuples
+
+
+def _param_key(params):
+    # values are lists when a query param is given many times
+    return tuple((p.name, p.type, p.style, tuple(p.value) if isinstance(p.value, list) else p.value) for p in params)
+
+
+class RequestStore:
+    """
+    Expanded requests stored column-wise, for expansions too big to hold as
+    WADLRequest and WADLParam objects. Every request takes a few ints: the
+    code of its HTTP verb, the offsets of its location in a single buffer,
+    and the ids of its params, headers and endpoint, which are shared by
+    every request having the same ones.
+
+    Iterating a store, or indexing it, gives RequestRow views, built on the
+    fly and holding nothing but their index. Slices, take() and filter()
+    return new stores sharing the interned values of this one.
+    Args:
+        default_values (dict): Dictionary the params values were taken from,
+            kept for parity with WADLRequest.
+    """
+
+    def __init__(self, default_values=None):
+        self.default_values = default_values if default_values is not None else {}
+        self._tables = _Tables()
+        self._starts = array("Q")
+        self._ends = array("Q")
+        self._methods = array("H")
+        self._params = array("I")
+        self._headers = array("I")
+        self._endpoints = array("I")
+
+    @classmethod
+    def from_requests(cls, wrs, default_values=None):
+        """Returns a store holding the given WADLRequest objects"""
+        store = cls(default_values=default_values)
+        for wr in wrs:
+            store.append(wr)
+        return store
+
+    def append(self, wr):
+        """Adds a WADLRequest, or anything looking like one"""
+        self.extend([wr.location], wr.method, params=wr.params, headers=wr.headers, method_id=wr.method_id, template=wr.template, path=wr.path)
+
+    def extend(self, locations, method, params=None, headers=None, method_id=None, template=None, path=None):
+        """
+        Adds one request for each of the given locations, all of them sharing
+        everything else.
+        Args:
+            locations (list of str): Complete url of each request.
+            method (str): HTTP verb of the requests.
+            params (list of WADLParam): Params of the requests.
+            headers (dict): Headers of the requests.
+            method_id (str): id attribute of their <method> element.
+            template (str): Url of the requests before any expansion. Each
+                location is its own template when not given.
+            path (str): Same as template, relative to the base url. The path
+                of the template when not given.
+        """
+        tables = self._tables
+        params = tuple(params or ())
+        headers = tuple(headers.items()) if headers else ()
+        method_code = tables.methods.code(method)
+        params_code = tables.params.code(params, key=_param_key(params))
+        headers_code = tables.headers.code(headers)
+        if template is not None:
+            endpoint = (method_id, template, path if path is not None else urlparse(template).path)
+
+        for location in locations:
+            encoded = location.encode()
+            self._starts.append(len(tables.buffer))
+            tables.buffer += encoded
+            self._ends.append(len(tables.buffer))
+            self._methods.append(method_code)
+            self._params.append(params_code)
+            self._headers.append(headers_code)
+            if template is None:
+                endpoint = (method_id, location, path if path is not None else urlparse(location).path)
+            self._endpoints.append(tables.endpoints.code(endpoint))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield RequestRow(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._view(self._columns(lambda column: column[index]))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RequestStore index out of range")
+        return RequestRow(self, index)
+
+    def take(self, indices):
+        """Returns a store with the requests at the given indices, in that
+        order"""
+        indices = list(indices)
+        # columns are memoryviews in stores read from a plan
+        return self._view(
+            self._columns(lambda column: array(column.format if isinstance(column, memoryview) else column.typecode, (column[i] for i in indices)))
+        )
+
+    def filter(self, predicate=None, methods=None, method_ids=None):
+        """
+        Returns a store with the requests matching every given condition.
+        Args:
+            predicate (callable): Called with the RequestRow of each request,
+                keeping it if it returns something truthy. This one builds a
+                view per request, the other conditions only look at codes.
+            methods (list of str): HTTP verbs to keep, case insensitive.
+            method_ids (list of str): id attributes of the <method> elements
+                to keep.
+        """
+        selected = range(len(self))
+        if methods is not None:
+            verbs = {method.upper() for method in methods}
+            codes = {code for code, method in enumerate(self._tables.methods.values) if method and method.upper() in verbs}
+            selected = [index for index in selected if self._methods[index] in codes]
+        if method_ids is not None:
+            method_ids = set(method_ids)
+            codes = {code for code, (method_id, *_) in enumerate(self._tables.endpoints.values) if method_id in method_ids}
+            selected = [index for index in selected if self._endpoints[index] in codes]
+        if predicate is not None:
+            selected = [index for index in selected if predicate(RequestRow(self, index))]
+        return self.take(selected)
+
+    def locations(self):
+        """Yields the location of every request, without building views"""
+        buffer = self._tables.buffer
+        for start, end in zip(self._starts, self._ends):
+            yield str(buffer[start:end], "utf-8")
+
+    def _columns(self, transform):
+        return [transform(column) for column in (self._starts, self._ends, self._methods, self._params, self._headers, self._endpoints)]
+
+    def _view(self, columns):
+        return RequestStore._from_columns(self._tables, columns, default_values=self.default_values)
+
+    @classmethod
+    def _from_columns(cls, tables, columns, default_values=None):
+        """Returns a store over the given tables and columns, as returned by
+        _columns"""
+        store = cls(default_values=default_values)
+        store._tables = tables
+        store._starts, store._ends, store._methods, store._params, store._headers, store._endpoints = columns
+        return store
+
+    def _location(self, index):
+        start, end = self._starts[index], self._ends[index]
+        return str(self._tables.buffer[start:end], "utf-8")
+
+
+class RequestRow:
+    """
+    View of a single request of a RequestStore, with the attributes and
+    methods of a WADLRequest, and like it, immutable. Nothing is copied until
+    read: location is decoded from the buffer and headers rebuilt on every
+    access, params is the tuple shared by every request having them.
+    replace() returns a WADLRequest.
+    Args:
+        store (RequestStore): Store holding the request.
+        index (int): Position of the request in the store.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def location(self):
+        return self._store._location(self._index)
+
+    @property
+    def method(self):
+        return self._store._tables.methods.values[self._store._methods[self._index]]
+
+    @property
+    def params(self):
+        return self._store._tables.params.values[self._store._params[self._index]]
+
+    @property
+    def headers(self):
+        return ReadOnlyDict(self._store._tables.headers.values[self._store._headers[self._index]])
+
+    @property
+    def method_id(self):
+        return self._store._tables.endpoints.values[self._store._endpoints[self._index]][0]
+
+    @property
+    def template(self):
+        return self._store._tables.endpoints.values[self._store._endpoints[self._index]][1]
+
+    @property
+    def path(self):
+        return self._store._tables.endpoints.values[self._store._endpoints[self._index]][2]
+
+    @property
+    def default_values(self):
+        return self._store.default_values
+
+    endpoint = WADLRequest.endpoint
+    route = WADLRequest.route
+    url = WADLRequest.url
+    dump_as_dict = WADLRequest.dump_as_dict
+    _split_params = WADLRequest._split_params
+    fingerprint = WADLRequest.fingerprint
+    dump_as_request = WADLRequest.dump_as_request
+    to_wire = WADLRequest.to_wire
+    replace = WADLRequest.replace
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from wadalize.batch import expand_source
+from wadalize.batch import run_batch
+from wadalize.filters import WADLFilter
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+SOURCES = {"a.wadl": WADL_SAMPLE, "b.wadl": WADL_SAMPLE.replace("https://example.com/api", "https://other.com"), "broken.wadl": "<application"}
+
+
+def fetch(source):
+    if source not in SOURCES:
+        raise IOError("No such file: {}".format(source))
+    return SOURCES[source]
+
+
+def test_expand_source():
+    lines = expand_source("a.wadl", WADL_SAMPLE, default_values={"action": "run"}, filters=WADLFilter(include_methods=["POST"]))
+    assert [json.loads(line) for line in lines] == [
+        dict(
+            source="a.wadl",
+            url="https://example.com/api/affiliate/v1/categories/tree",
+            location="https://example.com/api/affiliate/v1/categories/tree",
+            method="POST",
+            params=[],
+        )
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch(jobs):
+    sources = ["a.wadl", "missing.wadl", "broken.wadl", "b.wadl"]
+    results = sorted(run_batch(sources, fetch, jobs=jobs, fetch_workers=2, default_values={"action": "run"}), key=lambda r: r.index)
+
+    assert [(r.index, r.source) for r in results] == list(enumerate(sources))
+    assert [bool(r.error) for r in results] == [False, True, True, False]
+    assert results[1].error == "OSError: No such file: missing.wadl"
+    assert results[2].error.startswith("ValueError: XML syntax error")
+
+    urls = [json.loads(line)["url"] for line in results[3].lines]
+    assert urls[0] == "https://other.com/affiliate/v1/categories/tree"
+    assert len(results[0].lines) == len(results[3].lines)
+
+
+def test_run_batch_bounds_in_flight_sources():
+    fetched = []
+
+    def lazy_sources():
+        for num in range(50):
+            fetched.append(num)
+            yield "a.wadl"
+
+    results = run_batch(lazy_sources(), fetch, jobs=1, fetch_workers=2)
+    next(results)
+    # fetch_workers + 2 * jobs sources in flight, plus the one just refilled
+    assert len(fetched) <= 5
+    assert len(list(results)) == 49
@@ -0,0 +1,104 @@
+import pytest
+
+from wadalize import WADLRequest
+from wadalize.breaker import CircuitBreaker
+from wadalize.breaker import CLOSED
+from wadalize.breaker import HALF_OPEN
+from wadalize.breaker import OPEN
+from wadalize.runner import Runner
+from wadalize.transport import Transport
+from wadalize.transport import TransportResponse
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FailingTransport(Transport):
+    """Answers 503 for /slow/ urls unless healthy, 200 otherwise"""
+
+    def __init__(self):
+        self.sent = []
+        self.healthy = False
+
+    def send(self, wr, headers=None):
+        self.sent.append(wr.location)
+        if "/slow/" in wr.location and not self.healthy:
+            return TransportResponse(None, 10.0, 0, {}, "timeout")
+        return TransportResponse(200, 0.1, 0, {}, None)
+
+
+def requests_for(template, count):
+    return [WADLRequest(template.replace("{id}", str(num)), "GET", template=template) for num in range(count)]
+
+
+def test_state_changes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_requests=4, cooldown=30, clock=clock)
+    wr = WADLRequest("https://example.com/slow/1", "GET", template="https://example.com/slow/{id}")
+    ok = TransportResponse(200, 0.1, 0, {}, None)
+    ko = TransportResponse(500, 0.1, 0, {}, None)
+
+    for resp in (ok, ko, ok):
+        assert breaker.allow(wr)
+        breaker.record(wr, resp)
+    assert breaker.state(wr) == CLOSED
+
+    breaker.record(wr, ko)
+    assert breaker.state(wr) == OPEN
+    assert not breaker.allow(wr)
+
+    clock.now = 30
+    assert breaker.allow(wr)
+    assert breaker.state(wr) == HALF_OPEN
+    assert not breaker.allow(wr)  # a single probe at a time
+    breaker.record(wr, ko)
+    assert breaker.state(wr) == OPEN
+
+    clock.now = 60
+    assert breaker.allow(wr)
+    breaker.record(wr, ok)
+    assert breaker.state(wr) == CLOSED
+
+
+def test_runner_skips_open_circuits():
+    wrs = requests_for("https://example.com/slow/{id}", 20) + requests_for("https://example.com/fast/{id}", 5)
+    transport = FailingTransport()
+    runner = Runner(transport, breaker=CircuitBreaker(min_requests=3, clock=Clock()))
+
+    assert len(list(runner.run(wrs))) == 8
+    assert len(transport.sent) == 8
+    assert runner.stats.skipped == {"example.com https://example.com/slow/{id}": 17}
+    assert "Skipped by circuit breaker: 17" in runner.stats.summary()
+
+
+def test_runner_defers_open_circuits():
+    clock = Clock()
+    wrs = requests_for("https://example.com/slow/{id}", 10) + requests_for("https://example.com/fast/{id}", 5)
+    transport = FailingTransport()
+    breaker = CircuitBreaker(min_requests=3, cooldown=30, defer=True, clock=clock, sleep=clock.sleep)
+    runner = Runner(transport, breaker=breaker)
+
+    sent = []
+    for wr, _ in runner.run(wrs):
+        sent.append(wr.location)
+        if len(sent) == 8:
+            # the backend recovers once the other requests are done
+            transport.healthy = True
+
+    assert len(sent) == 15
+    assert sent[3:8] == ["https://example.com/fast/{}".format(num) for num in range(5)]
+    assert clock.now == 30
+    assert not runner.stats.skipped
+
+
+def test_wrong_ratio():
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_ratio=0)
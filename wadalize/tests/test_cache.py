@@ -0,0 +1,137 @@
+from wadalize import WADLRequest
+from wadalize.cache import CachedTransport
+from wadalize.cache import ResponseCache
+from wadalize.runner import Runner
+from wadalize.scheduler import LatencyHistory
+from wadalize.transport import Transport
+from wadalize.transport import TransportResponse
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ETagTransport(Transport):
+    """Answers 200 with an ETag, or 304 when sent a matching If-None-Match"""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.sent = []
+
+    def send(self, wr, headers=None):
+        conditional = (wr.headers or {}).get("If-None-Match")
+        self.sent.append((wr.method, wr.location, conditional))
+        if conditional == self.etag:
+            return TransportResponse(304, 0.1, 0, {"ETag": self.etag}, None)
+        return TransportResponse(200, 0.1, 42, {"ETag": self.etag, "Content-Type": "application/json"}, None)
+
+
+def make_requests():
+    return [
+        WADLRequest("https://example.com/api/items", "GET"),
+        WADLRequest("https://example.com/api/users", "GET"),
+        WADLRequest("https://example.com/api/items", "POST"),
+    ]
+
+
+def test_hits_and_misses(tmp_path):
+    clock = Clock()
+    transport = ETagTransport()
+
+    with ResponseCache(str(tmp_path / "cache.db"), ttl=60, clock=clock) as cache:
+        runner = Runner(transport, cache=cache)
+        assert [resp.status for _, resp in runner.run(make_requests())] == [200, 200, 200]
+        assert (runner.stats.cache_hits, runner.stats.cache_revalidated, runner.stats.cache_misses) == (0, 0, 2)
+
+        # POST requests are never answered from the cache
+        wrs = make_requests()
+        results = list(runner.run(wrs))
+        assert len(transport.sent) == 4
+        assert sorted(wr.method for wr, _ in results) == ["GET", "GET", "POST"]
+        assert all(resp.status == 200 and resp.size == 42 for _, resp in results)
+        assert (runner.stats.cache_hits, runner.stats.cache_misses) == (2, 0)
+        assert "Cache: 2 hits, 0 revalidated, 0 misses" in runner.stats.summary()
+        assert [resp.cached for wr, resp in results if wr.method == "GET"] == [True, True]
+
+
+def test_hits_not_in_history(tmp_path):
+    history = LatencyHistory()
+    with ResponseCache(str(tmp_path / "cache.db"), ttl=60, clock=Clock()) as cache:
+        runner = Runner(ETagTransport(), cache=cache, history=history)
+        list(runner.run(make_requests()[:1]))
+        before = dict(history.latencies)
+        list(runner.run(make_requests()[:1]))
+        assert runner.stats.cache_hits == 1
+        assert history.latencies == before
+
+
+def test_revalidation(tmp_path):
+    clock = Clock()
+    transport = ETagTransport()
+    path = str(tmp_path / "cache.db")
+
+    with ResponseCache(path, ttl=60, clock=clock) as cache:
+        list(Runner(transport, cache=cache).run(make_requests()[:1]))
+
+    # Entries survive across runs, stale ones are revalidated
+    clock.now += 120
+    with ResponseCache(path, ttl=60, clock=clock) as cache:
+        runner = Runner(transport, cache=cache)
+        wr = make_requests()[0]
+        assert [resp.status for _, resp in runner.run([wr])] == [200]
+        assert transport.sent[-1] == ("GET", "https://example.com/api/items", '"v1"')
+        assert runner.stats.cache_revalidated == 1
+        # the conditional header is sent on a copy of the request
+        assert not wr.headers
+
+        # fresh again after the 304
+        list(runner.run(make_requests()[:1]))
+        assert runner.stats.cache_hits == 1
+        assert len(transport.sent) == 2
+
+        # a changed resource is stored again
+        transport.etag = '"v2"'
+        clock.now += 120
+        list(runner.run(make_requests()[:1]))
+        assert runner.stats.cache_misses == 1
+        assert cache.get(cache.key(wr)).etag == '"v2"'
+
+
+def test_cache_key_headers(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db")) as cache:
+        wr = WADLRequest("https://example.com/api/items", "GET")
+        assert cache.key(wr) == cache.key(WADLRequest("https://EXAMPLE.com:443/api//items", "GET"))
+        assert cache.key(wr) != cache.key(wr, {"Authorization": "Bearer x"})
+
+
+def test_uncacheable_responses(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db")) as cache:
+        cache.put("a", TransportResponse(500, 0.1, 0, {}, None))
+        cache.put("b", TransportResponse(None, 0.1, 0, {}, "timeout"))
+        cache.put("c", TransportResponse(200, 0.1, 0, {"Cache-Control": "no-store"}, None))
+        assert cache.get("a") is None and cache.get("b") is None and cache.get("c") is None
+
+
+def test_eviction(tmp_path):
+    clock = Clock()
+    with ResponseCache(str(tmp_path / "cache.db"), max_bytes=300, clock=clock) as cache:
+        for num in range(10):
+            clock.now += 1
+            cache.put("key{}".format(num), TransportResponse(200, 0.1, 0, {"X-Padding": "x" * 50}, None))
+        assert cache.total_bytes <= 300
+        assert cache.evicted > 0
+        assert cache.get("key0") is None
+        assert cache.get("key9") is not None
+
+
+def test_cached_transport_send(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db")) as cache:
+        transport = CachedTransport(ETagTransport(), cache)
+        wr = make_requests()[0]
+        assert transport.send(wr).status == 200
+        assert transport.send(wr).elapsed == 0.0
+        assert len(transport.transport.sent) == 1
@@ -0,0 +1,76 @@
+import itertools
+
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.combinations import Combiner
+from wadalize.combinations import covering_array
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+def covers(rows, domains, strength):
+    for combo in itertools.combinations(range(len(domains)), strength):
+        seen = {tuple(row[i] for i in combo) for row in rows}
+        if seen != set(itertools.product(*(domains[i] for i in combo))):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("strength", [1, 2, 3])
+def test_covering_array(strength):
+    domains = [list(range(4)), list("abc"), [True, False], list("xyz"), list(range(5))]
+    rows = list(covering_array(domains, strength=strength))
+    assert covers(rows, domains, strength)
+    assert len(rows) < len(list(itertools.product(*domains)))
+    assert rows == list(covering_array(domains, strength=strength))
+
+
+def test_pairwise_is_small():
+    domains = [list(range(5))] * 10
+    rows = list(covering_array(domains))
+    assert covers(rows, domains, 2)
+    assert len(rows) < 60
+
+
+def test_covering_array_edges():
+    assert list(covering_array([[1, 2], [3]], strength=2)) == [(1, 3), (2, 3)]
+    assert list(covering_array([[1, 2], []])) == []
+    with pytest.raises(ValueError, match=r"strength"):
+        list(covering_array([[1]], strength=0))
+
+
+@pytest.mark.parametrize("strength", [1, 2, 3])
+def test_estimate_bounds_covering_arrays(strength):
+    combiner = Combiner(strength=strength)
+    for sizes in ([5] * 6, [3, 2, 2], [4, 3, 2, 3, 5], [20, 3, 3, 2], [2, 2]):
+        assert combiner.estimate(sizes) >= len(list(combiner.combine([list(range(size)) for size in sizes])))
+    assert combiner.estimate([3, 0, 2]) == 0
+    assert Combiner(strength=None).estimate([3, 4, 2]) == 24
+
+
+def test_combiner_from_string():
+    assert Combiner.from_string("product").strength is None
+    assert Combiner.from_string("pairwise").strength == 2
+    assert Combiner.from_string("3-way", seed=4).strength == 3
+    with pytest.raises(ValueError, match=r"product, pairwise or N-way"):
+        Combiner.from_string("triples")
+
+
+def test_handler_combines_candidates():
+    default_values = {"action": ["create", "delete", "view"], "resource": ["r1", "r2"], "domain": ["d1", "d2"]}
+    plain = WADLHandler(WADL_SAMPLE, default_values=default_values).requests
+    product = WADLHandler(WADL_SAMPLE, default_values=default_values, combiner=Combiner(strength=None)).requests
+    pairwise = WADLHandler(WADL_SAMPLE, default_values=default_values, combiner=Combiner()).requests
+
+    # without a combiner, lists are repeated query params
+    assert "resource=r1&resource=r2" in plain[-1].url
+    assert len(product) == 2 + 12
+    assert 2 + 6 <= len(pairwise) < len(product)
+
+    access = [wr for wr in pairwise if wr.method_id == "getResourceAccessExt"]
+    assert {wr.location.rsplit("/", 1)[-1] for wr in access} == {"create", "delete", "view"}
+    assert all(wr.template == "https://example.com/api/access/{action}" for wr in access)
+    assert all(len(wr.dump_as_dict()["params"]) == 4 for wr in access)
+
+    store = WADLHandler(WADL_SAMPLE, default_values=default_values, combiner=Combiner()).request_store()
+    assert [row.url for row in store] == [wr.url for wr in pairwise]
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.compare import compare_runs
+from wadalize.compare import mann_whitney
+from wadalize.compare import nearest_rank
+from wadalize.results import ResultsWriter
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+from wadalize.transport import TransportResponse
+
+
+def record_run(path, latencies, base=None):
+    """Records a run where the n-th request of the sample gets latencies[n]"""
+    wrs = WADLHandler(WADL_SAMPLE, base=base, default_values={"action": "run"}).requests
+    with ResultsWriter(path) as results:
+        for wr, elapsed in zip(wrs, latencies):
+            for seconds in elapsed:
+                results.record(wr, TransportResponse(200, seconds, 0, {}, None))
+        results.record(wrs[0], TransportResponse(None, None, None, {}, "timeout"))
+
+
+def test_nearest_rank():
+    values = list(range(1, 101))
+    assert [nearest_rank(values, q) for q in (50, 90, 99)] == [50, 90, 99]
+    assert nearest_rank([3.0], 99) == 3.0
+
+
+def test_mann_whitney():
+    rng = random.Random(1)
+    same = sorted(rng.gauss(1, 0.1) for _ in range(50)), sorted(rng.gauss(1, 0.1) for _ in range(50))
+    assert mann_whitney(*same) > 0.05
+    assert mann_whitney(same[0], sorted(x + 0.2 for x in same[1])) < 0.001
+    assert mann_whitney([1.0] * 5, [1.0] * 5) == 1.0
+
+
+def test_compare_runs(tmp_path):
+    rng = random.Random(2)
+    path = str(tmp_path / "results.sqlite")
+    base = [[rng.uniform(0.1, 0.2) for _ in range(40)] for _ in range(3)]
+    record_run(path, base)
+    # the first endpoint gets 50% slower, the second doesn't change, the
+    # third too few requests to tell
+    record_run(path, [[x * 1.5 for x in base[0]], base[1], [x * 3 for x in base[2][:3]]])
+
+    comparison = compare_runs(path, path, run_a=1, run_b=2)
+    assert len(comparison.deltas) == 3
+    assert comparison.only_a == comparison.only_b == 0
+    assert [d.method_id for d in comparison.regressions] == ["getCategoryTree"]
+    assert comparison.regressions[0].change == pytest.approx(0.5)
+    assert comparison.regressions[0].samples_a == 40
+    assert "Regressions: 1" in comparison.summary()
+
+    assert compare_runs(path, path, run_a=2, run_b=1).regressions == []
+    with pytest.raises(ValueError, match=r"Percentile"):
+        compare_runs(path, path, percentile=75)
+
+
+def test_compare_runs_alignment(tmp_path):
+    first, second = str(tmp_path / "a.sqlite"), str(tmp_path / "b.sqlite")
+    record_run(first, [[0.1] * 5, [0.1] * 5])
+    record_run(second, [[0.1] * 5, [], [0.1] * 5])
+    comparison = compare_runs(first, second)
+    assert (len(comparison.deltas), comparison.only_a, comparison.only_b) == (1, 1, 1)
+
+    with pytest.raises(ValueError, match=r"not a results database"):
+        compare_runs(first, str(tmp_path / "missing.sqlite"))
+
+
+def test_compare_runs_other_base(tmp_path):
+    first, second = str(tmp_path / "a.sqlite"), str(tmp_path / "b.sqlite")
+    record_run(first, [[0.1] * 5] * 3)
+    record_run(second, [[0.1] * 5] * 3, base="http://staging.example.com:8080/v2/")
+    comparison = compare_runs(first, second)
+    assert (len(comparison.deltas), comparison.only_a, comparison.only_b) == (3, 0, 0)
+    assert comparison.deltas[0].endpoint == "GET /access/{action}"
+
+
+def test_compare_runs_skips_cached(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    record_run(path, [[0.1] * 10])
+    wr = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).requests[0]
+    with ResultsWriter(path) as results:
+        for _ in range(10):
+            results.record(wr, TransportResponse(200, 0.2, 0, {}, None))
+            results.record(wr, TransportResponse(200, 0.0, 0, {}, None, cached=True))
+
+    delta = compare_runs(path, path, run_a=1, run_b=2).deltas[0]
+    assert delta.samples_b == 10
+    assert delta.percentiles_b[50] == 0.2
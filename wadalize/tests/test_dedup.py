@@ -0,0 +1,38 @@
+from wadalize import WADLHandler
+from wadalize import WADLRequest
+from wadalize.dedup import Deduplicator
+from wadalize.scripts.tests.test_wadalize_representation import WADL_SAMPLE
+
+
+def test_dedup_representations():
+    wh = WADLHandler(WADL_SAMPLE)
+    dedup = Deduplicator()
+
+    unique = list(dedup.filter(wh.requests))
+    assert dedup.seen == 9
+    assert dedup.collapsed == 4
+    assert [(wr.method, wr.headers["Content-Type"]) for wr in unique] == [
+        ("POST", "application/x-www-form-urlencoded"),
+        ("POST", "application/json"),
+        ("OPTIONS", "application/x-www-form-urlencoded"),
+        ("POST", "text/plain"),
+        ("POST", "application/x-www-form-urlencoded"),
+    ]
+
+
+def test_dedup_selected_headers():
+    dedup = Deduplicator(headers=["content-type"])
+    assert len(list(dedup.filter(WADLHandler(WADL_SAMPLE).requests))) == 9
+    assert dedup.collapsed == 0
+
+
+def test_dedup_normalized_urls():
+    wrs = [
+        WADLRequest("https://Example.com:443/api//items", "get"),
+        WADLRequest("https://example.com/api/items", "GET"),
+        WADLRequest("http://example.com/api/items", "GET"),
+        WADLRequest("https://example.com/api/items", "POST"),
+    ]
+    dedup = Deduplicator()
+    assert list(dedup.filter(wrs)) == [wrs[0], wrs[2], wrs[3]]
+    assert dedup.collapsed == 1
@@ -0,0 +1,62 @@
+from io import BytesIO
+
+from wadalize import WADLHandler
+from wadalize.diff import EndpointKey
+from wadalize.diff import iter_fingerprints
+from wadalize.diff import WADLDiff
+from wadalize.filters import WADLFilter
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+def as_file(wadl_string):
+    return BytesIO(wadl_string.encode())
+
+
+def test_iter_fingerprints_keys():
+    keys = [key for key, _ in iter_fingerprints(as_file(WADL_SAMPLE))]
+    assert keys == [
+        EndpointKey("POST", "/affiliate/v1/categories/tree", "getCategoryTree"),
+        EndpointKey("GET", "/affiliate/v1/search/items", "getItems"),
+        EndpointKey("GET", "/access/{action}", "getResourceAccessExt"),
+    ]
+    # Same keys as the endpoints found by WADLHandler
+    assert keys == [(e.method.upper(), e.path, e.method_id) for e in WADLHandler(WADL_SAMPLE).endpoints()]
+
+
+def test_fingerprints_ignore_base_and_formatting():
+    other = WADL_SAMPLE.replace("https://example.com/api", "http://localhost:8080").replace("    ", "\t")
+    assert list(iter_fingerprints(as_file(WADL_SAMPLE))) == list(iter_fingerprints(as_file(other)))
+
+
+def test_diff():
+    new = (
+        WADL_SAMPLE
+        # changed: a param of the resource of getResourceAccessExt
+        .replace('name="action"\n                style="template" type="xs:string"', 'name="action"\n                style="template" type="xs:int"')
+        # changed: a representation of getCategoryTree
+        .replace('<representation mediaType="application/json"/>', '<representation mediaType="text/xml"/>', 1)
+        # removed getItems, added listItems
+        .replace('id="getItems"', 'id="listItems"')
+    )
+    diff = WADLDiff(as_file(WADL_SAMPLE), as_file(new))
+
+    assert diff.added == [EndpointKey("GET", "/affiliate/v1/search/items", "listItems")]
+    assert diff.removed == [EndpointKey("GET", "/affiliate/v1/search/items", "getItems")]
+    assert diff.changed == [
+        EndpointKey("POST", "/affiliate/v1/categories/tree", "getCategoryTree"),
+        EndpointKey("GET", "/access/{action}", "getResourceAccessExt"),
+    ]
+    assert diff.unchanged == 0
+    assert diff.summary().splitlines()[0] == "+ GET /affiliate/v1/search/items (listItems)"
+    assert diff.summary().splitlines()[-1] == "Added: 1, removed: 1, changed: 2, unchanged: 0"
+
+    # Only the modified endpoints are compiled into requests
+    wh = WADLHandler(new, filters=WADLFilter(include_endpoints=diff.modified))
+    assert [e.method_id for e in wh.endpoints()] == ["getCategoryTree", "listItems", "getResourceAccessExt"]
+
+
+def test_diff_same_document():
+    diff = WADLDiff(as_file(WADL_SAMPLE), as_file(WADL_SAMPLE))
+    assert diff.modified == []
+    assert diff.removed == []
+    assert diff.unchanged == 3
@@ -0,0 +1,98 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from wadalize import WADLRequest
+from wadalize.engine import FastEngine
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen = []
+
+    def do_GET(self):
+        Handler.seen.append((self.command, self.path))
+        if self.path.startswith("/slow"):
+            time.sleep(1)
+        body = "yolo {}".format(self.path).encode()
+        self.send_response(404 if self.path.startswith("/missing") else 200)
+        if self.path.startswith("/chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"4\r\nyolo\r\n0\r\n\r\n")
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def do_HEAD(self):
+        Handler.seen.append((self.command, self.path))
+        self.send_response(200)
+        self.send_header("Content-Length", "42")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("pipeline", [1, 8])
+def test_run_keeps_order(server, pipeline):
+    wrs = [WADLRequest("{}/items/{}".format(server, num), "GET") for num in range(20)]
+    wrs.append(WADLRequest("{}/missing".format(server), "GET"))
+    wrs.append(WADLRequest("{}/chunked".format(server), "POST", headers={"Content-Type": "text/plain"}))
+    wrs.append(WADLRequest("{}/head".format(server), "HEAD"))
+
+    engine = FastEngine(connections=2, pipeline=pipeline, read_body=True)
+    responses = engine.run((wr.location, wr.to_wire()) for wr in wrs)
+
+    assert len(responses) == len(wrs) == len(Handler.seen)
+    for num, resp in enumerate(responses[:20]):
+        assert resp.error is None
+        assert resp.status == 200
+        assert resp.body == "yolo /items/{}".format(num).encode()
+    assert responses[20].status == 404
+    assert responses[21].body == b"yolo" and responses[21].size == 4
+    assert responses[22].status == 200 and responses[22].size == 0
+
+
+def test_run_discards_body_by_default(server):
+    resp = FastEngine().run([(server, WADLRequest(server + "/a", "GET").to_wire())])[0]
+    assert resp.status == 200
+    assert resp.body is None
+    assert resp.size == len(b"yolo /a")
+    assert resp.headers["content-length"] == str(resp.size)
+
+
+def test_run_timeout_only_fails_request_in_flight(server):
+    wrs = [WADLRequest("{}/{}".format(server, path), "GET") for path in ("a", "slow", "b", "c")]
+    responses = FastEngine(connections=1, pipeline=4, timeout=0.3).run((wr.location, wr.to_wire()) for wr in wrs)
+
+    assert [resp.error for resp in responses] == [None, "timeout", None, None]
+    assert [resp.status for resp in responses] == [200, None, 200, 200]
+
+
+def test_run_connection_error():
+    resp = FastEngine(timeout=1).run([("http://127.0.0.1:1", b"GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n")])[0]
+    assert resp.status is None
+    assert resp.error.startswith("connection error")
+
+
+def test_wrong_settings():
+    with pytest.raises(ValueError):
+        FastEngine(pipeline=0)
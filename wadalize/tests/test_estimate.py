@@ -0,0 +1,42 @@
+from wadalize import WADLHandler
+from wadalize.combinations import Combiner
+from wadalize.filters import WADLFilter
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+REGEX_SAMPLE = WADL_SAMPLE.replace('<resource path="/search/items">', '<resource path="/search/{kind: (a|b|c)}/{n: [0-9]}">')
+
+
+def test_estimate_matches_expansion():
+    default_values = {"action": ["create", "delete", "view"], "resource": ["r1", "r2"], "domain": ["d1", "d2"]}
+    for combiner in (None, Combiner(strength=None)):
+        wh = WADLHandler(REGEX_SAMPLE, default_values=default_values, combiner=combiner)
+        estimate = wh.estimate()
+        assert estimate.total == len(WADLHandler(REGEX_SAMPLE, default_values=default_values, combiner=combiner).requests)
+        assert estimate.exact
+
+    # covering arrays are only bounded
+    estimate = WADLHandler(REGEX_SAMPLE, default_values=default_values, combiner=Combiner()).estimate()
+    assert estimate.total >= len(WADLHandler(REGEX_SAMPLE, default_values=default_values, combiner=Combiner()).requests)
+    assert not estimate.exact
+    assert estimate.summary().startswith("Requests: <= {} (bound) ".format(estimate.total))
+
+    by_id = {m.method_id: m for m in WADLHandler(REGEX_SAMPLE, default_values={"action": "run"}).estimate().methods}
+    assert by_id["getItems"].paths == 3
+    assert by_id["getItems"].template == "https://example.com/api/affiliate/v1/search/{kind: (a|b|c)}/{n: [0-9]}"
+    assert by_id["getCategoryTree"].representations == 1
+
+
+def test_estimate_without_expanding():
+    sample = WADL_SAMPLE.replace('<resource path="/search/items">', '<resource path="/search/{n: ([0-9][0-9][0-9]|none)}/{m: (a|b)}">')
+    estimate = WADLHandler(sample, default_values={"action": "run"}).estimate(threshold=1000)
+    assert estimate.total == 2 + 1001 * 2
+    assert [m.method_id for m in estimate.flagged] == ["getItems"]
+    assert estimate.by_host() == {"example.com": estimate.total}
+    assert estimate.by_verb() == {"GET": 1 + 2002, "POST": 1}
+    assert "Over 1000 requests:" in estimate.summary()
+
+
+def test_estimate_filters():
+    estimate = WADLHandler(REGEX_SAMPLE, filters=WADLFilter(exclude_methods=["POST"])).estimate()
+    assert estimate.by_verb() == {"GET": 4}
+    assert estimate.flagged == []
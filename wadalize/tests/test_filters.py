@@ -0,0 +1,52 @@
+import mock
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.filters import compile_path_pattern
+from wadalize.filters import WADLFilter
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+@pytest.mark.parametrize(
+    "pattern,path,expected",
+    [
+        ("/access/*", "/access/{action}", True),
+        ("/access/{action}", "/access/{action}", True),
+        ("/access/?", "/access/{action}", False),
+        ("*/items", "/affiliate/v1/search/items", True),
+        ("/affiliate", "/affiliate/v1/search/items", False),
+        ("re:^/affiliate/", "/affiliate/v1/search/items", True),
+        ("re:search", "/affiliate/v1/search/items", True),
+    ],
+)
+def test_compile_path_pattern(pattern, path, expected):
+    assert bool(compile_path_pattern(pattern).search(path)) == expected
+
+
+@pytest.mark.parametrize(
+    "filters,expected",
+    [
+        (WADLFilter(), ["getCategoryTree", "getItems", "getResourceAccessExt"]),
+        (WADLFilter(exclude_methods=["post"]), ["getItems", "getResourceAccessExt"]),
+        (WADLFilter(include_methods=["POST"]), ["getCategoryTree"]),
+        (WADLFilter(include_paths=["/affiliate/*"]), ["getCategoryTree", "getItems"]),
+        (WADLFilter(include_paths=["/api/access/*"]), ["getResourceAccessExt"]),
+        (WADLFilter(exclude_paths=["re:tree$"]), ["getItems", "getResourceAccessExt"]),
+        (WADLFilter(include_ids=["getItems"]), ["getItems"]),
+        (WADLFilter(exclude_ids=["getItems"]), ["getCategoryTree", "getResourceAccessExt"]),
+        (WADLFilter(include_styles=["template"]), ["getResourceAccessExt"]),
+        (WADLFilter(exclude_styles=["template"]), ["getCategoryTree", "getItems"]),
+        (WADLFilter(include_methods=["GET"], exclude_paths=["/access/*"]), ["getItems"]),
+    ],
+)
+def test_filtered_requests(filters, expected):
+    wh = WADLHandler(WADL_SAMPLE, filters=filters)
+    assert [e.method_id for e in wh.endpoints()] == expected
+    assert len(wh.requests) == len(expected)
+
+
+def test_excluded_methods_are_not_expanded():
+    wh = WADLHandler(WADL_SAMPLE, filters=WADLFilter(include_paths=["/access/*"]))
+    with mock.patch.object(WADLHandler, "param_url", return_value=["https://example.com/api/access/x"]) as param_url:
+        assert len(wh.requests) == 1
+    assert param_url.call_count == 1
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.plan import write_plan
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+# Dependencies only imported on the code paths needing them
+HEAVY_MODULES = ("requests", "urllib3", "pydantic", "furl", "exrex", "asyncio", "lxml")
+
+# Generous on purpose: without the heavy dependencies the CLI module takes a
+# fraction of it, with them it takes several times more
+IMPORT_BUDGET = 0.25
+
+
+def importtime(module):
+    """Returns a dict of every module imported by `import module` in a fresh
+    interpreter, mapped to its cumulative import time in seconds"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module], capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", ["wadalize", "wadalize.scripts.wadalize"])
+def test_import_is_light(module):
+    times = importtime(module)
+    assert not {name.split(".")[0] for name in times} & set(HEAVY_MODULES)
+    assert times[module] < IMPORT_BUDGET
+
+
+def test_parse_without_regexes_nor_models():
+    code = "import sys; from wadalize import WADLHandler; WADLHandler(sys.stdin.read()).requests; print(' '.join(m for m in {} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code.format(HEAVY_MODULES)], input=WADL_SAMPLE, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["furl", "lxml"]
+
+
+def test_plan_without_parsing(tmp_path):
+    path = str(tmp_path / "plan.bin")
+    write_plan(path, WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).requests)
+
+    code = "import sys; from wadalize.plan import PlanFile; [r.to_wire() for r in PlanFile(sys.argv[1])]; print(' '.join(sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code, path], capture_output=True, text=True, check=True).stdout
+    assert not {"lxml", "exrex", "furl"} & set(out.split())
@@ -0,0 +1,48 @@
+from wadalize import WADLHandler
+from wadalize.matcher import parse_log_line
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+LOG = """127.0.0.1 - - [10/Oct/2023:13:55:36 -0700] "GET /api/access/create?domain=x HTTP/1.1" 200 2326
+127.0.0.1 - - [10/Oct/2023:13:55:37 -0700] "GET /api/access/delete HTTP/1.1" 200 2326
+127.0.0.1 - - [10/Oct/2023:13:55:38 -0700] "POST /api/affiliate/v1/categories/tree HTTP/1.1" 201 12
+127.0.0.1 - - [10/Oct/2023:13:55:39 -0700] "DELETE /api/access/create HTTP/1.1" 405 0
+GET https://example.com/api/yolo
+not a request at all
+"""
+
+
+def test_parse_log_line():
+    assert parse_log_line('1.2.3.4 - - [x] "PUT /a/b?c=d HTTP/1.1" 200 1') == ("PUT", "/a/b?c=d")
+    assert parse_log_line("METHOD: GET, URL: https://example.com/a") is None
+    assert parse_log_line("GET https://example.com/a") == ("GET", "https://example.com/a")
+
+
+def test_match():
+    matcher = WADLHandler(WADL_SAMPLE).matcher()
+
+    m = matcher.match("get", "https://other.example.com/api/access/create?resource=1")
+    assert m.method_id == "getResourceAccessExt"
+    assert m.variables == {"action": "create"}
+    assert m.endpoint.path == "/access/{action}"
+
+    assert matcher.match("POST", "/api/affiliate/v1/categories/tree").method_id == "getCategoryTree"
+    assert matcher.match("GET", "/api/affiliate/v1/categories/tree") is None
+    assert matcher.match("GET", "/access/create") is None
+
+
+def test_match_rebase():
+    matcher = WADLHandler(WADL_SAMPLE, base="/").matcher()
+    assert matcher.match("GET", "/access/create").variables == {"action": "create"}
+
+
+def test_coverage():
+    cov = WADLHandler(WADL_SAMPLE).matcher().coverage(LOG.splitlines())
+
+    assert cov.lines == 6
+    assert cov.unparsed == 1
+    assert cov.matched == 3
+    assert cov.unmatched == {"DELETE /api/access/create": 1, "GET /api/yolo": 1}
+    assert [e.method_id for e in cov.missing] == ["getItems"]
+    assert cov.ratio == 2 / 3
+    assert "Endpoints hit: 2 of 3 (66.7%)" in cov.summary()
@@ -0,0 +1,58 @@
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.plan import is_plan
+from wadalize.plan import PlanFile
+from wadalize.plan import write_plan
+from wadalize.scripts.tests.test_wadalize_representation import WADL_SAMPLE
+
+
+def test_plan_roundtrip(tmp_path):
+    path = str(tmp_path / "plan.bin")
+    wrs = WADLHandler(WADL_SAMPLE, default_values={"id": "1"}).requests
+    assert write_plan(path, wrs, shards=4) == len(wrs)
+    assert is_plan(path)
+
+    with PlanFile(path) as plan:
+        assert len(plan) == len(wrs) and plan.shards == 4
+        for wr, row in zip(wrs, plan):
+            assert (row.location, row.method, row.headers, row.method_id, row.template, row.path) == (
+                wr.location,
+                wr.method,
+                wr.headers,
+                wr.method_id,
+                wr.template,
+                wr.path,
+            )
+            assert row.to_wire() == wr.to_wire()
+            assert [p.dump_as_dict() for p in row.params] == [p.dump_as_dict() for p in wr.params]
+        assert plan[-1].location == wrs[-1].location
+
+
+def test_plan_is_stable(tmp_path):
+    first, second = str(tmp_path / "first.bin"), str(tmp_path / "second.bin")
+    write_plan(first, WADLHandler(WADL_SAMPLE).request_store())
+    write_plan(second, WADLHandler(WADL_SAMPLE).requests)
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_plan_shards(tmp_path):
+    path = str(tmp_path / "plan.bin")
+    write_plan(path, WADLHandler(WADL_SAMPLE).request_store(), shards=4)
+
+    with PlanFile(path) as plan:
+        ranges = [plan.shard_range(index) for index in range(4)]
+        assert [i for r in ranges for i in r] == list(range(len(plan)))
+        assert [row.location for row in plan.shard(1)] == [plan[i].location for i in ranges[1]]
+        assert len(plan.shard(0, shards=1)) == len(plan)
+        with pytest.raises(ValueError):
+            plan.shard(4)
+
+
+def test_not_a_plan(tmp_path):
+    path = tmp_path / "plan.bin"
+    path.write_bytes(b"<application/>" * 4)
+    assert not is_plan(str(path))
+    with pytest.raises(ValueError):
+        PlanFile(str(path))
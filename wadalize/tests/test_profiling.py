@@ -0,0 +1,71 @@
+from wadalize import WADLHandler
+from wadalize.profiling import NULL_PROFILER
+from wadalize.profiling import Profiler
+from wadalize.runner import Runner
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+from wadalize.transport import MockTransport
+
+
+def test_profiler_stages():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.stage("a"):
+            with profiler.stage("b"):
+                pass
+
+    assert list(profiler.stages) == ["a", "b"]
+    assert profiler.stages["a"].calls == 3
+    assert profiler.stages["a"].seconds >= profiler.stages["b"].seconds
+    assert profiler.dump_as_dict()["b"]["calls"] == 3
+    assert profiler.summary().splitlines()[1].startswith("a ")
+
+
+def test_profiler_memory():
+    profiler = Profiler(memory=True)
+    with profiler.stage("alloc"):
+        kept = [object() for _ in range(1000)]
+    assert profiler.stages["alloc"].allocated > 1000 * 16
+    assert "KiB" in profiler.summary()
+    del kept
+
+
+def test_profiler_peak():
+    profiler = Profiler(memory=True)
+    with profiler.stage("outer"):
+        with profiler.stage("temporary"):
+            dropped = [object() for _ in range(1000)]
+            del dropped
+    temporary = profiler.stages["temporary"]
+    assert temporary.peak > 1000 * 16
+    assert temporary.allocated < temporary.peak
+    # the peak of a nested stage counts for the enclosing one
+    assert profiler.stages["outer"].peak >= temporary.peak
+
+
+def test_null_profiler():
+    with NULL_PROFILER.stage("anything"):
+        pass
+
+
+def test_handler_and_runner_stages():
+    profiler = Profiler()
+    wh = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}, profiler=profiler)
+    wrs = wh.requests
+    list(Runner(MockTransport(prepare="requests"), profiler=profiler).run(wrs))
+
+    assert list(profiler.stages) == ["parse", "compile", "walk", "normalize", "expand", "build"]
+    assert profiler.stages["parse"].calls == 1
+    assert profiler.stages["expand"].calls == 3
+    assert profiler.stages["build"].calls == len(wrs)
+
+
+def test_detach():
+    profiler = Profiler()
+    wh = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}, profiler=profiler, detach=True)
+    assert wh.endpoints()
+    wrs = wh.requests
+
+    assert wh.root is None
+    assert profiler.stages["compact"].calls == 1
+    assert wh.requests is wrs
+    assert [wr.dump_as_request().url for wr in wrs]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.results import ResultsWriter
+from wadalize.runner import Runner
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+from wadalize.transport import MockTransport
+from wadalize.transport import TransportResponse
+
+
+def test_results_writer(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    wrs = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).requests
+
+    for run in range(2):
+        with ResultsWriter(path, source="test.wadl", batch_size=2) as results:
+            runner = Runner(MockTransport(latency=0.25, statuses={500: 1}, prepare=None), results=results)
+            assert len(list(runner.run(wrs * 10))) == 30
+        assert results.written == 30
+        assert results.run_id == run + 1
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT COUNT(*) FROM runs WHERE source = 'test.wadl'").fetchone() == (2,)
+    rows = db.execute(
+        "SELECT endpoint, COUNT(*), SUM(elapsed) FROM results WHERE status = 500 AND run_id = 2 GROUP BY endpoint ORDER BY endpoint"
+    ).fetchall()
+    assert rows == [
+        ("GET https://example.com/api/access/{action}", 10, 2.5),
+        ("GET https://example.com/api/affiliate/v1/search/items", 10, 2.5),
+        ("POST https://example.com/api/affiliate/v1/categories/tree", 10, 2.5),
+    ]
+    assert db.execute("SELECT method_id, url, route FROM results LIMIT 1").fetchone() == (
+        "getCategoryTree",
+        wrs[0].url,
+        "POST /affiliate/v1/categories/tree",
+    )
+
+    plan = " ".join(str(row) for row in db.execute("EXPLAIN QUERY PLAN SELECT * FROM results WHERE status = 500"))
+    assert "results_status" in plan
+
+
+def test_results_writer_errors(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    wr = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).requests[0]
+    with ResultsWriter(path) as results:
+        results.record(wr, TransportResponse(None, None, None, {}, "connection refused"))
+    assert sqlite3.connect(path).execute("SELECT status, error FROM results").fetchall() == [(None, "connection refused")]
+
+    results = ResultsWriter(path)
+    sqlite3.connect(path).executescript("DROP TABLE results")
+    results.record(wr, TransportResponse(200, 0.1, 0, {}, None))
+    with pytest.raises(sqlite3.Error):
+        results.close()
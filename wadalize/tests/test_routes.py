@@ -0,0 +1,101 @@
+import pytest
+
+from wadalize.routes import LITERAL
+from wadalize.routes import parse_segment
+from wadalize.routes import REGEX
+from wadalize.routes import RouteTrie
+from wadalize.routes import split_path
+from wadalize.routes import VAR
+
+
+def test_split_path():
+    assert split_path("/api//items/{id: [0-9]{1,3}/?}/") == ["api", "items", "{id: [0-9]{1,3}/?}"]
+
+
+@pytest.mark.parametrize(
+    "segment,kind,names",
+    [
+        ("items", LITERAL, []),
+        ("{id}", VAR, ["id"]),
+        ("{ id }", VAR, ["id"]),
+        ("{id: [0-9]+}", REGEX, ["id"]),
+        ("{spot :(?i)spot}", REGEX, ["spot"]),
+        ("item{id}.{format: json|xml}", REGEX, ["id", "format"]),
+    ],
+)
+def test_parse_segment(segment, kind, names):
+    parsed = parse_segment(segment)
+    assert parsed[0] == kind
+    assert parsed[2] == names
+
+
+def test_lookup():
+    trie = RouteTrie()
+    trie.add("GET", "/api/items", "list")
+    trie.add("POST", "/api/items", "create")
+    trie.add("GET", "/api/items/{id}", "get")
+    trie.add("GET", "/api/items/{id: [0-9]{3}}", "get-3-digits")
+    trie.add("GET", "/api/items/latest", "latest")
+    trie.add("GET", "/api/items/{id}/tags/{tag}", "tag")
+    trie.add("GET", "/api/{spot :(?i)spot}/item{num}.{fmt: json|xml}", "spot")
+    trie.add("GET", "/api/items", "duplicated")
+
+    assert len(trie) == 7
+    assert trie.lookup("GET", "/api/items") == ("list", {})
+    assert trie.lookup("post", "/api/items/") == ("create", {})
+    assert trie.lookup("GET", "/api/items/latest") == ("latest", {})
+    assert trie.lookup("GET", "/api/items/123?yolo=1") == ("get-3-digits", {"id": "123"})
+    assert trie.lookup("GET", "/api/items/12") == ("get", {"id": "12"})
+    assert trie.lookup("GET", "/api/items/latest/tags/a%20b") == ("tag", {"id": "latest", "tag": "a b"})
+    assert trie.lookup("GET", "/api/SPOT/item7.xml") == ("spot", {"spot": "SPOT", "num": "7", "fmt": "xml"})
+    assert trie.lookup("GET", "/api/spot/item7.csv") is None
+    assert trie.lookup("DELETE", "/api/items") is None
+    assert trie.lookup("GET", "/api/items/1/tags") is None
+
+
+def test_lookup_backtracking():
+    trie = RouteTrie()
+    trie.add("GET", "/a/b/c", "literal")
+    trie.add("GET", "/a/{x: b}/d", "regex")
+    trie.add("GET", "/a/{y}/e", "var")
+
+    assert trie.lookup("GET", "/a/b/c") == ("literal", {})
+    assert trie.lookup("GET", "/a/b/d") == ("regex", {"x": "b"})
+    assert trie.lookup("GET", "/a/b/e") == ("var", {"y": "b"})
+
+
+def test_lookup_backtracking_keeps_captured():
+    trie = RouteTrie()
+    # a{b has no template, it compiles to a regex without groups
+    trie.add("POST", "/{id}/a{b", "groupless")
+    trie.add("GET", "/{id}/{x}", "var")
+
+    assert trie.lookup("POST", "/1/a{b") == ("groupless", {"id": "1"})
+    assert trie.lookup("GET", "/1/a{b") == ("var", {"id": "1", "x": "a{b"})
+
+
+def test_resolve_methods():
+    trie = RouteTrie()
+    trie.add("GET", "/items/{id}", 1)
+    trie.add("DELETE", "/items/{itemId}", 2)
+
+    methods, captured = trie.resolve("/items/9")
+    assert sorted(methods) == ["DELETE", "GET"]
+    assert captured == ["9"]
+    assert trie.lookup("DELETE", "/items/9") == (2, {"itemId": "9"})
+    assert trie.resolve("/yolo") is None
+
+
+def test_lookup_backtracks_on_method():
+    trie = RouteTrie()
+    trie.add("GET", "/items/{id}", "get")
+    trie.add("POST", "/items/new", "create")
+    trie.add("PUT", "/items/{id: [0-9]+}", "update")
+
+    assert trie.lookup("GET", "/items/new") == ("get", {"id": "new"})
+    assert trie.lookup("POST", "/items/new") == ("create", {})
+    assert trie.lookup("PUT", "/items/12") == ("update", {"id": "12"})
+    assert trie.lookup("GET", "/items/12") == ("get", {"id": "12"})
+    assert trie.lookup("DELETE", "/items/new") is None
+    assert sorted(trie.resolve("/items/new")[0]) == ["POST"]
+    assert sorted(trie.resolve("/items/new", methods=["get"])[0]) == ["GET"]
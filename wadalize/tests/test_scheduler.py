@@ -0,0 +1,83 @@
+from wadalize import WADLRequest
+from wadalize.runner import Runner
+from wadalize.scheduler import LatencyHistory
+from wadalize.scheduler import Scheduler
+from wadalize.transport import MockTransport
+
+
+WRS = [
+    WADLRequest("https://a.example.com/users/1", "GET"),
+    WADLRequest("https://a.example.com/users/2", "DELETE"),
+    WADLRequest("https://a.example.com/users/3", "GET"),
+    WADLRequest("https://a.example.com/items/1", "POST"),
+    WADLRequest("https://b.example.com/users/1", "GET"),
+]
+
+
+def locations(wrs):
+    return [(wr.method, wr.location.replace(".example.com", "")) for wr in wrs]
+
+
+def test_document_order():
+    assert Scheduler().order(WRS) == WRS
+
+
+def test_interleave():
+    assert locations(Scheduler(interleave=True).order(WRS)) == [
+        ("GET", "https://a/users/1"),
+        ("POST", "https://a/items/1"),
+        ("GET", "https://b/users/1"),
+        ("DELETE", "https://a/users/2"),
+        ("GET", "https://a/users/3"),
+    ]
+
+
+def test_safe_first():
+    assert locations(Scheduler(safe_first=True, interleave=True).order(WRS)) == [
+        ("GET", "https://a/users/1"),
+        ("GET", "https://b/users/1"),
+        ("GET", "https://a/users/3"),
+        ("DELETE", "https://a/users/2"),
+        ("POST", "https://a/items/1"),
+    ]
+
+
+def test_custom_priority():
+    scheduler = Scheduler(priority=lambda wr: 0 if "items" in wr.location else 1)
+    assert scheduler.order(WRS)[0] is WRS[3]
+
+
+def test_longest_first(tmp_path):
+    history = LatencyHistory()
+    history.record(WRS[0], 0.1)
+    history.record(WRS[2], 0.3)
+    history.record(WADLRequest("https://a.example.com/items/1", "POST"), 2.0)
+    history.record(WADLRequest("https://a.example.com/items/1", "POST"), 1.0)
+
+    path = str(tmp_path / "history.json")
+    history.save(path)
+    history = LatencyHistory.load(path)
+    assert history.estimate(WRS[3]) == 1.5
+    assert history.estimate(WRS[4]) is None
+
+    # unknown endpoints are expected to take the mean, (0.1 + 0.3 + 1.5) / 3
+    assert locations(Scheduler(history=history).order(WRS)) == [
+        ("POST", "https://a/items/1"),
+        ("DELETE", "https://a/users/2"),
+        ("GET", "https://b/users/1"),
+        ("GET", "https://a/users/3"),
+        ("GET", "https://a/users/1"),
+    ]
+
+
+def test_load_missing_history(tmp_path):
+    assert not LatencyHistory.load(str(tmp_path / "nope.json"))
+
+
+def test_runner_records_history():
+    history = LatencyHistory()
+    runner = Runner(MockTransport(latency=0.5), scheduler=Scheduler(safe_first=True), history=history)
+
+    assert [wr.method for wr, _ in runner.run(WRS)] == ["GET", "GET", "GET", "DELETE", "POST"]
+    assert history.estimate(WRS[1]) == 0.5
+    assert len(history.latencies) == 5
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from wadalize import WADLHandler
+from wadalize import WADLRequest
+from wadalize.engine import FastEngine
+from wadalize.server import MockServer
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+def serve_and_run(server, wrs, headers=None):
+    """Starts the server, sends the given requests with the FastEngine and
+    returns the responses"""
+
+    async def main():
+        srv = await server.start("127.0.0.1", 0)
+        url = "http://127.0.0.1:{}".format(srv.sockets[0].getsockname()[1])
+        items = [(url, wr.to_wire(headers=headers)) for wr in wrs]
+        try:
+            return await FastEngine(pipeline=4, read_body=True).run_async(items)
+        finally:
+            srv.close()
+            await srv.wait_closed()
+
+    return asyncio.run(main())
+
+
+def test_serve_routes():
+    server = MockServer(WADLHandler(WADL_SAMPLE).endpoints())
+    assert len(server.routes) == 3
+
+    wrs = [
+        WADLRequest("http://x/api/affiliate/v1/categories/tree", "POST", headers={"Content-Type": "application/json"}),
+        WADLRequest("http://x/api/affiliate/v1/search/items?q=1", "GET"),
+        WADLRequest("http://x/api/access/create", "GET"),
+        WADLRequest("http://x/api/access/create", "HEAD"),
+        WADLRequest("http://x/api/access/create", "DELETE"),
+        WADLRequest("http://x/api/yolo", "GET"),
+    ]
+    responses = serve_and_run(server, wrs)
+
+    assert [r.status for r in responses] == [200, 200, 200, 200, 405, 404]
+    assert responses[0].headers["content-type"] == "application/json"
+    assert responses[0].body == b"{}"
+    assert responses[1].headers["content-type"] == "application/json;charset=utf-8"
+    assert responses[3].body == b"" and responses[3].headers["content-length"] == "2"
+    assert responses[4].headers["allow"] == "GET"
+    assert server.served == {200: 4, 405: 1, 404: 1}
+
+
+def test_serve_literal_and_template_siblings():
+    wadl = """<application xmlns="http://wadl.dev.java.net/2009/02">
+        <resources base="http://x/">
+            <resource path="/items/{id}"><method name="GET"/></resource>
+            <resource path="/items/new"><method name="POST"/></resource>
+        </resources>
+    </application>"""
+    server = MockServer(WADLHandler(wadl).endpoints())
+    wrs = [WADLRequest("http://x/items/new", method) for method in ("GET", "HEAD", "POST", "DELETE")]
+
+    responses = serve_and_run(server, wrs)
+    assert [r.status for r in responses] == [200, 200, 200, 405]
+    assert responses[3].headers["allow"] == "POST"
+
+
+def test_serve_error_injection():
+    server = MockServer(WADLHandler(WADL_SAMPLE).endpoints(), error_rate=0.5, error_status=503, latency=0.001, seed=3)
+    responses = serve_and_run(server, [WADLRequest("http://x/api/access/create", "GET")] * 50)
+
+    statuses = [r.status for r in responses]
+    assert set(statuses) == {200, 503}
+    assert server.served[503] == statuses.count(503)
+
+
+def test_wrong_error_rate():
+    with pytest.raises(ValueError):
+        MockServer([], error_rate=2)
@@ -0,0 +1,80 @@
+import gzip
+import zlib
+
+import responses
+from responses import matchers
+
+from wadalize.sources import decompress
+from wadalize.sources import SourceCache
+
+URL = "https://example.com/application.wadl"
+WADL = b"<application/>"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_decompress():
+    assert decompress(WADL) == WADL
+    assert decompress(gzip.compress(WADL)) == WADL
+    assert decompress(zlib.compress(WADL)) == WADL
+    assert decompress(b"") == b""
+
+
+@responses.activate
+def test_fetch_and_revalidate(tmp_path):
+    clock = Clock()
+    cache = SourceCache(str(tmp_path), max_age=60, clock=clock)
+
+    responses.add(responses.GET, URL, body=WADL, headers={"ETag": '"v1"'})
+    assert cache.fetch(URL) == WADL
+    assert cache.downloads == 1
+
+    # fresh: no request at all
+    assert cache.fetch(URL) == WADL
+    assert cache.hits == 1
+    assert len(responses.calls) == 1
+
+    # stale: conditional request
+    clock.now += 120
+    responses.replace(responses.GET, URL, status=304, match=[matchers.header_matcher({"If-None-Match": '"v1"'})])
+    assert cache.fetch(URL) == WADL
+    assert cache.revalidated == 1
+    assert len(responses.calls) == 2
+
+    # the 304 made it fresh again
+    assert cache.fetch(URL) == WADL
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_fetch_changed_source(tmp_path):
+    cache = SourceCache(str(tmp_path))
+
+    responses.add(responses.GET, URL, body=WADL, headers={"Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"})
+    assert cache.fetch(URL) == WADL
+
+    responses.replace(responses.GET, URL, body=gzip.compress(b"<application><resources/></application>"))
+    assert cache.fetch(URL) == b"<application><resources/></application>"
+    assert responses.calls[1].request.headers["If-Modified-Since"] == "Mon, 19 Oct 2026 10:00:00 GMT"
+    assert cache.downloads == 2
+
+    # shared with other instances using the same directory
+    with open(cache.paths(URL)[0], "rb") as f:
+        assert f.read()[:2] == b"\x1f\x8b"
+
+
+@responses.activate
+def test_fetch_errors_are_not_stored(tmp_path):
+    cache = SourceCache(str(tmp_path), max_age=60)
+
+    responses.add(responses.GET, URL, body="Not found lol", status=404)
+    assert cache.fetch(URL) == b"Not found lol"
+    assert cache.fetch(URL) == b"Not found lol"
+    assert len(responses.calls) == 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,67 @@
+import pytest
+
+from wadalize import WADLHandler
+from wadalize.scripts.tests.test_wadalize_representation import WADL_SAMPLE as WADL_REPRESENTATIONS
+from wadalize.store import RequestStore
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+
+
+def test_store_matches_requests():
+    wrs = WADLHandler(WADL_REPRESENTATIONS).requests
+    store = WADLHandler(WADL_REPRESENTATIONS).request_store()
+
+    assert len(store) == len(wrs) == 9
+    for wr, row in zip(wrs, store):
+        assert row.location == wr.location
+        assert row.method == wr.method
+        assert row.headers == wr.headers
+        assert row.method_id == wr.method_id and row.template == wr.template
+        assert [p.dump_as_dict() for p in row.params] == [p.dump_as_dict() for p in wr.params]
+        assert row.fingerprint() == wr.fingerprint()
+        assert row.to_wire() == wr.to_wire()
+        assert row.url == wr.url and row.endpoint == wr.endpoint and row.route == wr.route
+    assert list(store.locations()) == [wr.location for wr in wrs]
+
+
+def test_store_shares_values():
+    store = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).request_store()
+    assert len(store._tables.methods.values) == 2
+    assert len(store._tables.params.values) == 3
+
+    # rows of the same params share them
+    again = RequestStore.from_requests(list(store) * 2)
+    assert len(again) == 6
+    assert len(again._tables.params.values) == 3
+    assert again[4].params is again[1].params
+
+
+def test_store_slices():
+    store = WADLHandler(WADL_REPRESENTATIONS).request_store()
+
+    assert [row.location for row in store[2:5]] == [row.location for row in list(store)[2:5]]
+    assert store[-1].location == list(store)[-1].location
+    assert [row.method for row in store.take([3, 0])] == [store[3].method, store[0].method]
+    with pytest.raises(IndexError):
+        store[len(store)]
+
+
+def test_store_filter():
+    store = WADLHandler(WADL_REPRESENTATIONS).request_store()
+
+    options = store.filter(methods=["options"])
+    assert len(options) == 1 and options[0].method == "OPTIONS"
+    assert len(store.filter(method_ids=[store[0].method_id])) == len([row for row in store if row.method_id == store[0].method_id])
+    assert len(store.filter(predicate=lambda row: row.headers["Content-Type"] == "text/plain", methods=["POST"])) == 2
+
+
+def test_row_headers():
+    row = WADLHandler(WADL_REPRESENTATIONS).request_store()[0]
+    with pytest.raises(TypeError):
+        row.headers["Content-Type"] = "text/plain"
+    with pytest.raises(AttributeError):
+        row.headers = {}
+
+    out = row.replace(headers={"If-None-Match": "abc"})
+    assert row.headers == {"Content-Type": "application/x-www-form-urlencoded"}
+    assert out.headers == {"If-None-Match": "abc"}
+    assert out.location == row.location and out.params == row.params
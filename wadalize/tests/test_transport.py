@@ -0,0 +1,84 @@
+import mock
+import pytest
+
+from wadalize import WADLRequest
+from wadalize.engine import EngineResponse
+from wadalize.runner import Runner
+from wadalize.transport import FastTransport
+from wadalize.transport import get_transport
+from wadalize.transport import MockTransport
+from wadalize.transport import RequestsTransport
+
+
+def test_get_transport():
+    assert isinstance(get_transport("mock", latency=0.5), MockTransport)
+    with pytest.raises(ValueError, match=r"Unknown transport"):
+        get_transport("carrier-pigeon")
+
+
+@pytest.mark.parametrize("prepare", ["requests", "wire", None])
+def test_mock_transport(prepare):
+    transport = MockTransport(latency=(0.1, 0.2), statuses={200: 3, 500: 1}, prepare=prepare, seed=1)
+    wrs = [WADLRequest("https://example.com/api/{}".format(num), "GET") for num in range(200)]
+
+    responses = [resp for _, resp in transport.send_all(wrs, headers={"x-yolo": "1"})]
+    assert len(responses) == 200
+    assert all(0.1 <= resp.elapsed <= 0.2 for resp in responses)
+    assert {resp.status for resp in responses} == {200, 500}
+    assert (responses[0].size > 0) == (prepare == "wire")
+
+    # same seed, same answers
+    again = MockTransport(latency=(0.1, 0.2), statuses={200: 3, 500: 1}, prepare=prepare, seed=1)
+    assert [resp for _, resp in again.send_all(wrs, headers={"x-yolo": "1"})] == responses
+
+
+def test_mock_transport_wrong_prepare():
+    with pytest.raises(ValueError):
+        MockTransport(prepare="yolo")
+
+
+@mock.patch("requests.request")
+def test_requests_transport(mock_request):
+    mock_request.return_value = mock.Mock(status_code=201, content=b"yolo", headers={})
+    resp = RequestsTransport().send(WADLRequest("https://example.com/api", "post"), headers={"x-yolo": "1"})
+
+    assert resp.status == 201 and resp.size == 4 and resp.error is None
+    _, kwargs = mock_request.call_args
+    assert mock_request.call_args[0] == ("POST", "https://example.com/api")
+    assert kwargs["headers"] == {"x-yolo": "1"}
+    assert kwargs["timeout"] == 10.0
+    RequestsTransport(timeout=2.5).send(WADLRequest("https://example.com/api", "get"))
+    assert mock_request.call_args[1]["timeout"] == 2.5
+
+
+def test_fast_transport_window():
+    transport = FastTransport(window=3)
+    transport.engine.run = mock.Mock(side_effect=lambda items: [EngineResponse(200, {}, 0, 0.1, None, None)] * len(items))
+    taken = []
+
+    def wrs():
+        for num in range(7):
+            taken.append(num)
+            yield WADLRequest("https://example.com/api/{}".format(num), "GET")
+
+    responses = transport.send_all(wrs())
+    next(responses)
+    # only the first window was taken from the input
+    assert taken == [0, 1, 2]
+    assert len(list(responses)) == 6
+    assert [len(args[0]) for args, _ in transport.engine.run.call_args_list] == [3, 3, 1]
+
+    with pytest.raises(ValueError):
+        FastTransport(window=0)
+
+
+def test_runner_stats():
+    wrs = [WADLRequest("https://example.com/api", method) for method in ("GET", "POST", "DELETE", "get")]
+    runner = Runner(MockTransport(latency=0.25, statuses={404: 1}), deny_methods=["delete"])
+
+    assert [wr.method for wr, _ in runner.run(wrs)] == ["GET", "POST", "get"]
+    assert runner.stats.sent == 3
+    assert runner.stats.errors == 0
+    assert runner.stats.statuses == {404: 3}
+    assert runner.stats.latency == 0.75
+    assert "Requests: 3" in runner.stats.summary()
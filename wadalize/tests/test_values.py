@@ -0,0 +1,74 @@
+import datetime
+
+from lxml import etree
+
+from wadalize import WADLHandler
+from wadalize import WADLParam
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
+from wadalize.values import ValueProvider
+
+
+def test_values_by_type():
+    values = ValueProvider(seed=1)
+    assert 1 <= int(values.value("n", "xs:int")) <= 1000
+    assert values.value("flag", "xs:boolean") in ("true", "false")
+    datetime.date.fromisoformat(values.value("from", "xs:date"))
+    float(values.value("amount", "xsd:double"))
+    assert values.value("q", "xs:string").isalpha()
+    assert values.value("q", None).isalpha()
+
+
+def test_values_by_name():
+    values = ValueProvider(by_name=[("*_code", lambda rng: "ES")])
+    assert values.value("userEmail", "xs:string").endswith("@example.com")
+    assert values.value("country_code", "xs:string") == "ES"
+    assert int(values.value("pageSize", "xs:string")) <= 20
+
+
+def test_values_declared_type_wins():
+    values = ValueProvider(by_name=[("*_code", lambda rng: "ES")])
+    assert int(values.value("pageSize", "xs:long")) <= 20
+    assert -90 <= float(values.value("lat", "xs:double")) <= 90
+    assert values.value("userEmail", None).endswith("@example.com")
+    # names whose values don't fit the declared type
+    assert "." in values.value("itemCount", "xs:double")
+    assert values.value("siteUrl", "xs:int").isdigit()
+    assert values.value("contactEmail", "xs:boolean") in ("true", "false")
+    assert values.value("country_code", "xs:int").isdigit()
+
+
+def test_values_are_reproducible():
+    first, second = ValueProvider(seed=7), ValueProvider(seed=7)
+    names = ["a{}".format(num) for num in range(50)]
+    assert [first.value(name, "xs:int") for name in names] == [second.value(name, "xs:int") for name in reversed(names)][::-1]
+    assert [first.value(name, "xs:int") for name in names] != [ValueProvider(seed=8).value(name, "xs:int") for name in names]
+
+    first.value("a0", "xs:int")
+    assert first.generated == 50
+
+
+def test_values_custom_type():
+    values = ValueProvider(by_type={"xs:int": lambda rng: str(rng.randint(-5, -1))})
+    assert int(values.value("n", "xs:int")) < 0
+
+
+def test_param_defaults_win():
+    el = etree.XML('<param name="page" style="query" type="xs:int" default="3" />')
+    assert WADLParam(el, values=ValueProvider()).value == "3"
+    assert WADLParam(el, default_values={"page": "9"}, values=ValueProvider()).value == "9"
+    assert WADLParam(etree.XML('<param name="page" style="query" type="xs:int" />'), values=ValueProvider()).value is not None
+
+
+def test_handler_fills_values():
+    plain = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}).requests
+    filled = WADLHandler(WADL_SAMPLE, default_values={"action": "run"}, values=ValueProvider()).requests
+    assert "resource=&" in plain[-1].url
+    assert "resource=&" not in filled[-1].url
+    assert all(param.value for wr in filled for param in wr.params if param.style == "query")
+
+    # template params are filled in the url too, -p values first
+    assert plain[-1].url.startswith("https://example.com/api/access/run?")
+    assert "{action}" in WADLHandler(WADL_SAMPLE).requests[-1].url
+    url = WADLHandler(WADL_SAMPLE, values=ValueProvider()).requests[-1].url
+    assert "action" not in url and "%7B" not in url
+    assert url.startswith("https://example.com/api/access/" + ValueProvider().value("action", "xs:string") + "?")
@@ -1,6 +1,9 @@
+import threading
+
 import pytest
 
 from wadalize import WADLHandler
+from wadalize.wire import WireFile
 
 WADL_SAMPLE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <application xmlns="http://wadl.dev.java.net/2009/02">
@@ -174,3 +177,82 @@ def test_check_requests_no_default_values():
         assert req.method == values[num]["method"]
         assert req.location == values[num]["url"]
         assert len(req.params) == values[num]["num_params"]
+
+
+def test_dump_as_wire(tmp_path):
+    ah = WADLHandler(WADL_SAMPLE, default_values={"action": "create"})
+    path = str(tmp_path / "requests.wire")
+    assert ah.dump_as_wire(path) == 3
+
+    with WireFile(path) as wf:
+        assert len(wf) == 3
+        assert [bytes(x) for x in wf] == [wr.to_wire() for wr in ah.requests]
+        assert bytes(wf[-1]).startswith(b"GET /api/access/create?resource=&domain=&principal= HTTP/1.1\r\n")
+        with pytest.raises(IndexError):
+            wf[3]
+
+
+def test_wire_slices_outlive_file(tmp_path):
+    ah = WADLHandler(WADL_SAMPLE, default_values={"action": "create"})
+    path = str(tmp_path / "requests.wire")
+    ah.dump_as_wire(path)
+
+    with WireFile(path) as wf:
+        for raw in wf:
+            pass
+    # the last slice is still referenced by raw
+    assert bytes(raw) == ah.requests[-1].to_wire()
+
+
+def test_endpoints():
+    endpoints = WADLHandler(WADL_SAMPLE, default_values={"action": "create"}).endpoints()
+
+    assert [(e.method, e.method_id, e.path) for e in endpoints] == [
+        ("POST", "getCategoryTree", "/affiliate/v1/categories/tree"),
+        ("GET", "getItems", "/affiliate/v1/search/items"),
+        ("GET", "getResourceAccessExt", "/access/{action}"),
+    ]
+    assert endpoints[0].base == "https://example.com/api"
+    assert endpoints[0].full_path == "/api/affiliate/v1/categories/tree"
+    assert endpoints[0].request_media_types == ["application/json"]
+    assert endpoints[1].request_media_types == []
+    assert endpoints[1].response_media_types == ["application/json;charset=utf-8"]
+    assert len(endpoints[2].params) == 4
+    assert endpoints[2].params[-1].name == "action" and endpoints[2].params[-1].value == "create"
+
+
+def test_endpoints_rebase():
+    endpoints = WADLHandler(WADL_SAMPLE, base="http://localhost:8080/").endpoints()
+    assert endpoints[2].base == "http://localhost:8080/"
+    assert endpoints[2].full_path == "/access/{action}"
+
+
+def test_compact():
+    wh = WADLHandler(WADL_SAMPLE, default_values={"action": "create"})
+    assert wh.compact() is wh
+    assert wh.root is None
+    assert len(wh.requests) == 3
+
+    with pytest.raises(ValueError):
+        wh.endpoints()
+    with pytest.raises(ValueError):
+        wh.matcher()
+
+
+def test_requests_compiled_once():
+    wh = WADLHandler(WADL_SAMPLE, default_values={"action": "create"})
+    barrier = threading.Barrier(8)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(wh.requests)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(wh.requests) == 3
+    assert all(requests is wh.requests for requests in results)
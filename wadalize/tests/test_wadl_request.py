@@ -1,13 +1,26 @@
+import copy
+import pickle
+
 import pytest
 from lxml import etree
 
+from wadalize import WADLHandler
 from wadalize import WADLRequest
 from wadalize.models import Request
+from wadalize.tests.test_wadl_handler import WADL_SAMPLE
 
 
 def test_ok_no_params():
     wr = WADLRequest("https://example.com/api/yolo", "POST")
     assert wr.location == "https://example.com/api/yolo" and wr.method == "POST" and len(wr.params) == 0
+    assert wr.endpoint == "POST https://example.com/api/yolo" and wr.route == "POST /api/yolo"
+
+
+def test_route_ignores_base():
+    for base in (None, "http://localhost:8080/v2"):
+        wr = WADLHandler(WADL_SAMPLE, base=base, default_values={"action": "run"}).requests[-1]
+        assert wr.path == "/access/{action}"
+        assert wr.route == "GET /access/{action}"
 
 
 def test_ok_params():
@@ -125,3 +138,65 @@ def test_har_not_implemented():
 
     with pytest.raises(NotImplementedError):
         wr.dump_as_har()
+
+
+def test_to_wire():
+    params = []
+    params.append(
+        etree.XML(
+            '<param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="foo1" \
+                style="header" type="xs:double" default="1.5" />'
+        )
+    )
+    params.append(
+        etree.XML(
+            '<param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="foo2" \
+                style="query" type="xs:double" />'
+        )
+    )
+
+    wr = WADLRequest("https://example.com/api/yolo", "get", params=params)
+    assert wr.to_wire(headers={"x-yolo": "1"}) == b"GET /api/yolo?foo2= HTTP/1.1\r\nHost: example.com\r\nfoo1: 1.5\r\nx-yolo: 1\r\n\r\n"
+
+
+def test_to_wire_representation_body():
+    wr = WADLRequest("https://example.com:8443/api/yolo", "POST", headers={"Content-Type": "application/json"})
+    assert wr.to_wire() == b"POST /api/yolo HTTP/1.1\r\nHost: example.com:8443\r\nContent-Type: application/json\r\nContent-Length: 0\r\n\r\n"
+    assert wr.to_wire(body='{"a": 1}').endswith(b'Content-Length: 8\r\n\r\n{"a": 1}')
+
+
+def test_fingerprint():
+    params = [
+        etree.XML('<param name="b" style="query" default="2" />'),
+        etree.XML('<param name="a" style="query" default="1" />'),
+        etree.XML('<param name="X-Yolo" style="header" default="1" />'),
+    ]
+    reversed_params = [params[1], params[0], params[2]]
+
+    wr = WADLRequest("https://example.com/api/yolo", "POST", params=params, headers={"Content-Type": "text/plain"})
+    same = WADLRequest("https://example.com/api/yolo", "post", params=reversed_params, headers={"Content-Type": "text/csv"})
+    assert wr.fingerprint() == same.fingerprint()
+    assert wr.fingerprint() == ("POST", "https", "example.com", "/api/yolo", "", ("a=1", "b=2"), (("x-yolo", "1"),))
+    assert wr.fingerprint(headers=["Content-Type"]) != same.fingerprint(headers=["Content-Type"])
+    assert wr.fingerprint() != WADLRequest("https://example.com/api/yolo", "POST", params=params[:2]).fingerprint()
+
+
+def test_immutable():
+    params = [etree.XML('<param name="X-Yolo" style="header" default="1" />')]
+    wr = WADLRequest("https://example.com/api/yolo", "POST", params=params, headers={"Content-Type": "text/plain"})
+
+    assert wr.dump_as_request().headers == {"Content-Type": "text/plain", "X-Yolo": "1"}
+    assert wr.headers == {"Content-Type": "text/plain"}
+    with pytest.raises(AttributeError):
+        wr.headers = {}
+    with pytest.raises(AttributeError):
+        wr.params[0].value = "2"
+    with pytest.raises(TypeError):
+        wr.headers["Content-Type"] = "text/csv"
+
+    other = wr.replace(headers={"If-None-Match": "abc"}, method="PUT")
+    assert (other.method, other.headers, other.params) == ("PUT", {"If-None-Match": "abc"}, wr.params)
+    assert (wr.method, wr.headers) == ("POST", {"Content-Type": "text/plain"})
+
+    copied = pickle.loads(pickle.dumps(wr))
+    assert copied.to_wire() == wr.to_wire() and copy.copy(wr).fingerprint() == wr.fingerprint()
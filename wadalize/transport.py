@@ -0,0 +1,181 @@
+import itertools
+import os
+import random
+import time
+from collections import namedtuple
+
+from .profiling import NULL_PROFILER
+
+
+# cached is True for responses answered by the response cache, without
+# reaching the server: their elapsed time means nothing
+TransportResponse = namedtuple("TransportResponse", ["status", "elapsed", "size", "headers", "error", "cached"], defaults=(False,))
+
+
+class Transport:
+    """
+    Base class for the backends actually sending the requests built from a
+    WADL. Subclasses must implement send, and may override send_all when they
+    are able to dispatch many requests at once.
+    Attributes:
+        profiler (wadalize.profiling.Profiler): Where the time spent building
+            requests and waiting for the network is accounted.
+    """
+
+    name = None
+    profiler = NULL_PROFILER
+
+    def send(self, wr, headers=None):
+        """Sends a single WADLRequest adding the given extra headers. Returns
+        a TransportResponse"""
+        raise NotImplementedError()
+
+    def send_all(self, wrs, headers=None):
+        """Sends every WADLRequest from the iterable wrs, yielding pairs of
+        (WADLRequest, TransportResponse) in the same order"""
+        for wr in wrs:
+            yield wr, self.send(wr, headers=headers)
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Sends the requests one by one using the requests library.
+    Args:
+        timeout (float): Seconds to wait for connecting and for each
+            response. None waits forever.
+    """
+
+    name = "requests"
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+
+    def send(self, wr, headers=None):
+        import requests
+
+        with self.profiler.stage("build"):
+            req = wr.dump_as_request()
+
+            # add the given header parameters
+            req.headers.update(headers or {})
+
+        kwargs = {"headers": req.headers, "timeout": self.timeout}
+        if os.getenv("HTTP_PROXY") or os.getenv("HTTPS_PROXY"):
+            # let's avoid any unwanted problems
+            kwargs["verify"] = False
+
+        start = time.perf_counter()
+        try:
+            with self.profiler.stage("network"):
+                r = requests.request(req.method, str(req.url), **kwargs)
+        except requests.exceptions.RequestException as e:
+            return TransportResponse(None, time.perf_counter() - start, 0, {}, str(e))
+        return TransportResponse(r.status_code, time.perf_counter() - start, len(r.content or b""), getattr(r, "headers", {}), None)
+
+
+class FastTransport(Transport):
+    """
+    Sends the requests with our asyncio FastEngine, all at once, or a window
+    of them at a time.
+    Args:
+        window (int): Requests handed to the engine at once. Each window is
+            answered before the next one is taken from the input, so
+            whatever filters it, like a CircuitBreaker, can act on the results
+            of the previous ones. None sends everything at once.
+        kwargs: Same as wadalize.engine.FastEngine.
+    """
+
+    name = "fast"
+
+    def __init__(self, window=None, **kwargs):
+        from .engine import FastEngine
+
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.engine = FastEngine(**kwargs)
+
+    def send(self, wr, headers=None):
+        return next(iter(self.send_all([wr], headers=headers)))[1]
+
+    def send_all(self, wrs, headers=None):
+        if self.window is None:
+            yield from self._send_window(list(wrs), headers)
+            return
+        wrs = iter(wrs)
+        while True:
+            window = list(itertools.islice(wrs, self.window))
+            if not window:
+                break
+            yield from self._send_window(window, headers)
+
+    def _send_window(self, wrs, headers):
+        with self.profiler.stage("wire"):
+            items = [(wr.location, wr.to_wire(headers=headers)) for wr in wrs]
+        with self.profiler.stage("network"):
+            responses = self.engine.run(items)
+        for wr, resp in zip(wrs, responses):
+            yield wr, TransportResponse(resp.status, resp.elapsed, resp.size, resp.headers, resp.error)
+
+
+class MockTransport(Transport):
+    """
+    In-process backend that doesn't touch the network, meant to measure the
+    overhead of wadalize itself. Requests are still prepared as the real
+    backends would do it, then answered with a made up response.
+    Args:
+        latency (float or tuple): Seconds reported as the elapsed time of
+            each request, or a (min, max) range to pick from.
+        statuses (dict): Status codes to answer with, mapped to their
+            relative weight. Defaults to always 200.
+        prepare (str): How requests are prepared before being "sent": like
+            the "requests" transport does, as "wire" bytes, or None to skip
+            it entirely.
+        sleep (bool): Actually wait for the reported latency.
+        seed (int): Seed for the random latencies and statuses.
+    """
+
+    name = "mock"
+
+    def __init__(self, latency=0.0, statuses=None, prepare="requests", sleep=False, seed=None):
+        if prepare not in ("requests", "wire", None):
+            raise ValueError("prepare must be one of 'requests', 'wire' or None")
+
+        self.latency = latency if isinstance(latency, (tuple, list)) else (latency, latency)
+        statuses = statuses or {200: 1}
+        self.statuses = list(statuses.keys())
+        self.weights = list(statuses.values())
+        self.prepare = prepare
+        self.sleep = sleep
+        self.random = random.Random(seed)
+
+    def send(self, wr, headers=None):
+        size = 0
+        if self.prepare == "requests":
+            with self.profiler.stage("build"):
+                req = wr.dump_as_request()
+                req.headers.update(headers or {})
+        elif self.prepare == "wire":
+            with self.profiler.stage("wire"):
+                size = len(wr.to_wire(headers=headers))
+
+        low, high = self.latency
+        elapsed = low if low == high else self.random.uniform(low, high)
+        if self.sleep and elapsed:
+            time.sleep(elapsed)
+
+        status = self.statuses[0] if len(self.statuses) == 1 else self.random.choices(self.statuses, self.weights)[0]
+        return TransportResponse(status, elapsed, size, {}, None)
+
+
+TRANSPORTS = {t.name: t for t in (RequestsTransport, FastTransport, MockTransport)}
+
+
+def get_transport(name, **kwargs):
+    """Returns an instance of the transport registered under the given name"""
+    if name not in TRANSPORTS:
+        raise ValueError("Unknown transport {}".format(name))
+    return TRANSPORTS[name](**kwargs)
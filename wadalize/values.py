@@ -0,0 +1,181 @@
+import datetime
+import random
+import re
+import string
+import uuid
+
+from .filters import glob_to_regex
+
+EPOCH = datetime.datetime(2020, 1, 1)
+
+
+def gen_string(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(8))
+
+
+def gen_int(rng):
+    return str(rng.randint(1, 1000))
+
+
+def gen_small_int(rng):
+    return str(rng.randint(1, 20))
+
+
+def gen_decimal(rng):
+    return "{:.2f}".format(rng.uniform(0, 1000))
+
+
+def gen_boolean(rng):
+    return rng.choice(("true", "false"))
+
+
+def gen_date(rng):
+    return (EPOCH + datetime.timedelta(days=rng.randrange(3650))).date().isoformat()
+
+
+def gen_datetime(rng):
+    return (EPOCH + datetime.timedelta(seconds=rng.randrange(3650 * 86400))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def gen_time(rng):
+    return (EPOCH + datetime.timedelta(seconds=rng.randrange(86400))).strftime("%H:%M:%S")
+
+
+def gen_uri(rng):
+    return "https://example.com/" + gen_string(rng)
+
+
+def gen_email(rng):
+    return "{}@example.com".format(gen_string(rng))
+
+
+def gen_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def gen_latitude(rng):
+    return "{:.5f}".format(rng.uniform(-90, 90))
+
+
+def gen_longitude(rng):
+    return "{:.5f}".format(rng.uniform(-180, 180))
+
+
+def gen_locale(rng):
+    return rng.choice(("en", "es", "fr", "de"))
+
+
+# XML schema types, without their prefix, mapped to their generator. Types not
+# listed here get strings
+TYPE_GENERATORS = {
+    "string": gen_string,
+    "int": gen_int,
+    "integer": gen_int,
+    "long": gen_int,
+    "short": gen_int,
+    "byte": gen_small_int,
+    "unsignedint": gen_int,
+    "unsignedlong": gen_int,
+    "unsignedshort": gen_int,
+    "unsignedbyte": gen_small_int,
+    "positiveinteger": gen_int,
+    "nonnegativeinteger": gen_int,
+    "decimal": gen_decimal,
+    "double": gen_decimal,
+    "float": gen_decimal,
+    "boolean": gen_boolean,
+    "date": gen_date,
+    "datetime": gen_datetime,
+    "time": gen_time,
+    "anyuri": gen_uri,
+}
+
+# Globs matched against param names, case insensitive, before their type is
+# looked at. The first matching one wins, unless the param declares a type
+# the glob's generator doesn't give values for, see COMPATIBLE_TYPES
+NAME_GENERATORS = [
+    ("*email*", gen_email),
+    ("*uuid*", gen_uuid),
+    ("*guid*", gen_uuid),
+    ("*url", gen_uri),
+    ("*uri", gen_uri),
+    ("lat", gen_latitude),
+    ("*latitude", gen_latitude),
+    ("lon", gen_longitude),
+    ("lng", gen_longitude),
+    ("*longitude", gen_longitude),
+    ("locale", gen_locale),
+    ("lang*", gen_locale),
+    ("page", gen_small_int),
+    ("limit", gen_small_int),
+    ("*size", gen_small_int),
+    ("*count", gen_small_int),
+]
+
+
+# Type generators whose values each name generator can stand in for. Name
+# globs always apply to params declared as strings, or with an unknown type or
+# no type; params of any other type only get the value of a compatible glob,
+# so a {userCount: xs:double} never gets an int, nor a {pageUri: xs:int} a url
+COMPATIBLE_TYPES = {
+    gen_small_int: {gen_int, gen_small_int},
+    gen_latitude: {gen_decimal},
+    gen_longitude: {gen_decimal},
+    gen_uri: {gen_uri},
+}
+
+
+class ValueProvider:
+    """
+    Makes up values for the params having no default value, from their name
+    and their type. Name globs are looked at first, see NAME_GENERATORS, then
+    types, see TYPE_GENERATORS; anything else gets a random string. The
+    declared type has the last word: a glob only applies when its values fit
+    the type, see COMPATIBLE_TYPES.
+
+    Values only depend on the seed, the name and the type of the param, so
+    runs are reproducible and every param of the same name and type gets the
+    same value, wherever it is. Each one is generated once and then reused.
+    Args:
+        seed (int): Seed of every generated value.
+        by_type (dict): XML schema types, with or without prefix, mapped to
+            a generator: a function receiving a random.Random and returning
+            a string. They take precedence over TYPE_GENERATORS.
+        by_name (list of tuple): (glob, generator) pairs, checked before
+            NAME_GENERATORS. They only apply to string and untyped params.
+    Attributes:
+        generated (int): Number of distinct values generated so far.
+    """
+
+    def __init__(self, seed=0, by_type=None, by_name=None):
+        self.seed = seed
+        self._types = dict(TYPE_GENERATORS)
+        self._types.update((_local_type(name), generator) for name, generator in (by_type or {}).items())
+        self._names = [(re.compile(glob_to_regex(glob), re.IGNORECASE), generator) for glob, generator in list(by_name or []) + NAME_GENERATORS]
+        self._values = {}  # (name, type) -> value
+        self.generated = 0
+
+    def value(self, name, param_type=None):
+        """Returns the value of a param of the given name and type"""
+        key = (name, param_type)
+        value = self._values.get(key)
+        if value is None:
+            rng = random.Random("{}:{}:{}".format(self.seed, param_type, name))
+            value = self._values[key] = self._generator(name, param_type)(rng)
+            self.generated += 1
+        return value
+
+    def _generator(self, name, param_type):
+        local_type = _local_type(param_type)
+        by_type = self._types.get(local_type)
+        # strings, or types we know nothing about, take any name glob
+        any_name = by_type is None or local_type == "string"
+        for pattern, generator in self._names:
+            if pattern.match(name or "") and (any_name or by_type in COMPATIBLE_TYPES.get(generator, ())):
+                return generator
+        return by_type or gen_string
+
+
+def _local_type(param_type):
+    """xs:dateTime -> datetime"""
+    return (param_type or "").rsplit(":", 1)[-1].lower()
@@ -1,13 +1,24 @@
 import re
+import threading
+from urllib.parse import quote
 from urllib.parse import unquote
 from urllib.parse import urlparse
 from urllib.parse import urlunparse
 
-import exrex
-from furl import furl
-from lxml import etree
+from .estimate import Estimate
+from .estimate import MethodEstimate
+from .matcher import WADLMatcher
+from .profiling import NULL_PROFILER
+from .wire import write_wire
 
-from .models import Request
+# Characters left untouched when quoting the request target of a wire
+# formatted request. Anything already percent-encoded stays as is.
+WIRE_SAFE_CHARS = "/;:@&=+$,?%!~*'()[]"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Route segments holding a regex, as in { var: regex }
+REGEX_SEGMENT = r"^[{]\s*\w*\s*[:]\s*.*\s*[}]$"
 
 
 class WADLHandler:
@@ -19,6 +30,20 @@ class WADLHandler:
         <resources base="...">.
         default_values (dict): Dictionary holding default values to be used in
         place of params found in the WADL file.
+        filters (wadalize.filters.WADLFilter): Rules deciding which <method>
+        elements are parsed. Excluded methods are skipped before expanding
+        anything.
+        profiler (wadalize.profiling.Profiler): When given, the time spent in
+        each parsing stage is accounted to it.
+        values (wadalize.values.ValueProvider): Makes up the values of the
+        params having neither a default value nor a default attribute.
+        combiner (wadalize.combinations.Combiner): When given, params with a
+        list of candidate values in default_values get one of them in each
+        request, the combiner deciding which combinations of them, and of the
+        urls expanded from regexes, are used. Without it, a list value is sent
+        as a repeated query param.
+        detach (bool): Drop the lxml tree as soon as the requests are
+        compiled, see compact().
     Attributes:
         _requests (list of WADLRequest): List of parsed requests from the WADL
         file.
@@ -27,17 +52,22 @@ class WADLHandler:
         _requests attribute.
     """
 
-    def __init__(self, from_string=None, base=None, default_values=None):
+    def __init__(self, from_string=None, base=None, default_values=None, filters=None, profiler=None, detach=False, values=None, combiner=None):
         if default_values is None:
             default_values = {}
         if not from_string:
             raise ValueError("You need to pass a WADL string to be parsed")
 
+        # compiled plans are read without lxml, see wadalize.plan
+        from lxml import etree
+
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
         try:
-            if isinstance(from_string, bytes):
-                self.root = etree.fromstring(from_string)
-            else:
-                self.root = etree.fromstring(from_string.encode())
+            with self.profiler.stage("parse"):
+                if isinstance(from_string, bytes):
+                    self.root = etree.fromstring(from_string)
+                else:
+                    self.root = etree.fromstring(from_string.encode())
             self.ns = self.root.tag.replace("application", "")
         except etree.XMLSyntaxError as e:
             raise ValueError("XML syntax error: {}".format(e))
@@ -48,27 +78,53 @@ class WADLHandler:
         self.default_values = default_values
         # Dict with pairs of name of var -> value, to be used in
         # place of params
-        self._requests = []
+        self.filters = filters
+        self.values = values
+        self.combiner = combiner
+        self.detach = detach
+        self._requests = ()
+        self._compiled = False
+        # Held while compiling the requests, or walking the tree, so threads
+        # sharing a handler compile them once. Reading them needs no lock
+        self._lock = threading.Lock()
+        # <param> children of each <resources>/<resource> element seen by
+        # _walk_up, so siblings don't look them up again
+        self._parent_params = {}
 
     def _tag(self, tag):
         return "{}{}".format(self.ns, tag)
 
-    def _format_default_values(self, url):
+    def _format_default_values(self, url, params=()):
         """Method that takes care of replacing {param} placeholders with
-        their default values"""
+        their default values. With a values provider, the template params
+        among the given <param> elements having no default value get theirs,
+        just like WADLParam does"""
 
         for key, val in self.default_values.items():
+            # several candidates, each combination picks one, see _combinations
+            if isinstance(val, (list, tuple)):
+                continue
             url = url.replace("{" + key + "}", val)
 
+        if self.values is not None:
+            for param in params:
+                name = param.get("name")
+                if param.get("style") != "template" or name in self.default_values:
+                    continue
+                url = url.replace("{" + name + "}", param.get("default") or self.values.value(name, param.get("type")))
+
         return url
 
-    def _normalize_url(self, path_l):
+    def _normalize_url(self, path_l, params=()):
         """This method normalizes a url generated from a list of url parts as
         obtained by the _parse method. After getting sure a "/" is the prefix
         for each of the elements of the path_l list of "url parts", except for
         the first one, it's the furl class the one at charge of actually
-        normalizing the url
+        normalizing the url. params are the <param> elements of the request,
+        see _format_default_values
         """
+        from furl import furl
+
         url = ""
 
         for num, path in enumerate(path_l):
@@ -77,43 +133,164 @@ class WADLHandler:
 
             url = "{}{}".format(url, path)
 
-        f = furl(self._format_default_values(url))
+        f = furl(self._format_default_values(url, params))
         f.path.normalize()
         return f.url
 
     @property
     def requests(self):
-        """Returns a list with all the parsed requests for the given
-        WADL string"""
-        if not self._requests:
-            # To parse each request, we look for each <method> element,
-            # and pass it as param to the _parse method that will do the magic
-            # to actually extract a request object from that point.
-            for x in self.root.iter():
-                if x.tag == self._tag("method"):
-                    represn = self._getrepresentation(x)
-                    if represn:
-                        for i in represn:
-                            self._requests.append(i)
-                    else:
-                        for i in self._parse(x):
-                            self._requests.append(i)
-
+        """Returns a tuple with all the parsed requests for the given
+        WADL string. They are compiled once, even if many threads ask for
+        them at the same time, and can't be modified"""
+        if not self._compiled:
+            with self._lock:
+                # another thread may have compiled them while this one waited
+                if not self._compiled:
+                    self._compile()
         return self._requests
 
+    def _compile(self):
+        self._require_tree()
+        requests = []
+        with self.profiler.stage("compile"):
+            for method, expansions in self._expand_methods():
+                for urls, params, headers, template, path in expansions:
+                    for url, default_values in self._combinations(urls, params):
+                        requests.append(
+                            WADLRequest(
+                                url,
+                                method=method.get("name"),
+                                params=params,
+                                headers=headers,
+                                default_values=default_values,
+                                method_id=method.get("id"),
+                                template=template,
+                                path=path,
+                                values=self.values,
+                            )
+                        )
+        self._requests = tuple(requests)
+        self._compiled = True
+
+        if self.detach:
+            self._drop_tree()
+
+    def request_store(self):
+        """Returns the requests as a wadalize.store.RequestStore, which holds
+        them column-wise rather than as WADLRequest and WADLParam objects.
+        Unless the requests were already compiled, no WADLRequest is built,
+        and they aren't kept by this handler either"""
+        from .store import RequestStore
+
+        if self._compiled:
+            return RequestStore.from_requests(self._requests, default_values=self.default_values)
+
+        store = RequestStore(default_values=self.default_values)
+        with self._lock:
+            self._require_tree()
+            with self.profiler.stage("compile"):
+                for method, expansions in self._expand_methods():
+                    for urls, params, headers, template, path in expansions:
+                        if self.combiner is None:
+                            # params are shared by every url of an expansion
+                            params = [WADLParam(param, default_values=self.default_values, values=self.values) for param in params]
+                            store.extend(
+                                urls, method.get("name"), params=params, headers=headers, method_id=method.get("id"), template=template, path=path
+                            )
+                            continue
+                        for url, default_values in self._combinations(urls, params):
+                            row_params = [WADLParam(param, default_values=default_values, values=self.values) for param in params]
+                            store.extend(
+                                [url],
+                                method.get("name"),
+                                params=row_params,
+                                headers=headers,
+                                method_id=method.get("id"),
+                                template=template,
+                                path=path,
+                            )
+
+            if self.detach:
+                self._drop_tree()
+        return store
+
+    def _combinations(self, urls, params):
+        """Lazily yields (url, default_values) for each request of an
+        expansion. Without a combiner, that's every url along with
+        self.default_values. With one, the urls and the candidate values of
+        the params (or {templates}) having several are combined by it, each
+        combination picking one url and one value of each param"""
+        if self.combiner is None:
+            for url in urls:
+                yield url, self.default_values
+            return
+
+        names = self._candidate_names(urls, params)
+        domains = [urls] + [list(dict.fromkeys(self.default_values[name])) for name in names]
+        for url, *chosen in self.combiner.combine(domains):
+            for name, value in zip(names, chosen):
+                url = url.replace("{" + name + "}", value)
+            yield url, dict(self.default_values, **dict(zip(names, chosen)))
+
+    def _candidate_names(self, urls, params):
+        """Returns the names of the default values having several candidates
+        that are used by the given <param> elements, or as {templates} of the
+        given urls"""
+        param_names = {param.get("name") for param in params}
+        return [
+            name
+            for name, value in self.default_values.items()
+            if isinstance(value, (list, tuple)) and (name in param_names or any("{" + name + "}" in url for url in urls))
+        ]
+
+    def _expand_methods(self):
+        """Yields each accepted <method> element along with its expansions,
+        see _getrepresentation and _parse"""
+        # To parse each request, we look for each <method> element,
+        # and pass it as param to the _parse method that will do the magic
+        # to actually extract the requests from that point.
+        for x in self.root.iter(self._tag("method")):
+            if self._accepts(x):
+                yield x, self._getrepresentation(x) or self._parse(x)
+
+    def compact(self):
+        """Compiles the requests if needed, then drops the lxml tree and
+        everything pointing into it. Requests don't reference the tree, so
+        they stay usable, but endpoints() and matcher() don't work anymore.
+        Returns self"""
+        self.requests  # compiles them, if not done yet
+        with self._lock:
+            self._drop_tree()
+        return self
+
+    def _drop_tree(self):
+        if self.root is not None:
+            with self.profiler.stage("compact"):
+                self.root = None
+                self._parent_params = {}
+
+    def _require_tree(self):
+        if self.root is None:
+            raise ValueError("This WADLHandler was compacted, its lxml tree is gone")
+
+    def dump_as_wire(self, path, headers=None):
+        """Writes every parsed request in HTTP/1.1 wire format to the file at
+        `path`, along with an offset index. Use wadalize.wire.WireFile to
+        read them back. Returns the number of requests written"""
+        return write_wire(path, self.requests, headers=headers)
+
     def _getrepresentation(self, method):
         """
         Method that identifies whether a representation exists and its values
         are extracted
         If the representation has direct parameters,
         they are associated with the representation.
+        Returns a list of (urls, params, headers, template, path) expansions,
+        one for each representation, see _parse.
         """
         representation = []
         representation_final = []
-        array_wadl = []
-
-        path_l = []
-        parent = method.getparent()
+        expansions = []
 
         for child in method.iter():
             if child.tag == self._tag("representation") and child.getparent().tag == self._tag("request"):
@@ -126,32 +303,21 @@ class WADLHandler:
                     representation_param.append(child)
             representation_final.append({"representation": r, "param": representation_param})
 
-        while parent.tag != self._tag("application"):
-            # Keep track of route parts
-            if parent.tag == self._tag("resources"):
-                path_l.insert(0, self.base if self.base else parent.get("base"))
-            elif parent.tag == self._tag("resource"):
-                path_l.insert(0, parent.get("path"))
-
-            parent = parent.getparent()
+        with self.profiler.stage("walk"):
+            path_l, parent_params = self._walk_up(method)
 
         for i in representation_final:
             # Extract params of the url
-            urls = self.param_url(unquote(self._normalize_url(path_l)))
+            with self.profiler.stage("normalize"):
+                normalized = unquote(self._normalize_url(path_l, i.get("param") + parent_params))
+            with self.profiler.stage("expand"):
+                urls = self.param_url(normalized)
 
-            # In the end, return a array WADLRequest object representing the
-            # given parsed request
-            for url in urls:
-                array_wadl.append(
-                    WADLRequest(
-                        url,
-                        method=method.get("name"),
-                        params=i.get("param"),
-                        headers={"Content-Type": i.get("representation").get("mediaType")},
-                        default_values=self.default_values,
-                    )
-                )
-        return array_wadl
+            # Every url is a request of this representation
+            expansions.append(
+                (urls, i.get("param"), {"Content-Type": i.get("representation").get("mediaType")}, self._template(path_l), join_path(path_l[1:]))
+            )
+        return expansions
 
     def _parse(self, method):
         """Extract a request from the WADL string, starting from a <method> element.
@@ -171,11 +337,13 @@ class WADLHandler:
             ancestor of the current <method> element. It's important not to mix
             in with <param>s which are associated with sibling <method>s or
             <resource> elements that are not direct ancestors.
+        Returns a list with a single (urls, params, headers, template, path)
+        expansion: every expanded url, the <param> elements, the headers (None
+        here), and the url template and path template relative to the base
+        shared by the requests.
         """
 
-        path_l = []
         params = []
-        array_wadl = []
 
         # Iterate inwards to find children params
         for child in method.iter():
@@ -184,12 +352,41 @@ class WADLHandler:
 
         # Iterate outwards to fetch complete route and other params associated
         # with this request being parsed
+        with self.profiler.stage("walk"):
+            path_l, parent_params = self._walk_up(method)
+        params.extend(parent_params)
+
+        # Extract params of the url
+        with self.profiler.stage("normalize"):
+            normalized = unquote(self._normalize_url(path_l, params))
+        with self.profiler.stage("expand"):
+            urls = self.param_url(normalized)
+
+        # In the end, every url is a request of this method
+        return [(urls, params, None, self._template(path_l), join_path(path_l[1:]))]
+
+    def _template(self, path_l):
+        """Returns the url of a request before replacing any template, given
+        its route parts as returned by _walk_up"""
+        return "{}{}".format((path_l[0] or "").rstrip("/"), join_path(path_l[1:]))
+
+    def _walk_up(self, method):
+        """Walks outwards from a <method> element up to <application>.
+        Returns the list of route parts found on the <resources> and <resource>
+        ancestors, and the list of <param> elements directly attached to them.
+        Params of sibling <method>s or <resource>s are left out"""
+        path_l = []
+        params = []
+
+        param_tag = self._tag("param")
         parent = method.getparent()
         while parent.tag != self._tag("application"):
-            # Iterate inwards this parent to find other parameters
-            for child in parent.iter():
-                if child.tag == self._tag("param") and parent == child.getparent():
-                    params.append(child)
+            # Only the params directly attached to this parent count. Looking
+            # at its children once, rather than at all of its descendants for
+            # every method, keeps this linear in the size of the document
+            if parent not in self._parent_params:
+                self._parent_params[parent] = [child for child in parent if child.tag == param_tag]
+            params.extend(self._parent_params[parent])
 
             # Keep track of route parts
             if parent.tag == self._tag("resources"):
@@ -199,14 +396,116 @@ class WADLHandler:
 
             parent = parent.getparent()
 
-        # Extract params of the url
-        urls = self.param_url(unquote(self._normalize_url(path_l)))
+        return path_l, params
+
+    def _accepts(self, method):
+        """Checks the given <method> element against self.filters, walking
+        the tree only if the rules need it"""
+        if self.filters is None:
+            return True
+        if not self.filters.accepts_method(method.get("name"), method.get("id")):
+            return False
+        if not (self.filters.needs_path or self.filters.needs_styles):
+            return True
+
+        path_l, parent_params = self._walk_up(method)
+        if self.filters.needs_path:
+            path = join_path(path_l[1:])
+            if not self.filters.accepts_path(path, join_path([urlparse(path_l[0] or "").path, path])):
+                return False
+            if not self.filters.accepts_endpoint(method.get("name"), path, method.get("id")):
+                return False
+        if self.filters.needs_styles:
+            params = list(method.iter(self._tag("param"))) + parent_params
+            if not self.filters.accepts_styles({p.get("style") or "string" for p in params}):
+                return False
+        return True
+
+    def estimate(self, threshold=None):
+        """Returns a wadalize.estimate.Estimate of the requests each accepted
+        <method> expands to, counted from the alternations of the regexes in
+        its route, its request representations and the combinations of its
+        params, without expanding anything. Methods expanding to more than
+        `threshold` requests are flagged"""
+        with self._lock:
+            self._require_tree()
+            methods = [self._estimate_method(x) for x in self.root.iter(self._tag("method")) if self._accepts(x)]
+        return Estimate(methods, threshold=threshold, exact=self.combiner is None or self.combiner.strength is None)
+
+    def _estimate_method(self, method):
+        """Returns the MethodEstimate of a <method> element, mirroring what
+        _getrepresentation and _parse would expand"""
+        path_l, parent_params = self._walk_up(method)
+        normalized = unquote(self._normalize_url(path_l, list(method.iter(self._tag("param"))) + parent_params))
+        paths = self.count_urls(normalized)
+
+        representations = [r for r in method.iter(self._tag("representation")) if r.getparent().tag == self._tag("request")]
+        if representations:
+            expansions = [list(r.iter(self._tag("param"))) for r in representations]
+        else:
+            expansions = [list(method.iter(self._tag("param"))) + parent_params]
+
+        requests = 0
+        for params in expansions:
+            if self.combiner is None:
+                requests += paths
+            else:
+                names = self._candidate_names([normalized], params)
+                requests += self.combiner.estimate([paths] + [len(set(self.default_values[name])) for name in names])
+
+        return MethodEstimate(
+            method_id=method.get("id"),
+            method=method.get("name"),
+            host=urlparse(normalized).netloc,
+            template=self._template(path_l),
+            paths=paths,
+            representations=len(representations),
+            requests=requests,
+        )
+
+    def endpoints(self):
+        """Returns a list of WADLEndpoint objects, one for each <method>
+        element, holding its route before any template or regex expansion"""
+        with self._lock:
+            return self._endpoints()
+
+    def _endpoints(self):
+        self._require_tree()
+        endpoints = []
+
+        for x in self.root.iter(self._tag("method")):
+            if not self._accepts(x):
+                continue
+
+            path_l, parent_params = self._walk_up(x)
+            params = list(x.iter(self._tag("param"))) + parent_params
+
+            media_types = {"request": [], "response": []}
+            for r in x.iter(self._tag("representation")):
+                kind = r.getparent().tag.replace(self.ns, "")
+                if kind in media_types and r.get("mediaType"):
+                    media_types[kind].append(r.get("mediaType"))
+
+            endpoints.append(
+                WADLEndpoint(
+                    base=path_l[0] if path_l else "",
+                    path=join_path(path_l[1:]),
+                    method=x.get("name"),
+                    method_id=x.get("id"),
+                    params=params,
+                    request_media_types=media_types["request"],
+                    response_media_types=media_types["response"],
+                    default_values=self.default_values,
+                    values=self.values,
+                )
+            )
+
+        return endpoints
 
-        # In the end, return a array WADLRequest object representing the
-        # given parsed request
-        for url in urls:
-            array_wadl.append(WADLRequest(url, method=method.get("name"), params=params, default_values=self.default_values))
-        return array_wadl
+    def matcher(self, **kwargs):
+        """Returns a wadalize.matcher.WADLMatcher mapping concrete urls back
+        to the endpoints of this WADL"""
+        return WADLMatcher(self.endpoints(), **kwargs)
 
     def param_url(self, path):
         """
@@ -221,6 +520,8 @@ class WADLHandler:
         ______
             array: String (Array urls)
         """
+        from furl import furl
+
         try:
             origin = furl(path).origin
             segments = path.replace(origin, "").split("/")
@@ -228,10 +529,12 @@ class WADLHandler:
             auxurls = []
 
             # verify format parameter url { var: regex }
-            regex = r"^[{]\s*\w*\s*[:]\s*.*\s*[}]$"
             for se in segments:
-                if re.search(regex, se):
+                if re.search(REGEX_SEGMENT, se):
                     param = se.split(":")[1].replace("}", "")
+                    # exrex is only needed by the few WADLs using regexes
+                    import exrex
+
                     if "|" in param:
                         array = exrex.generate(param)
                         if urls:
@@ -260,8 +563,136 @@ class WADLHandler:
 
         return urls if isinstance(urls, list) else [urls]
 
+    def count_urls(self, path):
+        """Returns the number of urls param_url expands the given one to,
+        without expanding them: the product of the number of strings matched
+        by each regex with alternations"""
+        from furl import furl
+
+        count = 1
+        try:
+            origin = furl(path).origin
+            for se in path.replace(origin, "").split("/"):
+                param = se.split(":")[1].replace("}", "") if re.search(REGEX_SEGMENT, se) else ""
+                # regexes without alternations give a single string
+                if "|" in param:
+                    import exrex
+
+                    count *= exrex.count(param)
+        except Exception as e:
+            raise ValueError("Error extracting parameter from url {}".format(e))
+        return count
+
+
+class ReadOnlyDict(dict):
+    """Dict refusing to be modified, for the headers of a request. Copy it
+    with dict() to get a modifiable one"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("{} objects can't be modified".format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class _Immutable:
+    """Base of the classes whose attributes can't change once set, so their
+    objects can be shared between threads, and between requests"""
+
+    __slots__ = ()
+
+    def _set(self, **attrs):
+        for name, value in attrs.items():
+            object.__setattr__(self, name, value)
 
-class WADLRequest:
+    def __setattr__(self, name, value):
+        raise AttributeError("{} objects can't be modified".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} objects can't be modified".format(type(self).__name__))
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        self._set(**state)
+
+
+def join_path(parts):
+    """Joins route parts into a single path starting with "/", without
+    duplicated slashes"""
+    return "/" + "/".join(part.strip("/") for part in parts if part and part.strip("/"))
+
+
+class WADLEndpoint:
+    """
+    Class representing a <method> element of a WADL string, along with the
+    route leading to it. Unlike WADLRequest, templates like {id} or
+    {name: regex} in its path are kept as they are.
+    Args:
+        base (str): Base url, from <resources base="..."> unless overridden.
+        path (str): Path made of the path attribute of every <resource>
+            ancestor, relative to base.
+        method (str): HTTP verb of the <method> element.
+        method_id (str): id attribute of the <method> element.
+        params (list of lxml.etree._Element objects): <param> elements of the
+            method and its ancestors.
+        request_media_types (list of str): mediaType of each request
+            <representation>.
+        response_media_types (list of str): mediaType of each response
+            <representation>.
+        default_values (dict): Dictionary holding default values to be used in
+            place of params found in the WADL file.
+        values (wadalize.values.ValueProvider): Makes up the missing values.
+    """
+
+    def __init__(
+        self,
+        base,
+        path,
+        method,
+        method_id=None,
+        params=None,
+        request_media_types=None,
+        response_media_types=None,
+        default_values=None,
+        values=None,
+    ):
+        self.base = base
+        self.path = path
+        self.method = method
+        self.method_id = method_id
+        self.params = [WADLParam(param, default_values=default_values, values=values) for param in params] if params else []
+        self.request_media_types = request_media_types or []
+        self.response_media_types = response_media_types or []
+
+    @property
+    def full_path(self):
+        """Path of this endpoint including the path of its base url"""
+        return join_path([urlparse(self.base or "").path, self.path])
+
+    def dump_as_dict(self):
+        return dict(
+            base=self.base,
+            path=self.path,
+            method=self.method,
+            method_id=self.method_id,
+            params=[p.dump_as_dict() for p in self.params],
+            request_media_types=self.request_media_types,
+            response_media_types=self.response_media_types,
+        )
+
+
+class WADLRequest(_Immutable):
     """
     Class representing a request represented in a WADL string
     This class doesn't match exactly the <request> element that's part of the
@@ -277,21 +708,67 @@ class WADLRequest:
             that are used in this request.
         default_values (dict): Dictionary holding default values to be used in
             place of params found in the WADL file.
+        method_id (str): id attribute of the <method> element this request
+            comes from.
+        template (str): Url of this request before replacing its {param}
+            templates and expanding its regexes. Requests expanded from the
+            same <method> share it.
+        values (wadalize.values.ValueProvider): Makes up the values of the
+            params having none.
+        path (str): Same as template, relative to the base url, so it doesn't
+            change with the base. The path of template when not given.
+
+    Requests can't be modified once built, use replace() to get a modified
+    copy. Their params are a tuple and their headers a ReadOnlyDict.
     """
 
-    def __init__(self, location, method, params=None, headers=None, default_values=None):
-        if params is None:
-            params = []
-        if headers is None:
-            headers = []
+    __slots__ = ("location", "method", "default_values", "params", "headers", "method_id", "template", "path")
+
+    def __init__(self, location, method, params=None, headers=None, default_values=None, method_id=None, template=None, values=None, path=None):
         if default_values is None:
             default_values = {}
 
-        self.location = location
-        self.method = method
-        self.default_values = default_values
-        self.params = [WADLParam(param, default_values=default_values) for param in params] if params else []
-        self.headers = headers
+        self._set(
+            location=location,
+            method=method,
+            default_values=default_values,
+            params=tuple(WADLParam(param, default_values=default_values, values=values) for param in params) if params else (),
+            headers=ReadOnlyDict(headers or {}),
+            method_id=method_id,
+            template=template if template is not None else location,
+            path=path if path is not None else urlparse(template if template is not None else location).path,
+        )
+
+    def replace(self, **changes):
+        """Returns a copy of this request with the given attributes changed,
+        eg. wr.replace(headers={"If-None-Match": etag}). params must be
+        WADLParam objects"""
+        attrs = {name: getattr(self, name) for name in WADLRequest.__slots__}
+        attrs.update(changes)
+        attrs["params"] = tuple(attrs["params"])
+        attrs["headers"] = ReadOnlyDict(attrs["headers"] or {})
+        request = WADLRequest.__new__(WADLRequest)
+        request._set(**attrs)
+        return request
+
+    @property
+    def endpoint(self):
+        """Key identifying the endpoint of this request: its HTTP verb and
+        template"""
+        return "{} {}".format(self.method.upper(), self.template)
+
+    @property
+    def route(self):
+        """Key identifying the endpoint of this request whatever its base url:
+        its HTTP verb and path"""
+        return "{} {}".format(self.method.upper(), self.path)
+
+    @property
+    def url(self):
+        """Complete url of this request, query string included"""
+        _, query_str = self._split_params()
+        p = urlparse(self.location)
+        return urlunparse((p.scheme, p.netloc, p.path, p.params, query_str, ""))
 
     def dump_as_har(self):
         raise NotImplementedError("HAR output is not yet implemented")
@@ -301,11 +778,10 @@ class WADLRequest:
         location (the url), method and params"""
         return dict(location=self.location, method=self.method, params=[p.dump_as_dict() for p in self.params])
 
-    def dump_as_request(self):
-        """
-        Dumps current request as a Request object for easier handling
-        """
-        headers = self.headers if self.headers else {}
+    def _split_params(self):
+        """Splits the params of this request into a dict of header params and
+        a query string built from the query params"""
+        headers = {}  # header params (style="header")
         params = {}  # querystring params (style="query")
 
         for p in self.params:
@@ -326,14 +802,103 @@ class WADLRequest:
                         query_list.append("{}={}".format(key, val))
                     else:
                         query_list.append("{}=".format(key))
-        query_str = "&".join(query_list)
+        return headers, "&".join(query_list)
+
+    def fingerprint(self, headers=None):
+        """
+        Returns a hashable key identifying what this request actually sends,
+        so functionally identical requests get the same one: HTTP verb,
+        normalized url, sorted query string and selected headers.
+        Args:
+            headers (list of str): Names of the headers taken into account,
+                case insensitive. By default only the header params are, so
+                requests differing only by their representation Content-Type
+                share a fingerprint.
+        """
+        header_params, query_str = self._split_params()
+        if headers is None:
+            selected = header_params
+        else:
+            names = {name.lower() for name in headers}
+            all_headers = dict(self.headers) if self.headers else {}
+            all_headers.update(header_params)
+            selected = {key: val for key, val in all_headers.items() if key.lower() in names}
+
+        p = urlparse(self.location)
+        scheme = p.scheme.lower()
+        netloc = (p.hostname or "").lower()
+        if p.port and p.port != DEFAULT_PORTS.get(scheme):
+            netloc = "{}:{}".format(netloc, p.port)
+
+        return (
+            self.method.upper(),
+            scheme,
+            netloc,
+            re.sub("/{2,}", "/", p.path) or "/",
+            p.params,
+            tuple(sorted(query_str.split("&"))) if query_str else (),
+            tuple(sorted((key.lower(), val or "") for key, val in selected.items())),
+        )
+
+    def dump_as_request(self):
+        """
+        Dumps current request as a Request object for easier handling
+        """
+        # pydantic takes a while to import, and most paths don't need it
+        from .models import Request
+
+        headers = dict(self.headers) if self.headers else {}
+        header_params, query_str = self._split_params()
+        headers.update(header_params)
 
         p = urlparse(self.location)
         url = urlunparse((p.scheme, p.netloc, p.path, p.params, query_str, ""))
         return Request(url=url, method=self.method, headers=headers)
 
+    def to_wire(self, headers=None, body=None):
+        """
+        Dumps current request as a ready to send HTTP/1.1 message, skipping
+        the Request model entirely.
+        Args:
+            headers (dict): Extra headers to add to the request. They take
+                precedence over the ones found in the WADL.
+            body (bytes): Body to send. Requests having a representation (and
+                so a Content-Type) always get a Content-Length, even if no
+                body is given.
+        Return
+        ______
+            bytes: Request line, headers and body.
+        """
+        header_params, query_str = self._split_params()
+        p = urlparse(self.location)
 
-class WADLParam:
+        target = quote(p.path or "/", safe=WIRE_SAFE_CHARS)
+        if p.params:
+            target = "{};{}".format(target, quote(p.params, safe=WIRE_SAFE_CHARS))
+        if query_str:
+            target = "{}?{}".format(target, quote(query_str, safe=WIRE_SAFE_CHARS))
+
+        all_headers = {"Host": p.netloc}
+        all_headers.update(self.headers if self.headers else {})
+        all_headers.update(header_params)
+        if headers:
+            all_headers.update(headers)
+
+        if body is None:
+            body = b""
+        elif isinstance(body, str):
+            body = body.encode()
+        if body or "Content-Type" in all_headers:
+            all_headers["Content-Length"] = str(len(body))
+
+        lines = ["{} {} HTTP/1.1".format(self.method.upper(), target)]
+        # just like requests does, headers without a value are not sent
+        lines.extend("{}: {}".format(key, val) for key, val in all_headers.items() if val is not None)
+        lines.append("\r\n")
+        return "\r\n".join(lines).encode("latin-1", errors="replace") + body
+
+
+class WADLParam(_Immutable):
     """
     Class representing WADL param elements. They might be query string
     variables, template parameters and HTTP headers.
@@ -366,6 +931,8 @@ class WADLParam:
         param_el (lxml.etree._Element): <param> element to handle.
         default_values (dict): Dictionary holding default values to be used in
         place of params found in the WADL file.
+        values (wadalize.values.ValueProvider): Makes up a value when neither
+        default_values nor the "default" attribute give one.
     Attributes:
         name (str): name attribute of the passed <param> element.
         type (str): type attribute of the passed <param> element.
@@ -373,26 +940,39 @@ class WADLParam:
         value (str): value given to this <param> element. Will be set to
             (in this order of predecende)
                      value of the corresponding default_values key or
-                     value of the "default" attribute of the <param> element
+                     value of the "default" attribute of the <param> element or
+                     value made up by the values provider, if any
+    Like requests, params can't be modified once built.
     """
 
-    def __init__(self, param_el, default_values=None):
+    __slots__ = ("name", "type", "style", "value")
+
+    def __init__(self, param_el, default_values=None, values=None):
         if default_values is None:
             default_values = {}
         if not param_el.get("name") or not param_el.get("style"):
             if param_el.get("name", "") != "javax.ws.rs.container.Suspended":
                 raise ValueError("Attributes name and style are required")
 
-        self.name = param_el.get("name")
-        self.type = param_el.get("type")
-        self.style = param_el.get("style") or "string"
-        self.value = default_values.get(self.name) or param_el.get("default")  # default_values takes precedence over default param
+        name = param_el.get("name")
+        value = default_values.get(name) or param_el.get("default")  # default_values takes precedence over default param
+        if value is None and values is not None:
+            value = values.value(name, param_el.get("type"))
+        self._set(name=name, type=param_el.get("type"), style=param_el.get("style") or "string", value=value)
 
     def dump_as_dict(self):
         """Dump param as a simple dict composed of keys name, type, style and
         value"""
         return dict(name=self.name, type=self.type, style=self.style, value=self.value)
 
+    @classmethod
+    def from_dict(cls, data):
+        """Returns a WADLParam from the output of dump_as_dict, without
+        needing any <param> element"""
+        param = cls.__new__(cls)
+        param._set(name=data["name"], type=data["type"], style=data["style"], value=data["value"])
+        return param
+
     def __eq__(self, other):
         """Two WADLparam objects are considered equal if both their "name" and
         "style" attributes are equal"""
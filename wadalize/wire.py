@@ -0,0 +1,101 @@
+import mmap
+import os
+from array import array
+
+
+# Every wire file is accompanied by an index file holding the offset of each
+# request plus a final offset marking the end of the data, stored as unsigned
+# 64 bit integers in native byte order.
+INDEX_SUFFIX = ".idx"
+INDEX_TYPECODE = "Q"
+
+
+def write_wire(path, requests, headers=None, buffering=1024 * 1024):
+    """
+    Writes a list of WADLRequest objects back to back to the file at `path`
+    using their HTTP/1.1 wire format, plus an index file at
+    `path + INDEX_SUFFIX` with the offset of each request.
+
+    The WADL only tells the media type of a representation, not its content,
+    so requests having one are written without a body, with a Content-Type
+    and a Content-Length of 0. Use WADLRequest.to_wire(body=...) to send them
+    with a body.
+    Args:
+        path (str): Path of the file to write.
+        requests (iterable of WADLRequest): Requests to export.
+        headers (dict): Extra headers passed to WADLRequest.to_wire.
+        buffering (int): Size of the write buffer.
+    Return
+    ______
+        int: Number of requests written.
+    """
+    offsets = array(INDEX_TYPECODE, [0])
+
+    with open(path, "wb", buffering=buffering) as f:
+        for wr in requests:
+            offsets.append(offsets[-1] + f.write(wr.to_wire(headers=headers)))
+
+    with open(path + INDEX_SUFFIX, "wb") as f:
+        offsets.tofile(f)
+
+    return len(offsets) - 1
+
+
+class WireFile:
+    """
+    Read only view over a file written by write_wire. The data file is
+    memory mapped, and each request is returned as a memoryview slice of the
+    map so no bytes are copied until the caller does so. Slices still in use
+    when the file is closed stay valid, the map is closed along with the last
+    of them.
+    Args:
+        path (str): Path of the data file. Its index must live next to it.
+    """
+
+    def __init__(self, path):
+        self.offsets = array(INDEX_TYPECODE)
+        with open(path + INDEX_SUFFIX, "rb") as f:
+            self.offsets.frombytes(f.read())
+        if not self.offsets:
+            raise ValueError("Wire index {} is empty".format(path + INDEX_SUFFIX))
+
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+        else:
+            # empty files can't be mapped
+            self._map = None
+            self._view = memoryview(b"")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, num):
+        if num < 0:
+            num += len(self)
+        if not 0 <= num < len(self):
+            raise IndexError("wire request index out of range")
+        start, end = self.offsets[num], self.offsets[num + 1]
+        return self._view[start:end]
+
+    def __iter__(self):
+        for num in range(len(self)):
+            yield self[num]
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # some request is still in use, the map is closed along with
+                # its last slice
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()